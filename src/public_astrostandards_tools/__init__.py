@@ -1,6 +1,12 @@
 from . import astro_time
+from . import time_constants
 from . import coordinates
+from . import ephem_cache
+from . import ephemeris
+from . import dll_batch
+from . import relative
 from . import sgp4
+from . import sgp4_numpy
 from . import ephem_fitter
 from . import egp
 from . import sensor
@@ -8,4 +14,5 @@ from . import udl_eo_fitter
 from . import residuals
 from . import utils
 from . import observations
-from . import perturb_tle
\ No newline at end of file
+from . import perturb_tle
+from . import parallel
\ No newline at end of file
@@ -24,8 +24,12 @@
 
 import sys
 import os
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
+from . import time_constants
 
 # epochs to help us convert from and to Julian... (rather than a library)
 _J2K_dt = datetime(year=2000, month=1, day=1, hour=12)
@@ -33,6 +37,15 @@ _J2K_jd = 2451545.0
 
 DATE_FIELDS = ['datetime','theta','ds50_utc','ds50_et','ds50_ut1']
 
+# astrostandard epoch; ds50 is 1-indexed, so this instant is ds50 == 1.0
+_DS50_dt64  = np.datetime64( '1950-01-01T00:00:00', 'ns' )
+_NS_PER_DAY = 86400 * 10**9
+# J2000 (2000-01-01 12:00) expressed as ds50
+_J2K_ds50   = 18263.5
+
+# set once we've checked theta_grnwch_fk5 against the DLL (None == not checked yet)
+_THETA_AGREES = { 'value' : None }
+
 # --------------------------------------------------------------------------------------------------------
 def dt2julian( DT : datetime ):
     del_d = ( DT - _J2K_dt ).total_seconds() / 86400
@@ -47,6 +60,11 @@ def load_time_constants( filename : str, INTERFACE):
     try:
         assert os.path.isfile( filename )
         assert 0 == INTERFACE.TimeFuncDll.TimeFuncLoadFile( INTERFACE.Cstr(filename, 512 ) )
+        # anything converted before is stale now (even for the same path; the file may have been
+        # rewritten in place)
+        clear_time_cache()
+        # keep the numpy copy of the table in sync with the DLL
+        time_constants.on_load( filename )
     except Exception as e:
         print('Could not load time constants from : {}'.format( filename ) )
         print(e)
@@ -57,8 +75,157 @@ def datetime_to_ds50( dt : list[ datetime ] , INTERFACE ):
     return [ INTERFACE.helpers.datetime_to_ds50( X, INTERFACE.TimeFuncDll ) for X in dt ]
 
 # -----------------------------------------------------------------------------------------------------
-def convert_times( datetimes : list[ datetime ] ,
-                   INTERFACE ):
+def to_datetime64( datetimes ):
+    '''
+    take datetimes in any of the forms we get passed (list of datetime, DatetimeIndex, Series, 
+    datetime64 array) and return a naive datetime64[ns] array in UTC
+
+    timezone-aware inputs are converted to UTC, naive inputs are assumed to already be UTC;
+    anything that can't be parsed comes back as NaT
+    '''
+    dt = pd.DatetimeIndex( pd.to_datetime( pd.Series( datetimes ), utc=True, errors='coerce' ) )
+    return dt.tz_convert( None ).values.astype( 'datetime64[ns]' )
+
+# -----------------------------------------------------------------------------------------------------
+def datetime64_to_ds50( dt64 : np.ndarray ):
+    '''
+    vectorized version of helpers.datetime_to_ds50 : datetime64 (UTC) -> ds50 UTC 
+
+    whole days and the day fraction are split in integer nanoseconds before going to float so we
+    don't lose precision on the large day count; NaT comes back as -1 (same as the DLL path)
+    '''
+    dt64      = np.asarray( dt64, dtype='datetime64[ns]' )
+    ns        = ( dt64 - _DS50_dt64 ).astype( np.int64 )
+    days, rem = np.divmod( ns, _NS_PER_DAY )
+    ds50      = days + 1.0 + rem / _NS_PER_DAY
+    return np.where( np.isnat( dt64 ), -1., ds50 )
+
+# -----------------------------------------------------------------------------------------------------
+def theta_grnwch_fk5( ds50_ut1 : np.ndarray ):
+    '''
+    vectorized ThetaGrnwchFK5 : Greenwich mean sidereal angle (radians, [0, 2pi) ) from ds50 UT1
+    using the IAU-82 / FK5 GMST polynomial
+    '''
+    ds50_ut1 = np.asarray( ds50_ut1, dtype=np.float64 )
+    T        = ( ds50_ut1 - _J2K_ds50 ) / 36525.
+    # GMST in seconds of time
+    gmst     = 67310.54841 + ( 876600. * 3600. + 8640184.812866 ) * T + 0.093104 * T**2 - 6.2e-6 * T**3
+    return np.mod( np.mod( gmst, 86400. ) * ( 2 * np.pi / 86400. ), 2 * np.pi )
+
+# -----------------------------------------------------------------------------------------------------
+def _theta( ds50_ut1 : np.ndarray, INTERFACE, tol=1e-9 ):
+    '''
+    theta for the whole array; use the numpy version once it has been spot checked against the DLL
+    (once per process), otherwise fall back to one ThetaGrnwchFK5 call per value
+    '''
+    if _THETA_AGREES['value'] is None:
+        probe = _J2K_ds50 + np.linspace( -20000, 20000, 41 ) + 0.123
+        dll   = np.array( [ INTERFACE.TimeFuncDll.ThetaGrnwchFK5( X ) for X in probe ] )
+        err   = np.abs( np.angle( np.exp( 1j * ( theta_grnwch_fk5( probe ) - dll ) ) ) )
+        _THETA_AGREES['value'] = bool( np.max( err ) < tol )
+    if _THETA_AGREES['value']:
+        return theta_grnwch_fk5( ds50_ut1 )
+    return np.fromiter( (INTERFACE.TimeFuncDll.ThetaGrnwchFK5(X) for X in ds50_ut1), dtype=np.float64, count=len(ds50_ut1) )
+
+# -----------------------------------------------------------------------------------------------------
+def theta_from_utc( ds50_utc : np.ndarray, INTERFACE ):
+    ''' Greenwich angle (rad) for ds50 UTC times (UT1 from the time constants) '''
+    ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+    return _theta( time_constants.utc_to_ut1( ds50_utc, INTERFACE ), INTERFACE )
+
+# -----------------------------------------------------------------------------------------------------
+class LazyTimeFrame( pd.DataFrame ):
+    '''
+    convert_times frame that starts with only `datetime` and `ds50_utc`; theta, ds50_ut1 and ds50_et 
+    are computed the first time somebody reads them (df['theta'], df[DATE_FIELDS], df.theta) and are
+    then ordinary columns.  Propagation-only work never pays for them.
+
+    `'theta' in df` is True for the lazy fields (reading them then computes them), so code that
+    checks before recomputing picks up the lazy value.
+
+    NOTE: df.columns only lists what has been computed, and row-wise code (apply / concat / 
+    .loc[:, cols]) doesn't go through __getitem__; call materialize() before handing the frame to
+    anything like that.  A concat drops the INTERFACE, after which the lazy fields are gone.
+    '''
+    _metadata  = [ '_interface' ]
+    _interface = None
+
+    @property
+    def _constructor( self ):
+        return LazyTimeFrame
+
+    def _derive( self, field ):
+        if field in self.columns or field not in LAZY_FIELDS or 'ds50_utc' not in self.columns:
+            return
+        assert self._interface is not None, 'LazyTimeFrame lost its INTERFACE; call materialize() before concat / merge'
+        ds50_utc = self['ds50_utc'].values
+        if field == 'ds50_ut1':
+            self['ds50_ut1'] = time_constants.utc_to_ut1( ds50_utc, self._interface )
+        elif field == 'theta':
+            self._derive( 'ds50_ut1' )
+            self['theta'] = _theta( self['ds50_ut1'].values, self._interface )
+        elif field == 'ds50_et':
+            self['ds50_et'] = time_constants.utc_to_et( ds50_utc, self._interface )
+
+    def materialize( self, fields = DATE_FIELDS ):
+        for F in fields:
+            self._derive( F )
+        return self
+
+    def __contains__( self, key ):
+        if super().__contains__( key ):
+            return True
+        return key in LAZY_FIELDS and self._interface is not None and super().__contains__( 'ds50_utc' )
+
+    def __getitem__( self, key ):
+        if isinstance( key, str ):
+            self._derive( key )
+        elif isinstance( key, ( list, pd.Index, np.ndarray ) ) and len( key ) and isinstance( key[0], str ):
+            self.materialize( key )
+        return super().__getitem__( key )
+
+    def __getattr__( self, name ):
+        if name in LAZY_FIELDS and '_mgr' in self.__dict__ :
+            self._derive( name )
+        return super().__getattr__( name )
+
+# the columns a LazyTimeFrame fills in on demand
+LAZY_FIELDS = ['theta','ds50_et','ds50_ut1']
+
+# -----------------------------------------------------------------------------------------------------
+def materialize( df : pd.DataFrame, fields = DATE_FIELDS ):
+    ''' make sure the time fields are real columns (no-op for a regular frame) '''
+    if isinstance( df, LazyTimeFrame ):
+        df.materialize( fields )
+    return df
+
+# -----------------------------------------------------------------------------------------------------
+def ds50_to_datetime64( ds50 : np.ndarray ):
+    '''
+    vectorized ds50 UTC -> datetime64[ns] (naive, UTC); inverse of datetime64_to_ds50
+    '''
+    ds50 = np.asarray( ds50, dtype=np.float64 )
+    days = np.floor( ds50 )
+    ns   = ( days - 1 ).astype( np.int64 ) * _NS_PER_DAY + np.round( ( ds50 - days ) * _NS_PER_DAY ).astype( np.int64 )
+    return _DS50_dt64 + ns.astype( 'timedelta64[ns]' )
+
+# -----------------------------------------------------------------------------------------------------
+def julian_to_datetime64( jd : np.ndarray ):
+    ''' vectorized julian2dt '''
+    # JD 2433282.5 is 1950-01-01 00:00, which is ds50 == 1
+    jd = np.asarray( jd, dtype=np.float64 )
+    return ds50_to_datetime64( jd - 2433281.5 )
+
+# -----------------------------------------------------------------------------------------------------
+def format_iso( dt64 : np.ndarray, unit='us' ):
+    '''
+    bulk ISO strings ( '%Y-%m-%dT%H:%M:%S.%f' for the default microsecond unit ) from datetime64
+    '''
+    return np.datetime_as_string( np.asarray( dt64, dtype='datetime64[ns]' ), unit=unit )
+
+# -----------------------------------------------------------------------------------------------------
+def _convert_times_dll( datetimes : list[ datetime ] ,
+                        INTERFACE ):
     # convert the datetimes to astrostandard epochs
     def safeConvert( dt ):
         try :
@@ -79,6 +246,237 @@ def convert_times( datetimes : list[ datetime ] ,
                'ds50_et'  : INTERFACE.TimeFuncDll.UTCToET( Y ),
                'ds50_ut1' : Z } for X,Y,Z in zip(datetimes,ds50_utc,ds50_ut1) ])
 
+# -----------------------------------------------------------------------------------------------------
+class TimeFrameCache:
+    '''
+    LRU cache of converted time frames (batch jobs re-use the same windows over and over)
+
+    max_bytes : memory bound for the cached frames; least recently used frames are dropped first
+    '''
+    def __init__( self, max_bytes = 256 * 2**20 ):
+        self.max_bytes = max_bytes
+        self.nbytes    = 0
+        self.hits      = 0
+        self.misses    = 0
+        self._frames   = OrderedDict()
+
+    def __len__( self ):
+        return len( self._frames )
+
+    def clear( self ):
+        self._frames.clear()
+        self.nbytes = 0
+
+    def get( self, key ):
+        if key not in self._frames:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._frames.move_to_end( key )
+        # hand out a copy; nobody gets to annotate the cached frame
+        return self._frames[ key ][0].copy()
+
+    def put( self, key, frame : pd.DataFrame ):
+        size = int( frame.memory_usage( deep=True ).sum() )
+        if size > self.max_bytes:
+            return
+        if key in self._frames:
+            self.nbytes -= self._frames.pop( key )[1]
+        self._frames[ key ] = ( frame.copy(), size )
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self._frames.popitem( last=False )[1][1]
+
+_TIME_CACHE = TimeFrameCache()
+
+# -----------------------------------------------------------------------------------------------------
+def set_time_cache_size( max_bytes : int ):
+    _TIME_CACHE.max_bytes = max_bytes
+    while _TIME_CACHE.nbytes > max_bytes and len( _TIME_CACHE ):
+        _TIME_CACHE.nbytes -= _TIME_CACHE._frames.popitem( last=False )[1][1]
+
+# -----------------------------------------------------------------------------------------------------
+def clear_time_cache():
+    _TIME_CACHE.clear()
+
+# -----------------------------------------------------------------------------------------------------
+def time_cache_stats():
+    return { 'entries' : len( _TIME_CACHE ),
+             'bytes'   : _TIME_CACHE.nbytes,
+             'hits'    : _TIME_CACHE.hits,
+             'misses'  : _TIME_CACHE.misses }
+
+# -----------------------------------------------------------------------------------------------------
+def _timestamps_key( datetimes ):
+    # hash of the instants (and of how the datetime column was typed, since we hand that back too)
+    dts  = pd.Series( datetimes )
+    dt64 = to_datetime64( dts )
+    return ( 'hash', str( dts.dtype ), len( dt64 ), hashlib.sha1( dt64.view( np.int64 ).tobytes() ).hexdigest() )
+
+# -----------------------------------------------------------------------------------------------------
+def convert_times( datetimes : list[ datetime ] ,
+                   INTERFACE,
+                   vectorized = True,
+                   cache      = False,
+                   lazy       = False ):
+    '''
+    take a set of datetimes and return a frame with DATE_FIELDS set (this is the "standard" time frame
+    that the rest of the package expects)
+
+    vectorized : build ds50_utc with numpy (instead of one DLL call per datetime) and assemble the 
+                 frame from columns; set to False to use the original per-datetime DLL path.
+                 The UT1 / ET offsets come from time_constants (numpy) once the loaded file has 
+                 been checked against the DLL, and theta comes from theta_grnwch_fk5.
+    cache      : look the timestamps up in the time-frame cache first (keyed on a hash of the 
+                 timestamps); you get your own copy either way
+    lazy       : return a LazyTimeFrame; theta / ds50_ut1 / ds50_et are only computed when read
+                 (the cache holds complete frames, so not together with cache)
+    '''
+    assert not ( cache and lazy ), 'convert_times : cache and lazy do not mix (the cache holds complete frames)'
+    if not vectorized:
+        return _convert_times_dll( datetimes, INTERFACE )
+
+    if cache:
+        key = _timestamps_key( datetimes )
+        rv  = _TIME_CACHE.get( key )
+        if rv is None:
+            rv = convert_times( datetimes, INTERFACE )
+            _TIME_CACHE.put( key, rv )
+        return rv
+
+    ds50_utc = datetime64_to_ds50( to_datetime64( datetimes ) )
+    if lazy:
+        rv = LazyTimeFrame( { 'datetime' : pd.Series( datetimes ).reset_index( drop=True ),
+                              'ds50_utc' : ds50_utc } )
+        rv._interface = INTERFACE
+        return rv
+
+    ds50_ut1 = time_constants.utc_to_ut1( ds50_utc, INTERFACE )
+    return pd.DataFrame( 
+           { 'datetime' : pd.Series( datetimes ).reset_index( drop=True ),
+             'theta'    : _theta( ds50_ut1, INTERFACE ),
+             'ds50_utc' : ds50_utc,
+             'ds50_et'  : time_constants.utc_to_et( ds50_utc, INTERFACE ),
+             'ds50_ut1' : ds50_ut1 } )
+
+# -----------------------------------------------------------------------------------------------------
+def convert_time_range( start, end, freq, INTERFACE ):
+    '''
+    pd.date_range + convert_times, memoized on the (start, end, freq) spec
+    '''
+    key = ( 'range', str( start ), str( end ), str( freq ) )
+    rv  = _TIME_CACHE.get( key )
+    if rv is None:
+        rv = convert_times( pd.date_range( start, end, freq=freq ), INTERFACE )
+        _TIME_CACHE.put( key, rv )
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def iter_date_range( start, end, freq, chunk_size : int ):
+    '''
+    pd.date_range( start, end, freq=freq ) handed out `chunk_size` timestamps at a time; the full
+    range is never built
+    '''
+    start = pd.Timestamp( start )
+    step  = pd.Timedelta( freq )
+    assert step > pd.Timedelta( 0 ) and chunk_size > 0
+    N     = int( ( pd.Timestamp( end ) - start ) // step ) + 1
+    for S in range( 0, max( N, 0 ), chunk_size ):
+        yield pd.date_range( start + S * step, periods=min( chunk_size, N - S ), freq=step )
+
+
+# -----------------------------------------------------------------------------------------------------
+class TimeGrid:
+    '''
+    a time grid that is shared across many targets (e.g. a catalog screened over the same window)
+
+    every per-time quantity (offsets, theta, sun / moon, ground site positions, ...) is computed the 
+    first time something asks for it and then re-used; anything in the package that takes a `dates`
+    frame from convert_times will also take one of these
+    '''
+    def __init__( self, datetimes, INTERFACE ):
+        self.INTERFACE = INTERFACE
+        self.datetime  = pd.Series( datetimes ).reset_index( drop=True )
+        self.ds50_utc  = datetime64_to_ds50( to_datetime64( datetimes ) )
+        self._cache    = {}
+
+    @classmethod
+    def from_range( cls, start, end, freq, INTERFACE ):
+        return cls( pd.date_range( start, end, freq=freq ), INTERFACE )
+
+    def __len__( self ):
+        return self.ds50_utc.shape[0]
+
+    def cached( self, key, builder ):
+        ''' generic hook: return self._cache[key], building it with builder() the first time '''
+        if key not in self._cache:
+            self._cache[ key ] = builder()
+        return self._cache[ key ]
+
+    @property
+    def ds50_ut1( self ):
+        return self.cached( 'ds50_ut1', lambda : time_constants.utc_to_ut1( self.ds50_utc, self.INTERFACE ) )
+
+    @property
+    def ds50_et( self ):
+        return self.cached( 'ds50_et', lambda : time_constants.utc_to_et( self.ds50_utc, self.INTERFACE ) )
+
+    @property
+    def ds50_tai( self ):
+        return self.cached( 'ds50_tai', lambda : time_constants.utc_to_tai( self.ds50_utc, self.INTERFACE ) )
+
+    @property
+    def theta( self ):
+        return self.cached( 'theta', lambda : _theta( self.ds50_ut1, self.INTERFACE ) )
+
+    @property
+    def frame( self ):
+        ''' the convert_times-style frame; shared, so treat it as read-only (see copy) '''
+        return self.cached( 'frame', lambda : pd.DataFrame( 
+                                                { 'datetime' : self.datetime,
+                                                  'theta'    : self.theta,
+                                                  'ds50_utc' : self.ds50_utc,
+                                                  'ds50_et'  : self.ds50_et,
+                                                  'ds50_ut1' : self.ds50_ut1 } ) )
+
+    def copy( self ):
+        return self.frame.copy()
+
+    def _vectors( self, key, builder ):
+        # (N,3) positions are held as one read-only array; every caller gets fresh lists (the cells 
+        # end up in frames that get annotated, and must not reach back into the cache)
+        def build():
+            A = np.array( builder(), dtype=np.float64 )
+            A.flags.writeable = False
+            return A
+        return self.cached( key, build ).tolist()
+
+    def sun( self ):
+        from . import sensor
+        return self._vectors( 'sun', lambda : sensor.sun_at_time( self.frame, self.INTERFACE ) )
+
+    def moon( self ):
+        from . import sensor
+        return self._vectors( 'moon', lambda : sensor.moon_at_time( self.frame, self.INTERFACE ) )
+
+    def site_teme( self, lat : float, lon : float, height : float ):
+        ''' TEME position of a fixed ground site at every grid time '''
+        from . import coordinates
+        def build():
+            site_f = self.frame[ ['ds50_utc','theta'] ].copy()
+            site_f['lat'], site_f['lon'], site_f['height'] = lat, lon, height
+            return np.vstack( coordinates.LLH_to_TEME( site_f, self.INTERFACE )['teme_p'] )
+        return self._vectors( ('site', lat, lon, height), build )
+
+# -----------------------------------------------------------------------------------------------------
+def time_frame( dates ):
+    '''
+    functions that take a `dates` frame call this so they can be handed a TimeGrid as well; a frame 
+    is passed straight through (callers keep annotating it in place), a grid gives a fresh copy
+    '''
+    if isinstance( dates, TimeGrid ):
+        return dates.copy()
+    return dates
 
 # -----------------------------------------------------------------------------------------------------
 def test():
@@ -97,6 +495,22 @@ def test():
                             freq='5 min' )
     print(convert_times( dates, harness) )
 
+    # the vectorized path should agree with the per-datetime DLL path
+    dates  = pd.date_range( '2025-12-23', '2025-12-30', freq='5 min' )
+    fast   = convert_times( dates, harness )
+    slow   = convert_times( dates, harness, vectorized=False )
+    for F in DATE_FIELDS[1:]:
+        err = np.max( np.abs( fast[F].values - slow[F].values ) )
+        print('{:10s} max diff (vectorized vs DLL) : {}'.format( F, err ) )
+        assert err < 1e-9
+
+    # numpy GMST against the DLL over a long span (radians)
+    ds50_ut1 = np.linspace( 10000, 40000, 100001 )
+    dll      = np.array( [ harness.TimeFuncDll.ThetaGrnwchFK5( X ) for X in ds50_ut1 ] )
+    err      = np.abs( np.angle( np.exp( 1j * ( theta_grnwch_fk5( ds50_ut1 ) - dll ) ) ) )
+    print('theta max diff (numpy vs ThetaGrnwchFK5) : {} rad'.format( np.max(err) ) )
+    assert np.max( err ) < 1e-9
+
 
 # ==================================================================================================
 if __name__ == '__main__':
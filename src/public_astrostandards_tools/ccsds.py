@@ -1,4 +1,5 @@
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from . import astro_time
    
@@ -12,16 +13,31 @@ def toCCSDS( df : pd.DataFrame ):
 
         generate an output that is CCSDS-like
     '''
+    # build the columns as arrays (no per-row apply / strftime)
+    P   = np.vstack( df['j2k_p'].values )
+    V   = np.vstack( df['j2k_v'].values )
     odf = pd.DataFrame()
-    odf['datetime']  = df['datetime'].apply( lambda X: X.strftime('%Y-%m-%dT%H:%M:%S.%f') )
-    odf['j2k_x']     = df['j2k_p'].apply( lambda X: X[0] )
-    odf['j2k_y']     = df['j2k_p'].apply( lambda X: X[1] )
-    odf['j2k_z']     = df['j2k_p'].apply( lambda X: X[2] )
-    odf['j2k_dx']    = df['j2k_v'].apply( lambda X: X[0] )
-    odf['j2k_dy']    = df['j2k_v'].apply( lambda X: X[1] )
-    odf['j2k_dz']    = df['j2k_v'].apply( lambda X: X[2] )
+    odf['datetime']  = astro_time.format_iso( astro_time.to_datetime64( df['datetime'] ) )
+    odf['j2k_x']     = P[:,0]
+    odf['j2k_y']     = P[:,1]
+    odf['j2k_z']     = P[:,2]
+    odf['j2k_dx']    = V[:,0]
+    odf['j2k_dy']    = V[:,1]
+    odf['j2k_dz']    = V[:,2]
     return odf.to_csv( index=None , sep='\t', header=None )
 
+# -----------------------------------------------------------------------------------------------------
+def writeCCSDS( chunks, fh ):
+    '''
+    write an iterable of frames (e.g. sgp4.propTLE_chunks with frame='J2K') to an open file, one 
+    block at a time; returns the number of rows written
+    '''
+    N = 0
+    for C in chunks:
+        fh.write( toCCSDS( C ) )
+        N += C.shape[0]
+    return N
+
 # -----------------------------------------------------------------------------------------------------
 def fromCCSDS( lines, harness ): 
     '''
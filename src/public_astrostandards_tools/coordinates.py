@@ -1,6 +1,10 @@
 import ctypes
+import hashlib
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
+from . import time_constants
+from .dll_batch import BatchCall
 
 '''
 Key dataframe names (semi-canonical):
@@ -17,8 +21,133 @@ EARTH_RAD_EQUATOR = 6378.1
 EARTH_RAD_POLE    = 6356.8
 AoverB_sq         = ( EARTH_RAD_EQUATOR / EARTH_RAD_POLE ) ** 2
 
+# earth rotation rate (rad / s) used when moving velocities between TEME and EFG
+EARTH_ROT_RATE    = 7.29211514670698e-5
+
+# -----------------------------------------------------------------------------------------------------
+# TEME <-> EFG with numpy : rotate about Z by theta (the Greenwich angle convert_times already has) and
+# add / remove the earth's rotation (w x r) in the velocity.  EFG here is what ECIToEFGTime gives 
+# (no polar motion); pass polar = ( xp, yp ) arcsec to go on to the polar-motion-corrected frame 
+# (ECR), e.g. from time_constants.polar_motion.
 # -----------------------------------------------------------------------------------------------------
-def TEME_to_J2K( teme: pd.DataFrame , harness ):
+ARCSEC_TO_RAD     = np.pi / ( 180. * 3600. )
+
+def _polar_matrices( polar ):
+    ''' (N,3,3) W with r_pef = W r_ecr (Vallado, IAU-76/FK5 polar motion) '''
+    xp, yp = ( np.asarray( X, dtype=np.float64 ) * ARCSEC_TO_RAD for X in polar )
+    cx, sx, cy, sy = np.cos( xp ), np.sin( xp ), np.cos( yp ), np.sin( yp )
+    W      = np.empty( xp.shape + (3,3) )
+    W[...,0,0], W[...,0,1], W[...,0,2] = cx,       0.,       -sx
+    W[...,1,0], W[...,1,1], W[...,1,2] = sx * sy,  cy,       cx * sy
+    W[...,2,0], W[...,2,1], W[...,2,2] = sx * cy, -sy,       cx * cy
+    return W
+
+def teme_efg_rotate( theta : np.ndarray, pos : np.ndarray, vel : np.ndarray = None, polar = None ):
+    '''
+    TEME -> EFG for (N,3) arrays given the Greenwich angle (rad) at each row : rotate about Z by 
+    theta and take out the earth's rotation (w x r) from the velocity.  Returns ( efg_p, efg_v )
+    '''
+    c, s   = np.cos( theta ), np.sin( theta )
+    P      = np.asarray( pos, dtype=np.float64 )
+    efg_p  = np.column_stack( ( c * P[:,0] + s * P[:,1], -s * P[:,0] + c * P[:,1], P[:,2] ) )
+    efg_v  = None
+    if vel is not None:
+        V      = np.asarray( vel, dtype=np.float64 )
+        efg_v  = np.column_stack( ( c * V[:,0] + s * V[:,1] + EARTH_ROT_RATE * efg_p[:,1],
+                                   -s * V[:,0] + c * V[:,1] - EARTH_ROT_RATE * efg_p[:,0],
+                                    V[:,2] ) )
+    if polar is not None:
+        W     = _polar_matrices( polar )
+        efg_p = np.einsum( 'nji,nj->ni', W, efg_p )
+        efg_v = None if efg_v is None else np.einsum( 'nji,nj->ni', W, efg_v )
+    return efg_p, efg_v
+
+def efg_teme_rotate( theta : np.ndarray, pos : np.ndarray, vel : np.ndarray = None, polar = None ):
+    ''' inverse of teme_efg_rotate; returns ( teme_p, teme_v ) '''
+    P      = np.asarray( pos, dtype=np.float64 )
+    V      = None if vel is None else np.asarray( vel, dtype=np.float64 )
+    if polar is not None:
+        W  = _polar_matrices( polar )
+        P  = np.einsum( 'nij,nj->ni', W, P )
+        V  = None if V is None else np.einsum( 'nij,nj->ni', W, V )
+    c, s   = np.cos( theta ), np.sin( theta )
+    teme_p = np.column_stack( ( c * P[:,0] - s * P[:,1], s * P[:,0] + c * P[:,1], P[:,2] ) )
+    if V is None:
+        return teme_p, None
+    # put the earth's rotation back before rotating out of the earth frame
+    Vi     = np.column_stack( ( V[:,0] - EARTH_ROT_RATE * P[:,1], V[:,1] + EARTH_ROT_RATE * P[:,0], V[:,2] ) )
+    teme_v = np.column_stack( ( c * Vi[:,0] - s * Vi[:,1], s * Vi[:,0] + c * Vi[:,1], Vi[:,2] ) )
+    return teme_p, teme_v
+
+# -----------------------------------------------------------------------------------------------------
+def _tai( df : pd.DataFrame, harness, grid=None ):
+    if grid is not None:
+        assert len( grid ) == df.shape[0]
+        return grid.ds50_tai
+    return time_constants.utc_to_tai( df['ds50_utc'].values, harness )
+
+# -----------------------------------------------------------------------------------------------------
+# TEME <-> J2K : RotDateToJ2K is a rotation, so one probe per distinct time (unit vectors in, matrix
+# columns out) gives everything; every row (and every satellite on the same times) is then one einsum.
+# Matrices are cached per grid (TimeGrid.cached) and, for plain frames, on a hash of the TAI times.
+# -----------------------------------------------------------------------------------------------------
+_MATRIX_CACHE       = OrderedDict()
+_MATRIX_CACHE_BYTES = 256 * 2**20
+_MATRIX_CACHE_GEN   = { 'value' : 0 }
+
+def _cached_matrices( kind, ds50, builder ):
+    # new time constants (UT1, leap seconds) mean new matrices
+    if _MATRIX_CACHE_GEN['value'] != time_constants.generation():
+        _MATRIX_CACHE.clear()
+        _MATRIX_CACHE_GEN['value'] = time_constants.generation()
+    key = ( kind, ds50.shape[0], hashlib.sha1( np.ascontiguousarray( ds50 ).tobytes() ).hexdigest() )
+    if key not in _MATRIX_CACHE:
+        _MATRIX_CACHE[ key ] = builder()
+        while len( _MATRIX_CACHE ) > 1 and sum( X.nbytes for X in _MATRIX_CACHE.values() ) > _MATRIX_CACHE_BYTES:
+            _MATRIX_CACHE.popitem( last=False )
+    _MATRIX_CACHE.move_to_end( key )
+    return _MATRIX_CACHE[ key ]
+
+# -----------------------------------------------------------------------------------------------------
+def teme_to_j2k_matrices( ds50_tai : np.ndarray, harness ):
+    '''
+    (N,2,3,3) TEME -> J2K rotations (position, velocity) at each ds50 TAI time; J2K -> TEME is the 
+    transpose.  The DLL is called three times per distinct time.
+    '''
+    ds50_tai      = np.asarray( ds50_tai, dtype=np.float64 )
+    uniq, inverse = np.unique( ds50_tai, return_inverse=True )
+    M      = np.empty( ( uniq.shape[0], 2, 3, 3 ) )
+    c3     = harness.ctypes.c_double * 3
+    out_p, out_v = c3(), c3()
+    unit   = [ c3( *E ) for E in np.eye( 3 ) ]
+    rot    = harness.AstroFuncDll.RotDateToJ2K
+    for k, T in enumerate( uniq.tolist() ):
+        for i in range( 3 ):
+            rot( 1, 106, T, unit[i], unit[i], out_p, out_v )
+            M[ k, 0, :, i ] = out_p
+            M[ k, 1, :, i ] = out_v
+    return M[ inverse.reshape( -1 ) ]
+
+# -----------------------------------------------------------------------------------------------------
+def _j2k_cached( tai, harness, grid=None ):
+    ''' teme_to_j2k_matrices through the grid's cache, or the hashed one (tai : a callable giving ds50 TAI) '''
+    if grid is not None:
+        return grid.cached( 'teme_j2k', lambda : teme_to_j2k_matrices( grid.ds50_tai, harness ) )
+    ds50_tai = tai()
+    return _cached_matrices( 'teme_j2k', ds50_tai, lambda : teme_to_j2k_matrices( ds50_tai, harness ) )
+
+def _j2k_matrices( df : pd.DataFrame, harness, grid=None ):
+    if grid is not None:
+        assert len( grid ) == df.shape[0]
+    return _j2k_cached( lambda : _tai( df, harness ), harness, grid )
+
+# -----------------------------------------------------------------------------------------------------
+def rotate( M : np.ndarray, vec : np.ndarray, inverse : bool = False ):
+    ''' rotate (N,3) rows by (N,3,3) matrices (or by their transposes) '''
+    return np.einsum( 'nji,nj->ni' if inverse else 'nij,nj->ni', M, np.asarray( vec, dtype=np.float64 ) )
+
+# -----------------------------------------------------------------------------------------------------
+def TEME_to_J2K( teme: pd.DataFrame , harness, grid=None ):
     '''
     assume j2k has the following columns:
         ds50_utc   (from astro_time)
@@ -31,25 +160,18 @@ def TEME_to_J2K( teme: pd.DataFrame , harness ):
         ds50_tai
         j2k_p
         j2k_v
-    '''
-    j2k_p = (harness.ctypes.c_double * 3)()
-    j2k_v = (harness.ctypes.c_double * 3)()
 
-    def processLine( L ):
-        teme_p      = (harness.ctypes.c_double * 3)( *L['teme_p'] )
-        teme_v      = (harness.ctypes.c_double * 3)( *L['teme_v'] )
-        ds50_tai    = harness.TimeFuncDll.UTCToTAI( L['ds50_utc'] )
-        harness.AstroFuncDll.RotDateToJ2K( 1, 106, ds50_tai, teme_p, teme_v, j2k_p, j2k_v )
-        return [ list(j2k_p), list(j2k_v) ]
-
-    tv = teme.apply( processLine, axis=1 ).values
-    teme['j2k_p' ] = [ X[0] for X in tv ]
-    teme['j2k_v' ] = [ X[1] for X in tv ]
+    grid : optional astro_time.TimeGrid the frame was built on (row aligned); the TAI times 
+           and the rotation matrices are taken from (and cached on) the grid
+    '''
+    M = _j2k_matrices( teme, harness, grid )
+    teme['j2k_p' ] = rotate( M[:,0], np.vstack( teme['teme_p'] ) ).tolist()
+    teme['j2k_v' ] = rotate( M[:,1], np.vstack( teme['teme_v'] ) ).tolist()
     return teme 
         
 
 # -----------------------------------------------------------------------------------------------------
-def J2K_to_TEME( j2k : pd.DataFrame , harness ):
+def J2K_to_TEME( j2k : pd.DataFrame , harness, grid=None ):
     '''
     assume j2k has the following columns:
         ds50_utc   (from astro_time)
@@ -62,37 +184,138 @@ def J2K_to_TEME( j2k : pd.DataFrame , harness ):
         ds50_tai
         teme_p
         teme_v
+
+    grid : optional astro_time.TimeGrid the frame was built on (row aligned); the TAI times 
+           and the rotation matrices are taken from (and cached on) the grid
     '''
-    teme_p = (harness.ctypes.c_double * 3)()
-    teme_v = (harness.ctypes.c_double * 3)()
+    M = _j2k_matrices( j2k, harness, grid )
+    j2k['teme_p' ] = rotate( M[:,0], np.vstack( j2k['j2k_p'] ), inverse=True ).tolist()
+    j2k['teme_v' ] = rotate( M[:,1], np.vstack( j2k['j2k_v'] ), inverse=True ).tolist()
+    return j2k
 
-    def processLine( L ):
-        j2k_p = (harness.ctypes.c_double * 3)( *L['j2k_p'] )
-        j2k_v = (harness.ctypes.c_double * 3)( *L['j2k_v'] )
-        ds50_tai    = harness.TimeFuncDll.UTCToTAI( L['ds50_utc'] )
-        harness.AstroFuncDll.RotJ2KToDate( 1, 106, ds50_tai, j2k_p, j2k_v, teme_p, teme_v )
-        return [ list(teme_p), list(teme_v) ]
+# -----------------------------------------------------------------------------------------------------
+# Geodetic conversions with numpy.  The ellipsoid is read back out of the DLL (LLHToEFGPos at the
+# equator and the pole gives a and b), so we match whatever the library is set up with; without a
+# DLL we fall back to WGS-72.  The numbers are checked against LLHToEFGPos / EFGPosToLLH once per
+# process, and the per-row DLL calls are used if they don't agree.
+# -----------------------------------------------------------------------------------------------------
+WGS72_A  = 6378.135
+WGS72_F  = 1. / 298.26
 
-    tv = j2k.apply( processLine, axis=1 ).values
-    j2k['teme_p' ] = [ X[0] for X in tv ]
-    j2k['teme_v' ] = [ X[1] for X in tv ]
-    return j2k
+_GEO = { 'a' : None, 'f' : None, 'lon360' : False, 'agrees' : None }
+
+def _geodetic( INTERFACE=None, tol_km : float = 1e-6 ):
+    ''' ( a km, f, longitudes in [0,360) ? ) -- probed from the DLL the first time we have one '''
+    if _GEO['agrees'] is None and INTERFACE is not None:
+        AF    = INTERFACE.AstroFuncDll
+        efg   = (ctypes.c_double * 3)()
+        llh   = (ctypes.c_double * 3)()
+        AF.LLHToEFGPos( (ctypes.c_double * 3)( 0., 0., 0. ), efg )
+        a     = efg[0]
+        AF.LLHToEFGPos( (ctypes.c_double * 3)( 90., 0., 0. ), efg )
+        f     = 1. - efg[2] / a
+        AF.EFGPosToLLH( (ctypes.c_double * 3)( 0., -a, 0. ), llh )
+        _GEO.update( a=a, f=f, lon360=llh[1] > 180. )
+        # spot check both ways (LEO to GEO heights, near the poles, both hemispheres)
+        probe = np.array( [ [ 40.1, -105.3, 1.6 ], [ -33.9, 151.2, 0.05 ], [ 89.9, 10., 400. ],
+                            [ -89.95, 200., 800. ], [ 0.3, 75.1, 35786. ], [ 51.6, 300.2, -0.1 ] ] )
+        err   = 0.
+        for L in probe:
+            AF.LLHToEFGPos( (ctypes.c_double * 3)( *L ), efg )
+            err = max( err, np.max( np.abs( llh_to_efg( *L[:,None] )[0] - list( efg ) ) ) )
+            AF.EFGPosToLLH( efg, llh )
+            back = efg_to_llh( np.array( [ list( efg ) ] ) )[0]
+            dlon = ( back[1] - llh[1] + 180. ) % 360. - 180.
+            err  = max( err, abs( back[2] - llh[2] ), 
+                        ( abs( back[0] - llh[0] ) + abs( dlon ) * np.cos( np.deg2rad( llh[0] ) ) ) * np.pi / 180. * a )
+        _GEO['agrees'] = bool( err < tol_km )
+        if not _GEO['agrees']:
+            print('numpy geodetic conversions are off from the DLL by {} km; using the DLL'.format( err ) )
+    if _GEO['a'] is None:
+        return WGS72_A, WGS72_F, False
+    return _GEO['a'], _GEO['f'], _GEO['lon360']
+
+def _geo_agrees( INTERFACE ):
+    _geodetic( INTERFACE )
+    return _GEO['agrees'] is not False
+
+# -----------------------------------------------------------------------------------------------------
+def llh_to_efg( lat : np.ndarray, lon : np.ndarray, height : np.ndarray, INTERFACE=None ):
+    ''' geodetic lat / lon (deg), height (km) -> (N,3) EFG (km), closed form '''
+    a, f, _ = _geodetic( INTERFACE )
+    e2      = f * ( 2. - f )
+    phi     = np.deg2rad( np.asarray( lat, dtype=np.float64 ) )
+    lam     = np.deg2rad( np.asarray( lon, dtype=np.float64 ) )
+    h       = np.asarray( height, dtype=np.float64 )
+    sp, cp  = np.sin( phi ), np.cos( phi )
+    N       = a / np.sqrt( 1. - e2 * sp * sp )
+    return np.column_stack( np.broadcast_arrays( ( N + h ) * cp * np.cos( lam ),
+                                                 ( N + h ) * cp * np.sin( lam ),
+                                                 ( N * ( 1. - e2 ) + h ) * sp ) )
+
+# -----------------------------------------------------------------------------------------------------
+def efg_to_llh( efg : np.ndarray, INTERFACE=None, iterations : int = 4 ):
+    '''
+    (N,3) EFG (km) -> (N,3) geodetic lat (deg), lon (deg), height (km)
+
+    Bowring's iteration on the parametric latitude, a fixed number of passes (4 is well under a 
+    micron from the surface out past GEO); the height formula holds up at the poles
+    '''
+    a, f, lon360 = _geodetic( INTERFACE )
+    e2      = f * ( 2. - f )
+    b       = a * ( 1. - f )
+    ep2     = e2 / ( 1. - e2 )
+    R       = np.asarray( efg, dtype=np.float64 )
+    x, y, z = R[:,0], R[:,1], R[:,2]
+    p       = np.hypot( x, y )
+    beta    = np.arctan2( z, ( 1. - f ) * p )
+    for i in range( iterations ):
+        phi  = np.arctan2( z + ep2 * b * np.sin( beta ) ** 3, p - e2 * a * np.cos( beta ) ** 3 )
+        beta = np.arctan2( ( 1. - f ) * np.sin( phi ), np.cos( phi ) )
+    sp, cp  = np.sin( phi ), np.cos( phi )
+    N       = a / np.sqrt( 1. - e2 * sp * sp )
+    h       = p * cp + ( z + e2 * N * sp ) * sp - N
+    lon     = np.rad2deg( np.arctan2( y, x ) )
+    if lon360:
+        lon = np.mod( lon, 360. )
+    return np.column_stack( ( np.rad2deg( phi ), lon, h ) )
+
+# -----------------------------------------------------------------------------------------------------
+def teme_to_llh( theta : np.ndarray, teme_p : np.ndarray, INTERFACE=None ):
+    ''' (N,3) TEME -> (N,3) lat / lon / height : rotate by theta, then efg_to_llh '''
+    return efg_to_llh( teme_efg_rotate( theta, teme_p )[0], INTERFACE )
+
+# -----------------------------------------------------------------------------------------------------
+def site_teme( theta : np.ndarray, lat : float, lon : float, height : float, INTERFACE=None ):
+    ''' (N,3) TEME of a fixed ground site : its EFG once, rotated by theta '''
+    theta = np.asarray( theta, dtype=np.float64 )
+    efg   = np.repeat( llh_to_efg( [lat], [lon], [height], INTERFACE ), theta.shape[0], axis=0 )
+    return efg_teme_rotate( theta, efg )[0]
+
+# -----------------------------------------------------------------------------------------------------
+def _constant( df : pd.DataFrame, cols ):
+    return df.shape[0] > 0 and all( np.all( df[C].values == df[C].values[0] ) for C in cols )
 
 # -----------------------------------------------------------------------------------------------------
 def LLH_to_TEME( df : list[ float ],
-                INTERFACE ) :
+                INTERFACE,
+                grid = None ) :
     '''
     given a lat / lon / alt tuple and a set of astrostandard epoch'd dates,
     give back the ECI position (TEME)
 
     df must have columns 'lat', 'lon', 'height', and 'ds50_utc'
+
+    numpy (llh_to_efg, then rotated by theta); a site that doesn't move is converted once
     '''
-    sen_eci = (ctypes.c_double * 3)()
-    def getECI( R ):
-        llh = (ctypes.c_double * 3)( R['lat'], R['lon'], R['height'] )
-        INTERFACE.AstroFuncDll.LLHToXYZTime( R['ds50_utc'], llh, sen_eci )
-        return list( sen_eci )
-    df['teme_p'] =  df.apply( getECI, axis=1 )
+    if not _geo_agrees( INTERFACE ):
+        return _LLH_to_TEME_dll( df, INTERFACE )
+    theta = _theta_for( df, INTERFACE, grid )
+    if _constant( df, ( 'lat', 'lon', 'height' ) ):
+        P = site_teme( theta, df['lat'].values[0], df['lon'].values[0], df['height'].values[0], INTERFACE )
+    else:
+        P = efg_teme_rotate( theta, llh_to_efg( df['lat'].values, df['lon'].values, df['height'].values, INTERFACE ) )[0]
+    df['teme_p'] = P.tolist()
     return df
 
 # -----------------------------------------------------------------------------------------------------
@@ -104,78 +327,259 @@ def LLH_to_EFG( df : list[ float ],
 
     df must have columns 'lat', 'lon', 'height'
     '''
-    sen_efg = (ctypes.c_double * 3)()
-    def getEFG( R ):
-        llh = (ctypes.c_double * 3)(R['lat'], R['lon'], R['height'])
-        INTERFACE.AstroFuncDll.LLHToEFGPos(llh, sen_efg)
-        return list( sen_efg )
-    df['efg_p'] = df.apply( getEFG, axis=1 )
+    if not _geo_agrees( INTERFACE ):
+        return _LLH_to_EFG_dll( df, INTERFACE )
+    df['efg_p'] = llh_to_efg( df['lat'].values, df['lon'].values, df['height'].values, INTERFACE ).tolist()
     return df
 
 # -----------------------------------------------------------------------------------------------------
 def TEME_to_LLH( df : list[ float ],
-                 INTERFACE ) :
+                 INTERFACE,
+                 grid = None ) :
     '''
     given a dataframe with columns `teme_p` and `ds50_utc`, covert the 
     eci coordinates to llh
 
     df must have 'teme_p' and 'ds50_utc'
     '''
-    llh  = (ctypes.c_double * 3)()
-    
-    def convert( R ):
-        eci = (ctypes.c_double * 3)( *R['teme_p'] )
-        INTERFACE.AstroFuncDll.XYZToLLHTime( R['ds50_utc'], eci, llh )
-        return list( llh )
-    
-    tv = df.apply( convert, axis=1 )
-    df['lat']    = [ T[0] for T in tv ]
-    df['lon']    = [ T[1] for T in tv ]
-    df['height'] = [ T[2] for T in tv ]
+    if not _geo_agrees( INTERFACE ):
+        return _TEME_to_LLH_dll( df, INTERFACE )
+    llh = teme_to_llh( _theta_for( df, INTERFACE, grid ), np.vstack( df['teme_p'] ), INTERFACE )
+    df['lat']    = llh[:,0]
+    df['lon']    = llh[:,1]
+    df['height'] = llh[:,2]
     return df
 
+# -----------------------------------------------------------------------------------------------------
+def _LLH_to_TEME_dll( df : pd.DataFrame, INTERFACE ) :
+    ''' one LLHToXYZTime per row (the reference for LLH_to_TEME) '''
+    llh = np.column_stack( ( df['lat'].values, df['lon'].values, df['height'].values ) )
+    df['teme_p'] = BatchCall( INTERFACE.AstroFuncDll.LLHToXYZTime, ( 'i', 'i3', 'o3' ) )( df['ds50_utc'].values, llh ).tolist()
+    return df
+
+# -----------------------------------------------------------------------------------------------------
+def _LLH_to_EFG_dll( df : pd.DataFrame, INTERFACE ) :
+    ''' one LLHToEFGPos per row (the reference for LLH_to_EFG) '''
+    llh = np.column_stack( ( df['lat'].values, df['lon'].values, df['height'].values ) )
+    df['efg_p'] = BatchCall( INTERFACE.AstroFuncDll.LLHToEFGPos, ( 'i3', 'o3' ) )( llh ).tolist()
+    return df
+
+# -----------------------------------------------------------------------------------------------------
+def _TEME_to_LLH_dll( df : pd.DataFrame, INTERFACE ) :
+    ''' one XYZToLLHTime per row (the reference for TEME_to_LLH) '''
+    llh = BatchCall( INTERFACE.AstroFuncDll.XYZToLLHTime, ( 'i', 'i3', 'o3' ) )( df['ds50_utc'].values, np.vstack( df['teme_p'] ) )
+    df['lat']    = llh[:,0]
+    df['lon']    = llh[:,1]
+    df['height'] = llh[:,2]
+    return df
+
+# -----------------------------------------------------------------------------------------------------
+def _theta_for( df : pd.DataFrame, INTERFACE, grid=None ):
+    if grid is not None:
+        assert len( grid ) == df.shape[0]
+        return grid.theta
+    if 'theta' in df:
+        return df['theta'].values
+    from . import astro_time
+    return astro_time.theta_from_utc( df['ds50_utc'].values, INTERFACE )
+
+# the numpy rotation is spot checked against ECIToEFGTime once per process (see _efg_agrees)
+_EFG_AGREES = { 'value' : None }
+
+def _efg_agrees( df : pd.DataFrame, theta : np.ndarray, INTERFACE, tol_km : float = 1e-6 ):
+    if _EFG_AGREES['value'] is None and df.shape[0]:
+        rows   = np.unique( np.linspace( 0, df.shape[0] - 1, 25 ).astype( int ) )
+        probe  = _TEME_to_EFG_dll( df.iloc[ rows ][ ['ds50_utc','teme_p','teme_v'] ].copy(), INTERFACE )
+        P, V   = teme_efg_rotate( theta[ rows ], np.vstack( probe['teme_p'] ), np.vstack( probe['teme_v'] ) )
+        err    = max( np.max( np.abs( P - np.vstack( probe['efg_p'] ) ) ), 
+                      np.max( np.abs( V - np.vstack( probe['efg_v'] ) ) ) )
+        _EFG_AGREES['value'] = bool( err < tol_km )
+        if not _EFG_AGREES['value']:
+            print('numpy TEME->EFG is off from ECIToEFGTime by {} km; using the DLL'.format( err ) )
+    return _EFG_AGREES['value'] is not False
+
 # -----------------------------------------------------------------------------------------------------
 def TEME_to_EFG( df : list[ float ],
-                 INTERFACE ) :
+                 INTERFACE,
+                 grid = None,
+                 polar_motion : bool = False ) :
     '''
     given a dataframe with columns `teme_p` and `ds50_utc`, covert the 
     coordinates to EFG
+
+    all rows at once with numpy, using the frame's theta column (or grid.theta, or theta from the
+    time constants); polar_motion=True applies the loaded polar motion (ECR rather than EFG)
     '''
-    efg_p = (ctypes.c_double * 3)()
-    efg_v = (ctypes.c_double * 3)()
-    
-    def convert( R ):
-        teme_p = (ctypes.c_double * 3)( *R['teme_p'] )
-        teme_v = (ctypes.c_double * 3)( *R['teme_v'] )
-        INTERFACE.AstroFuncDll.ECIToEFGTime( R['ds50_utc'], teme_p, teme_v, efg_p, efg_v )
-        return ( list(efg_p), list(efg_v) )
-    
-    tv = df.apply( convert, axis=1 )
-    df['efg_p'] = [ T[0] for T in tv ]
-    df['efg_v'] = [ T[1] for T in tv ]
+    theta = _theta_for( df, INTERFACE, grid )
+    if not polar_motion and not _efg_agrees( df, theta, INTERFACE ):
+        return _TEME_to_EFG_dll( df, INTERFACE )
+    polar = time_constants.polar_motion( df['ds50_utc'].values, INTERFACE ) if polar_motion else None
+    P, V  = teme_efg_rotate( theta, np.vstack( df['teme_p'] ), np.vstack( df['teme_v'] ), polar )
+    df['efg_p'] = P.tolist()
+    df['efg_v'] = V.tolist()
     return df
 
 # -----------------------------------------------------------------------------------------------------
 def EFG_to_TEME( df : list[ float ],
-                 INTERFACE ) :
+                 INTERFACE,
+                 grid = None,
+                 polar_motion : bool = False ) :
     '''
     given a dataframe with columns `efg_p` and `efg_v` and `ds50_utc` convert the
-    coordinates to teme
+    coordinates to teme (numpy; see TEME_to_EFG)
     '''
-    teme_p = (ctypes.c_double * 3)()
-    teme_v = (ctypes.c_double * 3)()
-    
-    def convert( R ):
-        efg_p = (ctypes.c_double * 3)( *R['efg_p'] )
-        efg_v = (ctypes.c_double * 3)( *R['efg_v'] )
-        INTERFACE.AstroFuncDll.EFGToECITime( R['ds50_utc'], efg_p, efg_v, teme_p, teme_v )
-        return ( list(teme_p), list(teme_v) )
-    
-    tv = df.apply( convert, axis=1 )
-    df['teme_p'] = [ T[0] for T in tv ]
-    df['teme_v'] = [ T[1] for T in tv ]
+    theta = _theta_for( df, INTERFACE, grid )
+    if not polar_motion and _EFG_AGREES['value'] is False:
+        return _EFG_to_TEME_dll( df, INTERFACE )
+    polar = time_constants.polar_motion( df['ds50_utc'].values, INTERFACE ) if polar_motion else None
+    P, V  = efg_teme_rotate( theta, np.vstack( df['efg_p'] ), np.vstack( df['efg_v'] ), polar )
+    df['teme_p'] = P.tolist()
+    df['teme_v'] = V.tolist()
     return df
 
+# -----------------------------------------------------------------------------------------------------
+def _TEME_to_EFG_dll( df : pd.DataFrame, INTERFACE ) :
+    ''' one ECIToEFGTime per row (the reference for TEME_to_EFG) '''
+    P, V = BatchCall( INTERFACE.AstroFuncDll.ECIToEFGTime, ( 'i', 'i3', 'i3', 'o3', 'o3' ) )( 
+                    df['ds50_utc'].values, np.vstack( df['teme_p'] ), np.vstack( df['teme_v'] ) )
+    df['efg_p'] = P.tolist()
+    df['efg_v'] = V.tolist()
+    return df
+
+# -----------------------------------------------------------------------------------------------------
+def _EFG_to_TEME_dll( df : pd.DataFrame, INTERFACE ) :
+    ''' one EFGToECITime per row (the reference for EFG_to_TEME) '''
+    P, V = BatchCall( INTERFACE.AstroFuncDll.EFGToECITime, ( 'i', 'i3', 'i3', 'o3', 'o3' ) )( 
+                    df['ds50_utc'].values, np.vstack( df['efg_p'] ), np.vstack( df['efg_v'] ) )
+    df['teme_p'] = P.tolist()
+    df['teme_v'] = V.tolist()
+    return df
+
+# =====================================================================================================
+# Frame conversion graph.  Every linear edge is a per-time ( R, V, K ) with
+#     r_to = R r_from
+#     v_to = V v_from + K r_from        (K carries the w x r term into / out of the earth frames)
+# Edges compose and invert in closed form, so any path collapses to one ( R, V, K ) per time, cached
+# per time grid; the data then gets a single batched multiply however many hops there were.  LLH hangs
+# off EFG (the geodetic step is not linear, it is done on the way in / out).
+# =====================================================================================================
+FRAMES = ( 'TEME', 'J2K', 'EFG', 'ECR', 'LLH' )
+
+def _times( times, INTERFACE ):
+    ''' ( ds50_utc, tai(), theta(), grid or None ) for a TimeGrid, a convert_times frame or ds50 UTC '''
+    from . import astro_time
+    if isinstance( times, astro_time.TimeGrid ):
+        return times.ds50_utc, lambda : times.ds50_tai, lambda : times.theta, times
+    if isinstance( times, pd.DataFrame ):
+        ds50  = times['ds50_utc'].values
+        theta = ( lambda : times['theta'].values ) if 'theta' in times else ( lambda : astro_time.theta_from_utc( ds50, INTERFACE ) )
+    else:
+        ds50  = np.asarray( times, dtype=np.float64 )
+        theta = lambda : astro_time.theta_from_utc( ds50, INTERFACE )
+    return ds50, lambda : time_constants.utc_to_tai( ds50, INTERFACE ), theta, None
+
+def _edge_teme_j2k( ds50, tai, theta, grid, INTERFACE ):
+    # the same cache TEME_to_J2K / J2K_to_TEME use
+    M = _j2k_cached( tai, INTERFACE, grid )
+    return M[:,0], M[:,1], np.zeros_like( M[:,0] )
+
+def _edge_teme_efg( ds50, tai, theta, grid, INTERFACE ):
+    th     = theta()
+    c, s   = np.cos( th ), np.sin( th )
+    R      = np.zeros( ( th.shape[0], 3, 3 ) )
+    R[:,0,0], R[:,0,1], R[:,1,0], R[:,1,1], R[:,2,2] = c, s, -s, c, 1.
+    Wx     = np.zeros( (3,3) )
+    Wx[0,1], Wx[1,0] = -EARTH_ROT_RATE, EARTH_ROT_RATE
+    return R, R, -np.einsum( 'ij,njk->nik', Wx, R )
+
+def _edge_efg_ecr( ds50, tai, theta, grid, INTERFACE ):
+    W  = np.swapaxes( _polar_matrices( time_constants.polar_motion( ds50, INTERFACE ) ), 1, 2 )
+    return W, W, np.zeros_like( W )
+
+_EDGES = { ( 'TEME', 'J2K' ) : _edge_teme_j2k,
+           ( 'TEME', 'EFG' ) : _edge_teme_efg,
+           ( 'EFG',  'ECR' ) : _edge_efg_ecr }
+
+def _path( frame_from, frame_to ):
+    ''' shortest list of linear frames from -> to (breadth first over _EDGES) '''
+    links = {}
+    for A, B in _EDGES:
+        links.setdefault( A, [] ).append( B )
+        links.setdefault( B, [] ).append( A )
+    seen, queue = { frame_from : None }, [ frame_from ]
+    while queue:
+        F = queue.pop( 0 )
+        if F == frame_to:
+            break
+        for G in links.get( F, [] ):
+            if G not in seen:
+                seen[ G ] = F
+                queue.append( G )
+    if frame_to not in seen:
+        raise ValueError( 'no conversion from {} to {}'.format( frame_from, frame_to ) )
+    path = [ frame_to ]
+    while seen[ path[-1] ] is not None:
+        path.append( seen[ path[-1] ] )
+    return path[::-1]
+
+def _compose( first, second ):
+    R1, V1, K1 = first
+    R2, V2, K2 = second
+    mm = lambda A, B : np.einsum( 'nij,njk->nik', A, B )
+    return mm( R2, R1 ), mm( V2, V1 ), mm( V2, K1 ) + mm( K2, R1 )
+
+def _invert( edge ):
+    R, V, K = edge
+    Rt, Vt  = np.swapaxes( R, 1, 2 ), np.swapaxes( V, 1, 2 )
+    return Rt, Vt, -np.einsum( 'nij,njk,nkl->nil', Vt, K, Rt )
+
+def conversion_matrices( frame_from : str, frame_to : str, times, INTERFACE ):
+    '''
+    (N,3,3,3) stack of [ R, V, K ] taking linear frame `frame_from` to `frame_to` at each time 
+    (see the notes above); cached on a TimeGrid, or on a hash of the times for frames / arrays
+    '''
+    ds50, tai, theta, grid = _times( times, INTERFACE )
+    def build():
+        path = _path( frame_from, frame_to )
+        rv   = None
+        for A, B in zip( path[:-1], path[1:] ):
+            E  = _EDGES[ ( A, B ) ]( ds50, tai, theta, grid, INTERFACE ) if ( A, B ) in _EDGES else \
+                 _invert( _EDGES[ ( B, A ) ]( ds50, tai, theta, grid, INTERFACE ) )
+            rv = E if rv is None else _compose( rv, E )
+        if rv is None:
+            I  = np.broadcast_to( np.eye( 3 ), ( ds50.shape[0], 3, 3 ) )
+            rv = ( I, I, np.zeros( ( ds50.shape[0], 3, 3 ) ) )
+        return np.ascontiguousarray( np.stack( rv, axis=1 ) )
+    key = ( 'convert', frame_from, frame_to )
+    if grid is not None:
+        return grid.cached( key, build )
+    return _cached_matrices( key, ds50, build )
+
+def convert( frame_from : str, frame_to : str, data : np.ndarray, times, INTERFACE ):
+    '''
+    convert (N,3) positions or (N,6) position / velocity rows between TEME, J2K, EFG, ECR (EFG with 
+    polar motion) and LLH (lat deg, lon deg, height km; positions only)
+
+    times : TimeGrid, convert_times frame or ds50 UTC array, row aligned with data
+    the path is picked from the frame graph and collapsed to one matrix set per time (cached per
+    grid), so J2K -> LLH costs about what one hop does
+    '''
+    assert frame_from in FRAMES and frame_to in FRAMES
+    X     = np.asarray( data, dtype=np.float64 )
+    src   = 'EFG' if frame_from == 'LLH' else frame_from
+    dst   = 'EFG' if frame_to   == 'LLH' else frame_to
+    if frame_from == 'LLH':
+        X = llh_to_efg( X[:,0], X[:,1], X[:,2], INTERFACE )
+    P     = X[:,:3]
+    V     = X[:,3:6] if X.shape[1] >= 6 else None
+    if src != dst:
+        C = conversion_matrices( src, dst, times, INTERFACE )
+        P, V = np.einsum( 'nij,nj->ni', C[:,0], X[:,:3] ), \
+               None if V is None else np.einsum( 'nij,nj->ni', C[:,1], V ) + np.einsum( 'nij,nj->ni', C[:,2], X[:,:3] )
+    if frame_to == 'LLH':
+        return efg_to_llh( P, INTERFACE )
+    return P if V is None else np.hstack( ( P, V ) )
+
 # -----------------------------------------------------------------------------------------------------
 def lat_to_astronomical_lat( lat : list[ float ] ):
     lat_deg = np.deg2rad( lat )
@@ -225,6 +629,16 @@ def test( ) :
     err = findErr( original_f['teme_v'].values, from_j2k['teme_v'].values ) 
     print('Error from velocity TEME->J2K->TEME conversion: {} over {} points'.format( err, N ) )
 
+    # the matrices against RotDateToJ2K row by row
+    ds50_tai = time_constants.utc_to_tai( original_f['ds50_utc'].values, PA )
+    j2k_p, j2k_v = (ctypes.c_double * 3)(), (ctypes.c_double * 3)()
+    worst = 0.
+    for P, V, T, JP, JV in zip( original_f['teme_p'], original_f['teme_v'], ds50_tai, to_j2k['j2k_p'], to_j2k['j2k_v'] ):
+        PA.AstroFuncDll.RotDateToJ2K( 1, 106, T, (ctypes.c_double * 3)( *P ), (ctypes.c_double * 3)( *V ), j2k_p, j2k_v )
+        worst = max( worst, np.max( np.abs( np.array( JP ) - list( j2k_p ) ) ), np.max( np.abs( np.array( JV ) - list( j2k_v ) ) ) )
+    print('Max difference from RotDateToJ2K : {}'.format( worst ) )
+    assert worst < 1e-8
+
     # convert to J2K
     to_efg   = TEME_to_EFG( original_f.copy(), PA ) 
     # now convert back; they should be the same 
@@ -235,6 +649,54 @@ def test( ) :
     err = findErr( original_f['teme_v'].values, from_efg['teme_v'].values ) 
     print('Error from velocity TEME->EFG->TEME conversion: {} over {} points'.format( err, N ) )
 
+    # numpy against the DLL, both ways
+    dll_efg  = _TEME_to_EFG_dll( original_f.copy(), PA )
+    err = np.max( np.abs( np.vstack( to_efg['efg_p'] ) - np.vstack( dll_efg['efg_p'] ) ) )
+    print('Max position difference from ECIToEFGTime : {} km'.format( err ) )
+    assert err < 1e-6
+    err = np.max( np.abs( np.vstack( to_efg['efg_v'] ) - np.vstack( dll_efg['efg_v'] ) ) )
+    print('Max velocity difference from ECIToEFGTime : {} km/s'.format( err ) )
+    assert err < 1e-7
+    dll_teme = _EFG_to_TEME_dll( dll_efg.copy(), PA )
+    assert findErr( dll_teme['teme_p'].values, from_efg['teme_p'].values ) / N < 1e-6
+
+    # geodetic : numpy against the DLL, sub-millimetre
+    llh      = TEME_to_LLH( original_f.copy(), PA )
+    dll_llh  = _TEME_to_LLH_dll( original_f.copy(), PA )
+    err = np.max( np.abs( llh['height'].values - dll_llh['height'].values ) )
+    print('Max height difference from XYZToLLHTime : {} km'.format( err ) )
+    assert err < 1e-6
+    dlat = np.deg2rad( np.max( np.abs( llh['lat'].values - dll_llh['lat'].values ) ) ) * EARTH_RAD_EQUATOR
+    dlon = np.deg2rad( np.max( np.abs( ( llh['lon'].values - dll_llh['lon'].values + 180. ) % 360. - 180. ) ) ) * EARTH_RAD_EQUATOR
+    print('Max lat / lon difference from XYZToLLHTime : {} / {} km'.format( dlat, dlon ) )
+    assert max( dlat, dlon ) < 1e-6
+    site     = dates_f[ ['ds50_utc','theta'] ].copy()
+    site['lat'], site['lon'], site['height'] = 40.1, -105.3, 1.6
+    ours     = np.vstack( LLH_to_TEME( site.copy(), PA )['teme_p'] )
+    dll      = np.vstack( _LLH_to_TEME_dll( site.copy(), PA )['teme_p'] )
+    print('Max ground site difference from LLHToXYZTime : {} km'.format( np.max( np.abs( ours - dll ) ) ) )
+    assert np.max( np.abs( ours - dll ) ) < 1e-6
+    assert np.max( np.abs( np.vstack( LLH_to_EFG( llh.copy(), PA )['efg_p'] ) - np.vstack( _LLH_to_EFG_dll( llh.copy(), PA )['efg_p'] ) ) ) < 1e-6
+
+    # the frame graph : multi-hop in one multiply, same answers as the chained frame functions
+    teme  = np.hstack( ( np.vstack( original_f['teme_p'] ), np.vstack( original_f['teme_v'] ) ) )
+    j2k   = np.hstack( ( np.vstack( to_j2k['j2k_p'] ), np.vstack( to_j2k['j2k_v'] ) ) )
+    efg   = np.hstack( ( np.vstack( dll_efg['efg_p'] ), np.vstack( dll_efg['efg_v'] ) ) )
+    assert np.max( np.abs( convert( 'TEME', 'J2K', teme, dates_f, PA ) - j2k ) ) < 1e-8
+    assert np.max( np.abs( convert( 'J2K', 'EFG', j2k, dates_f, PA ) - efg ) ) < 1e-6
+    assert np.max( np.abs( convert( 'EFG', 'J2K', efg, dates_f, PA ) - j2k ) ) < 1e-6
+    gj    = convert( 'J2K', 'LLH', j2k, dates_f, PA )
+    assert np.max( np.abs( gj[:,2] - llh['height'].values ) ) < 1e-6
+    assert np.max( np.abs( convert( 'LLH', 'TEME', gj, dates_f, PA ) - teme[:,:3] ) ) < 1e-6
+
+    # polar motion is a sub-arcsecond tilt : metres at the earth's surface, and round trips
+    pm       = TEME_to_EFG( original_f.copy(), PA, polar_motion=True )
+    shift    = np.linalg.norm( np.vstack( pm['efg_p'] ) - np.vstack( to_efg['efg_p'] ), axis=1 )
+    print('Polar motion shift : {:.2f} m max'.format( 1000 * np.max( shift ) ) )
+    assert np.max( shift ) < 0.1
+    back     = EFG_to_TEME( pm, PA, polar_motion=True )
+    assert findErr( original_f['teme_p'].values, back['teme_p'].values ) / N < 1e-9
+
 
 
 # =====================================================================================================
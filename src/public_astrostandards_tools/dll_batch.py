@@ -0,0 +1,110 @@
+import ctypes
+import numpy as np
+
+# =====================================================================================================
+# Batched per-point DLL calls.  Most of the AstroFuncDll (and friends) work one point at a time; the
+# usual wrapper is a df.apply closure that builds fresh (c_double*3)(*row) arrays, calls the DLL and
+# turns the result back into a list.  BatchCall does the same loop once, in a tight path: the ctypes
+# holders are built once, vector inputs are memmoved in from contiguous numpy rows, outputs are
+# memmoved out into preallocated arrays, and you get numpy arrays back.
+#
+# The signature lists the DLL arguments in order:
+#     'i'  / 'o'   : a scalar double in / out (out is passed by reference)
+#     'iK' / 'oK'  : a K-double array in / out (e.g. 'i3', 'o3', 'o64' for an XA_ array)
+#     anything else is a constant passed as is on every call
+#
+#     to_efg = BatchCall( PA.AstroFuncDll.ECIToEFGTime, ( 'i', 'i3', 'i3', 'o3', 'o3' ) )
+#     efg_p, efg_v = to_efg( ds50_utc, teme_p, teme_v )
+#
+#     to_date = BatchCall( PA.AstroFuncDll.RotRADec_EqnxToDate, ( 106, 2, 'i', 'i', 'i', 'o', 'o' ) )
+#     ra, dec = to_date( ds50_utc, ra_j2k, dec_j2k )
+#
+# returns= a numpy dtype keeps the function's return value too (it comes first).
+# =====================================================================================================
+
+_DSZ = ctypes.sizeof( ctypes.c_double )
+
+# -----------------------------------------------------------------------------------------------------
+def _token( S ):
+    ''' ( 'i' | 'o', width ) for an argument token, None for a constant '''
+    if isinstance( S, str ) and S[:1] in ( 'i', 'o' ) and ( len( S ) == 1 or S[1:].isdigit() ):
+        return S[0], int( S[1:] or 0 )
+    return None
+
+# -----------------------------------------------------------------------------------------------------
+class BatchCall:
+    '''
+    one DLL function, called for every row of some (N,k) inputs; see the module notes
+    '''
+    def __init__( self, func, signature, returns=None ):
+        self.func     = func
+        self.returns  = returns
+        self.template = []
+        self.ins      = []      # ( arg position, width, holder )
+        self.outs     = []      # ( width, holder )
+        for pos, S in enumerate( signature ):
+            T = _token( S )
+            if T is None:
+                self.template.append( S )
+                continue
+            kind, width = T
+            holder = (ctypes.c_double * width)() if width else ctypes.c_double()
+            self.template.append( None if ( kind == 'i' and width == 0 ) else holder )
+            if kind == 'i':
+                self.ins.append( ( pos, width, holder ) )
+            else:
+                self.outs.append( ( width, holder ) )
+
+    # ------------------------------------------------------------------------------------------------
+    def __call__( self, *inputs ):
+        assert len( inputs ) == len( self.ins ), 'expected {} inputs'.format( len( self.ins ) )
+        arrays = []
+        for X, ( pos, width, holder ) in zip( inputs, self.ins ):
+            A = np.ascontiguousarray( X, dtype=np.float64 )
+            assert A.shape[1:] == ( ( width, ) if width else () ), 'input {} should be (N,{})'.format( pos, width )
+            arrays.append( A )
+        N    = arrays[0].shape[0] if arrays else 0
+        outs = [ np.empty( ( N, W ) if W else N ) for W, _ in self.outs ]
+        ret  = np.empty( N, dtype=self.returns ) if self.returns is not None else None
+
+        args      = list( self.template )
+        move      = ctypes.memmove
+        scal_in   = [ ( pos, A.tolist() ) for A, ( pos, W, _ ) in zip( arrays, self.ins ) if W == 0 ]
+        vec_in    = [ ( ctypes.addressof( H ), A.ctypes.data, W * _DSZ ) for A, ( pos, W, H ) in zip( arrays, self.ins ) if W ]
+        vec_out   = [ ( ctypes.addressof( H ), O.ctypes.data, W * _DSZ ) for O, ( W, H ) in zip( outs, self.outs ) if W ]
+        scal_out  = [ ( H, O ) for O, ( W, H ) in zip( outs, self.outs ) if W == 0 ]
+        func      = self.func
+        for i in range( N ):
+            for pos, col in scal_in:
+                args[ pos ] = col[ i ]
+            for dst, base, nb in vec_in:
+                move( dst, base + i * nb, nb )
+            r = func( *args )
+            for src, base, nb in vec_out:
+                move( base + i * nb, src, nb )
+            for H, O in scal_out:
+                O[ i ] = H.value
+            if ret is not None:
+                ret[ i ] = r
+
+        rv = ( [ ret ] if ret is not None else [] ) + outs
+        return rv[0] if len( rv ) == 1 else tuple( rv )
+
+# -----------------------------------------------------------------------------------------------------
+def field_index( holder ):
+    '''
+    { field name : index into holder.data } for a helpers.astrostd_named_fields holder, in the 
+    holder's own order; use it to turn an (N, XA size) 'oK' output into named columns
+    '''
+    saved = list( holder.data )
+    for k in range( len( saved ) ):
+        holder.data[k] = k
+    rv    = { K : int( V ) for K,V in holder.toDict().items() }
+    for k, V in enumerate( saved ):
+        holder.data[k] = V
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def named_columns( block : np.ndarray, holder ):
+    ''' { field name : (N,) column } out of an (N, XA size) block (see field_index) '''
+    return { K : block[:,i] for K,i in field_index( holder ).items() }
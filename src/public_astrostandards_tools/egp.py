@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+from . import astro_time
 from . import ephem_fitter
 
 # ----------------------------------------------------------------------------------------------------- 
@@ -16,7 +17,8 @@ def fileJob( fn , PA ):
     jobs = list( jobs.to_dict('records') )
     for job in jobs:
         freq = job.get('spacing','5min') 
-        dates = pd.date_range( job['min_date'], job['max_date'], freq=freq )
+        # windows repeat across jobs; pull the converted times from the cache
+        dates = astro_time.convert_time_range( job['min_date'], job['max_date'], freq, PA )
         output = doJob( job['line1'], job['line2'], dates, PA )
         if output : 
             job['egp'] = output.summarize_results()
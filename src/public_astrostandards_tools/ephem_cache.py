@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+from . import time_constants
+
+# =====================================================================================================
+# Persistent, content-addressed cache of propagation results.  Notebooks and fit jobs rerun the same
+# TLEs over the same grids all day; with a cache enabled, the sgp4 calls that are handed TLE lines
+# (propTLE_df, propTLE_ephemeris, propTLE_chunks, propagate_catalog, ... : propTLEToDS50s( ..., 
+# lines= ) underneath) look the block up on disk first.  A bare satKey is never cached.
+#
+# The key is a sha1 over
+#     the normalized TLE lines  (stripped, as the SatRegistry holds them)
+#     the time grid             (the ds50 UTC values, as float64 bytes)
+#     the time constants file   (its sha1; a new file means new UT1 / leap seconds)
+#     what was stored           (e.g. 'teme' for the (N,7) propTLEToDS50s block)
+# and each entry is one .npy file named by the key.  Hits come back as read-only memory maps (no
+# copy); the file's mtime is the LRU clock and the least recently used files are removed once the
+# directory is over `max_bytes`.
+#
+#     ephem_cache.enable( '/scratch/eph_cache', max_bytes=20 * 2**30 )
+#     ... propTLE_df( ... ) as usual ...
+#     print( ephem_cache.get().stats() )
+# =====================================================================================================
+
+# -----------------------------------------------------------------------------------------------------
+def default_dir():
+    return os.path.join( os.path.expanduser( '~' ), '.cache', 'public_astrostandards_tools', 'ephem' )
+
+# -----------------------------------------------------------------------------------------------------
+def grid_digest( ds50 : np.ndarray ):
+    ''' sha1 of a ds50 grid (float64, C order) '''
+    return hashlib.sha1( np.ascontiguousarray( ds50, dtype=np.float64 ).tobytes() ).hexdigest()
+
+# -----------------------------------------------------------------------------------------------------
+def make_key( L1 : str, L2 : str, ds50 : np.ndarray, kind : str = 'teme', tc_digest : str = None ):
+    '''
+    cache key for a TLE (lines), a ds50 UTC grid and the loaded time constants
+    '''
+    if tc_digest is None:
+        tc_digest = time_constants.file_digest() or 'none'
+    H = hashlib.sha1()
+    for part in ( kind, L1.strip(), L2.strip(), grid_digest( ds50 ), tc_digest ):
+        H.update( part.encode() )
+        H.update( b'\0' )
+    return H.hexdigest()
+
+# -----------------------------------------------------------------------------------------------------
+class EphemerisCache:
+    '''
+    a directory of <key>.npy blocks with a size cap (LRU on file mtime) and hit / miss counters
+    '''
+    def __init__( self, directory : str = None, max_bytes : int = 2 * 2**30 ):
+        self.directory = os.path.abspath( directory or default_dir() )
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.stores    = 0
+        self.evictions = 0
+        os.makedirs( self.directory, exist_ok=True )
+        # bytes on disk, kept up to date as we store; the directory is only listed again when this 
+        # says we are over max_bytes (other processes sharing the directory are picked up then)
+        self._bytes    = self.size()
+
+    def _path( self, key ):
+        return os.path.join( self.directory, key + '.npy' )
+
+    def __contains__( self, key ):
+        return os.path.isfile( self._path( key ) )
+
+    # ------------------------------------------------------------------------------------------------
+    def load( self, key ):
+        ''' the stored block as a read-only memmap (no copy), or None '''
+        path = self._path( key )
+        try:
+            rv = np.load( path, mmap_mode='r' )
+        except ( FileNotFoundError, ValueError, OSError ):
+            # missing, or a partial / corrupt file from somebody else's crash
+            self.misses += 1
+            return None
+        try:
+            os.utime( path )
+        except OSError:
+            pass
+        self.hits += 1
+        return rv
+
+    def store( self, key, array : np.ndarray ):
+        ''' write a block (atomically : temp file then rename) and trim the directory to max_bytes '''
+        array = np.ascontiguousarray( array )
+        if array.nbytes > self.max_bytes:
+            return False
+        path    = self._path( key )
+        try:
+            replaced = os.path.getsize( path )
+        except OSError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp( dir=self.directory, suffix='.tmp' )
+        try:
+            with os.fdopen( fd, 'wb' ) as F:
+                np.save( F, array )
+            written = os.path.getsize( tmp )
+            os.replace( tmp, path )
+        except BaseException:
+            if os.path.exists( tmp ):
+                os.remove( tmp )
+            raise
+        self.stores += 1
+        self._bytes += written - replaced
+        if self._bytes > self.max_bytes:
+            self.trim( keep=key )
+        return True
+
+    # ------------------------------------------------------------------------------------------------
+    def _files( self ):
+        rv = []
+        for F in os.listdir( self.directory ):
+            if not F.endswith( '.npy' ):
+                continue
+            try:
+                st = os.stat( os.path.join( self.directory, F ) )
+            except FileNotFoundError:
+                continue
+            rv.append( ( st.st_mtime, st.st_size, F ) )
+        return sorted( rv )
+
+    def size( self ):
+        ''' bytes on disk '''
+        return sum( S for _, S, _ in self._files() )
+
+    def trim( self, keep : str = None ):
+        ''' drop the least recently used blocks until we are under max_bytes (lists the directory) '''
+        files = self._files()
+        total = sum( S for _, S, _ in files )
+        for _, S, F in files:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and F == keep + '.npy':
+                continue
+            try:
+                os.remove( os.path.join( self.directory, F ) )
+            except FileNotFoundError:
+                pass
+            total -= S
+            self.evictions += 1
+        self._bytes = total
+
+    def clear( self ):
+        for _, _, F in self._files():
+            try:
+                os.remove( os.path.join( self.directory, F ) )
+            except FileNotFoundError:
+                pass
+        self._bytes = 0
+
+    # ------------------------------------------------------------------------------------------------
+    def stats( self ):
+        lookups = self.hits + self.misses
+        return { 'hits'      : self.hits,
+                 'misses'    : self.misses,
+                 'hit_rate'  : self.hits / lookups if lookups else 0.,
+                 'stores'    : self.stores,
+                 'evictions' : self.evictions,
+                 'entries'   : len( self._files() ),
+                 'bytes'     : self.size(),
+                 'max_bytes' : self.max_bytes,
+                 'directory' : self.directory }
+
+    def __repr__( self ):
+        return 'EphemerisCache({})'.format( json.dumps( self.stats() ) )
+
+
+# =====================================================================================================
+# module state : the cache sgp4 uses (None = off)
+# =====================================================================================================
+_ACTIVE = { 'cache' : None }
+
+# -----------------------------------------------------------------------------------------------------
+def enable( directory : str = None, max_bytes : int = 2 * 2**30 ):
+    ''' turn the cache on for sgp4.propTLEToDS50s / propTLE_df; returns the EphemerisCache '''
+    _ACTIVE['cache'] = EphemerisCache( directory, max_bytes )
+    return _ACTIVE['cache']
+
+# -----------------------------------------------------------------------------------------------------
+def disable():
+    _ACTIVE['cache'] = None
+
+# -----------------------------------------------------------------------------------------------------
+def get():
+    ''' the active EphemerisCache, or None '''
+    return _ACTIVE['cache']
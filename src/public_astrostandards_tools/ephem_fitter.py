@@ -11,21 +11,19 @@ from . import sgp4
 # -----------------------------------------------------------------------------------------------------
 def optFunction( X, EH, return_scalar=True ):
     PA      = EH.PA
-    XS_TLE  = PA.Cstr('',512)
     # take the function parameters (X) and overwrite the "new_tle" values based on FIELDS 
     for k,v in zip(EH.FIELDS,X) :  
         EH.new_tle[ k ] = v
-    # --------------------- clear state
-    PA.TleDll.TleRemoveAllSats()
-    PA.Sgp4PropDll.Sgp4RemoveAllSats()
+    # --------------------- drop the previous trial only (everything else stays loaded)
+    REG = sgp4.get_registry( PA )
+    if getattr( EH, 'trial_key', 0 ) > 0 :
+        REG.discard( EH.trial_key )
     # --------------------- init our test TLE from the modified data
-    tleid = PA.TleDll.TleAddSatFrArray( EH.new_tle.data, XS_TLE )
+    tleid = EH.trial_key = REG.array_key( EH.new_tle )
     if tleid <= 0: 
         return np.inf
-    if PA.Sgp4PropDll.Sgp4InitSat( tleid ) != 0: 
-        return np.inf
     # --------------------- generate our test ephemeris
-    test_eph = sgp4.propTLEToDS50s( tleid, EH.truth_date, PA )
+    test_eph = sgp4.propTLEToDS50s( tleid, EH.truth_date, PA, out=EH.eph_buf )
     # use numpy to return the distance between our hypothesis and truth
     resids = test_eph[:,1:4] - EH.truth_eph
     rms    = np.sqrt( np.sum( np.linalg.norm( resids, axis=1 ) ) / resids.shape[0] )
@@ -58,18 +56,25 @@ class ephem_fitter( tle_fitter.tle_fitter ):
         self.truth_dt   = eph_df['datetime'].values
         self.truth_date = eph_df['ds50_utc'].values
         self.truth_eph  = np.vstack( (self.truth_df['teme_p']) )
+        # the optimizer propagates into this every iteration (no per-call allocation)
+        self.eph_buf    = np.empty( (len(self.truth_date), 7) )
         self._init_fields()
 
     def set_from_tle( self, L1 : str, L2 : str, dates : list[ datetime ] ):
         ''' 
         take a TLE (from lines) and a set of dates we'll optimize over,
         setup everything we need for a fit
+
+        dates can also be an astro_time.TimeGrid or an already converted frame (no time conversion needed)
         '''
-        dates_f = astro_time.convert_times( dates, self.PA )
+        if isinstance( dates, astro_time.TimeGrid ):
+            dates_f = dates.copy()
+        elif isinstance( dates, pd.DataFrame ) and 'ds50_utc' in dates:
+            dates_f = dates.copy()
+        else:
+            dates_f = astro_time.convert_times( dates, self.PA, cache=True )
         # crack open this TLE
         self.set_from_lines( L1, L2 )
-        # clear all sats
-        self.PA.TleDll.TleRemoveAllSats()
         # propagate this TLE to the dates.. this is our truth s
         eph_df = sgp4.propTLE_df( dates_f, L1, L2, self.PA )
         self.set_ephemeris( eph_df )
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# =====================================================================================================
+# Array-backed ephemeris.  The frames the package passes around hold vectors as python lists in
+# object columns (teme_p, teme_v, j2k_p, efg_p, ...); every use needs np.vstack( df['teme_p'] ) and a
+# row costs a list plus three float objects per vector.  An Ephemeris keeps the same columns as
+# numpy arrays instead:
+#
+#     datetime : the time index (whatever the frame had; tz is kept)
+#     columns  : 1-d arrays (ds50_utc, theta, lat, lon, height, tle_index, ...)
+#     vectors  : contiguous (N,3) arrays per frame (teme_p, teme_v, ...); float64 or float32
+#
+# Slicing with a slice is zero-copy (views all round).  to_pandas / from_pandas convert to and from
+# the usual frames, so code that wants a DataFrame keeps working.
+# =====================================================================================================
+
+# -----------------------------------------------------------------------------------------------------
+def _is_vector_column( S : pd.Series ):
+    if S.dtype != object or S.shape[0] == 0 :
+        return False
+    first = S.iloc[0]
+    return isinstance( first, ( list, tuple, np.ndarray ) ) and np.ndim( first ) == 1
+
+# -----------------------------------------------------------------------------------------------------
+class Ephemeris:
+    '''
+    times plus named 1-d columns and (N,k) vector blocks, all with the same N
+    '''
+    __slots__ = ( 'datetime', 'columns', 'vectors' )
+
+    def __init__( self, datetime=None, columns : dict = None, vectors : dict = None ):
+        self.datetime = datetime
+        self.columns  = dict( columns or {} )
+        self.vectors  = { K : np.ascontiguousarray( V ) for K,V in ( vectors or {} ).items() }
+        N = { len(X) for X in list( self.columns.values() ) + list( self.vectors.values() ) }
+        if datetime is not None:
+            N.add( len( datetime ) )
+        assert len( N ) <= 1, 'columns of different lengths : {}'.format( N )
+
+    # ------------------------------------------------------------------------------------------------
+    def __len__( self ):
+        for X in list( self.columns.values() ) + list( self.vectors.values() ):
+            return len( X )
+        return 0 if self.datetime is None else len( self.datetime )
+
+    def __contains__( self, name ):
+        return name in self.columns or name in self.vectors
+
+    def __getitem__( self, key ):
+        ''' a name gives that array; anything else indexes the rows (a slice gives views, no copy) '''
+        if isinstance( key, str ):
+            return self.vectors[ key ] if key in self.vectors else self.columns[ key ]
+        return Ephemeris( None if self.datetime is None else self.datetime[ key ],
+                          { K : V[ key ] for K,V in self.columns.items() },
+                          { K : V[ key ] for K,V in self.vectors.items() } )
+
+    def __setitem__( self, name : str, value ):
+        ''' (N,) goes in columns, (N,k) in vectors '''
+        value = np.asarray( value )
+        assert len( self ) == 0 or value.shape[0] == len( self )
+        if value.ndim == 2:
+            self.columns.pop( name, None )
+            self.vectors[ name ] = np.ascontiguousarray( value )
+        else:
+            self.vectors.pop( name, None )
+            self.columns[ name ] = value
+
+    def __repr__( self ):
+        return 'Ephemeris( {} rows, columns={}, vectors={}, {:.1f} MB )'.format(
+                len( self ), list( self.columns ), list( self.vectors ), self.nbytes / 2**20 )
+
+    @property
+    def ds50_utc( self ):
+        return self.columns['ds50_utc']
+
+    @property
+    def nbytes( self ):
+        return sum( np.asarray( X ).nbytes for X in list( self.columns.values() ) + list( self.vectors.values() ) )
+
+    # ------------------------------------------------------------------------------------------------
+    def astype( self, dtype ):
+        ''' copy with the vectors in `dtype` (e.g. np.float32); times and columns are left alone '''
+        return Ephemeris( self.datetime, self.columns, { K : V.astype( dtype ) for K,V in self.vectors.items() } )
+
+    def stacked( self, *names ):
+        ''' (N, 3 * len(names)) block, e.g. stacked( 'teme_p', 'teme_v' ) '''
+        return np.hstack( [ self.vectors[ K ] for K in names ] )
+
+    # ------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_pandas( cls, df : pd.DataFrame, dtype=np.float64 ):
+        '''
+        vector columns (lists / arrays per cell) become (N,k) `dtype` arrays; everything else is
+        taken as a 1-d column
+        '''
+        columns, vectors, dt = {}, {}, None
+        for K in df.columns:
+            if K == 'datetime':
+                dt = df[K].array
+            elif _is_vector_column( df[K] ):
+                vectors[K] = np.array( df[K].tolist(), dtype=dtype )
+            else:
+                columns[K] = df[K].to_numpy()
+        return cls( dt, columns, vectors )
+
+    def to_pandas( self ):
+        ''' the usual frame (vectors back as lists per cell) '''
+        data = {}
+        if self.datetime is not None:
+            data['datetime'] = pd.Series( self.datetime )
+        data.update( { K : V for K,V in self.columns.items() } )
+        data.update( { K : V.tolist() for K,V in self.vectors.items() } )
+        return pd.DataFrame( data )
+
+    @classmethod
+    def from_times( cls, dates, dtype=np.float64 ):
+        '''
+        the time columns of a convert_times frame (vectors already in it come along) or a TimeGrid;
+        a plain ds50 UTC array gives just the ds50_utc column (no datetime)
+        '''
+        if isinstance( dates, pd.DataFrame ):
+            return cls.from_pandas( dates, dtype )
+        if hasattr( dates, 'ds50_utc' ) and hasattr( dates, 'datetime' ):
+            return cls( dates.datetime.array, { 'ds50_utc' : dates.ds50_utc } )
+        return cls( None, { 'ds50_utc' : np.asarray( dates, dtype=np.float64 ) } )
+
+    @classmethod
+    def from_propagation( cls, dates, eph : np.ndarray, dtype=np.float64 ):
+        ''' from_times plus teme_p / teme_v out of a propTLEToDS50s (N,7) <ds50><pos><vel> block '''
+        rv = cls.from_times( dates, dtype )
+        rv.vectors['teme_p'] = np.ascontiguousarray( eph[:,1:4], dtype=dtype )
+        rv.vectors['teme_v'] = np.ascontiguousarray( eph[:,4:7], dtype=dtype )
+        return rv
@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 from . import astro_time
 from . import coordinates
+from .dll_batch import BatchCall
 
 # -----------------------------------------------------------------------------------------------------
 def UDL_rotate_TEME_ob( udlob , harness ):
@@ -38,9 +39,8 @@ def UDL_rotate_TEME_df( df, harness ):
     given a set of UDL obs in a dataframe that have been annotated with astro_time.convert_time,
     rotate all from J2K into TEME
     '''
-    tv = df.apply( lambda X : UDL_rotate_TEME_ob( X, harness ) , axis=1 )
-    df['teme_ra']  = [ X[0] for X in tv ]
-    df['teme_dec'] = [ X[1] for X in tv ]
+    rot = BatchCall( harness.AstroFuncDll.RotRADec_EqnxToDate, ( 106, 2, 'i', 'i', 'i', 'o', 'o' ) )
+    df['teme_ra'], df['teme_dec'] = rot( df['ds50_utc'].values, df['ra'].values, df['declination'].values )
     # x = np.cos( np.radians(df['teme_dec']) ) * np.cos( np.radians( df['teme_ra'] ) )
     # y = np.cos( np.radians(df['teme_dec']) ) * np.sin( np.radians( df['teme_ra'] ) )
     # z = np.sin( np.radians(df['teme_dec'] ) )
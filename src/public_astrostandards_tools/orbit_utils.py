@@ -2,6 +2,9 @@ import ctypes
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
+from . import astro_time
+from . import relative
+from .dll_batch import BatchCall, named_columns
 
 # -----------------------------------------------------------------------------------------------------
 _DSEPOCH = datetime(year=1950,month=1,day=1)
@@ -9,13 +12,20 @@ def datetime_from_ds50( ds50 : float ):
     # minus 1 because astrostandards epoch is 1-indexed.. not 0
     return _DSEPOCH + timedelta( days=ds50-1 )
 
+# -----------------------------------------------------------------------------------------------------
+def datetimes_from_ds50( ds50 : np.ndarray ):
+    '''
+    array version of datetime_from_ds50; returns datetime64[ns] 
+    '''
+    return astro_time.ds50_to_datetime64( ds50 )
+
 # -----------------------------------------------------------------------------------------------------
 def getRIC( sv ):
-    P = np.array( sv['teme_p'] )
-    V = np.array(sv['teme_v'] )
-    R = np.array(P) / np.linalg.norm(P)
-    I = np.array(V) / np.linalg.norm(V)
-    C = np.cross( I, R )
+    '''
+    R = r/|r|, I = v/|v|, C = I x R for one state vector (teme_p / teme_v); relative.basis with
+    convention='legacy' (convention='orthonormal' for the right-handed frame)
+    '''
+    R, I, C = relative.basis( np.array( sv['teme_p'] ), np.array( sv['teme_v'] ), 'RIC', convention='legacy' )
     return R, I, C
 
 # -----------------------------------------------------------------------------------------------------
@@ -51,22 +61,14 @@ def sv_to_osc_df( sv_df : pd.DataFrame, PA ) :
     ''' 
     given a dataframe with 'teme_p' and 'teme_v' on each row, annotate each row with XA_KEP data
     '''
-    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!! 
-    # getting a helpers object is expensive, so rather than re-use the sv_to_osc routine, we'll do 
-    # something more efficient here and re-use the holder and a closure
+    # one holder (getting a helpers object is expensive) for the layout; the DLL calls are batched
     XA_KEP    = PA.helpers.astrostd_named_fields( PA.AstroFuncDll,  prefix='XA_KEP_' )
-    def _kep_closure( D ):
-        PA.AstroFuncDll.PosVelToKep( 
-            (ctypes.c_double*3)(*D['teme_p']), 
-            (ctypes.c_double*3)(*D['teme_v']), 
-            XA_KEP.data )
-        true_anom = PA.AstroFuncDll.CompTrueAnomaly( XA_KEP.data )
-        # NOTE : this dict call is actually kind of expensive (~15% of runtime because we call it so much)
-        rv = XA_KEP.toDict()
-        rv.update( {'XA_KEP_TA' : true_anom } )
-        return rv
-    tv = sv_df.apply( lambda X: _kep_closure(X), axis=1 )
-    tv = pd.DataFrame.from_dict( tv.values.tolist() )
+    n         = len( XA_KEP.data )
+    kep       = BatchCall( PA.AstroFuncDll.PosVelToKep, ( 'i3', 'i3', 'o{}'.format( n ) ) )( 
+                        np.vstack( sv_df['teme_p'] ), np.vstack( sv_df['teme_v'] ) )
+    true_anom = BatchCall( PA.AstroFuncDll.CompTrueAnomaly, ( 'i{}'.format( n ), ), returns=np.float64 )( kep )
+    tv        = pd.DataFrame( named_columns( kep, XA_KEP ) )
+    tv['XA_KEP_TA'] = true_anom
     rv = pd.concat( (sv_df.reset_index(drop=True), tv.reset_index(drop=True) ), axis=1 )
     # add in the true anomaly data 
     return rv
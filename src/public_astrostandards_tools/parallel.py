@@ -0,0 +1,185 @@
+import os
+import importlib
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+from . import astro_time
+from . import time_constants
+from . import sgp4
+from . import utils
+
+# =====================================================================================================
+# Process-pool propagation.  The SAAL libraries keep global state and a ctypes call holds us on one
+# core, so the only way to use a big box is one process per core.  Each worker initializes the
+# harness and loads the time constants exactly once (pool initializer), then takes shards of work.
+# Results are written by the workers directly into a shared-memory block (or a memory-mapped .npy) so
+# nothing large is ever pickled back to the parent.
+# =====================================================================================================
+
+# per-worker state (set by _init_worker)
+_WORKER = { 'PA' : None, 'ds50' : None }
+
+# -----------------------------------------------------------------------------------------------------
+def _init_worker( harness_name : str, time_constants_file : str, ds50 : np.ndarray ):
+    PA = importlib.import_module( harness_name )
+    PA.init_all()
+    astro_time.load_time_constants( time_constants_file, PA )
+    _WORKER['PA']   = PA
+    _WORKER['ds50'] = ds50
+
+# -----------------------------------------------------------------------------------------------------
+def _attach( target ):
+    ''' target is ( 'shm', name, shape ) or ( 'npy', path, shape ); return ( handle, ndarray view ) '''
+    kind, where, shape = target
+    if kind == 'shm':
+        shm = shared_memory.SharedMemory( name=where )
+        return shm, np.ndarray( shape, dtype=np.float64, buffer=shm.buf )
+    return None, np.load( where, mmap_mode='r+' )
+
+# -----------------------------------------------------------------------------------------------------
+def _release( PA, keys ):
+    # drop what we loaded so a long-lived worker doesn't accumulate satellites (through the registry,
+    # so it doesn't hand the keys out again)
+    R = sgp4.get_registry( PA )
+    for K in keys:
+        if K > 0 :
+            R.discard( K )
+
+# -----------------------------------------------------------------------------------------------------
+def _catalog_shard( args ):
+    target, start, lines = args
+    PA          = _WORKER['PA']
+    handle, out = _attach( target )
+    keys, eph, errors = sgp4.propagate_catalog( lines, _WORKER['ds50'], PA )
+    out[ start:start + len(lines) ] = eph
+    _release( PA, keys )
+    del out
+    if handle is not None:
+        handle.close()
+    return { start + k : v for k,v in errors.items() }
+
+# -----------------------------------------------------------------------------------------------------
+def _time_shard( args ):
+    target, start, stop, L1, L2 = args
+    PA          = _WORKER['PA']
+    handle, out = _attach( target )
+    key = sgp4.get_registry( PA ).lines_key( L1, L2 )
+    ok  = key > 0
+    if ok:
+        buf = np.empty( (stop - start, 7) )
+        sgp4.propTLEToDS50s( key, _WORKER['ds50'][ start:stop ], PA, out=buf )
+        out[ start:stop ] = buf[:,1:]
+    _release( PA, [ key ] )
+    del out
+    if handle is not None:
+        handle.close()
+    return ok
+
+# -----------------------------------------------------------------------------------------------------
+def _shards( N : int, size : int ):
+    return [ ( S, min( S + size, N ) ) for S in range( 0, N, size ) ]
+
+# -----------------------------------------------------------------------------------------------------
+class _Output:
+    '''
+    the result block : shared memory (copied out at the end) or a memory-mapped .npy (returned as is)
+    '''
+    def __init__( self, shape, out_path=None ):
+        self.shape = shape
+        self.path  = out_path
+        self.shm   = None
+        if out_path:
+            self.array  = np.lib.format.open_memmap( out_path, mode='w+', dtype=np.float64, shape=shape )
+            self.array[:] = np.nan
+            self.array.flush()
+            self.target = ( 'npy', out_path, shape )
+        else:
+            nbytes      = max( int( np.prod( shape ) ) * 8, 8 )
+            self.shm    = shared_memory.SharedMemory( create=True, size=nbytes )
+            self.array  = np.ndarray( shape, dtype=np.float64, buffer=self.shm.buf )
+            self.array[:] = np.nan
+            self.target = ( 'shm', self.shm.name, shape )
+
+    def result( self ):
+        if self.shm is None:
+            self.array.flush()
+            return np.load( self.path, mmap_mode='r+' )
+        rv = np.array( self.array )
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+        return rv
+
+# -----------------------------------------------------------------------------------------------------
+def _pool( workers, harness_name, time_constants_file, ds50, context ):
+    if time_constants_file is None:
+        time_constants_file = time_constants.loaded_file() or utils.get_test_time_constants()
+    ctx = multiprocessing.get_context( context )
+    return ctx.Pool( processes = workers,
+                     initializer = _init_worker,
+                     initargs = ( harness_name, time_constants_file, ds50 ) )
+
+# -----------------------------------------------------------------------------------------------------
+def propagate_catalog( lines_list : list[ tuple[ str, str ] ],
+                       dates,
+                       workers : int = None,
+                       shard_size : int = None,
+                       out_path : str = None,
+                       harness_name : str = 'public_astrostandards',
+                       time_constants_file : str = None,
+                       context : str = 'spawn' ):
+    '''
+    sgp4.propagate_catalog spread over a process pool (TLEs are sharded across workers)
+
+    dates      : convert_times frame, astro_time.TimeGrid or ds50 UTC array
+    workers    : number of processes (default: all cores)
+    shard_size : TLEs per task (default: ~4 tasks per worker)
+    out_path   : write into a memory-mapped .npy here (and return the memmap) instead of shared memory
+
+    returns ( eph (N_sat, N_time, 6), errors { index : message } )
+    '''
+    ds50       = np.ascontiguousarray( sgp4.ds50_from_dates( dates ), dtype=np.float64 )
+    N          = len( lines_list )
+    workers    = workers or os.cpu_count()
+    shard_size = shard_size or max( 1, int( np.ceil( N / ( 4 * workers ) ) ) )
+    out        = _Output( ( N, ds50.shape[0], 6 ), out_path )
+    errors     = {}
+    try:
+        with _pool( workers, harness_name, time_constants_file, ds50, context ) as P:
+            tasks = [ ( out.target, S, list( lines_list[S:E] ) ) for S,E in _shards( N, shard_size ) ]
+            for E in P.imap_unordered( _catalog_shard, tasks ):
+                errors.update( E )
+    except BaseException:
+        out.result()
+        raise
+    return out.result(), errors
+
+# -----------------------------------------------------------------------------------------------------
+def propagate_long( L1 : str,
+                    L2 : str,
+                    dates,
+                    workers : int = None,
+                    shard_size : int = None,
+                    out_path : str = None,
+                    harness_name : str = 'public_astrostandards',
+                    time_constants_file : str = None,
+                    context : str = 'spawn' ):
+    '''
+    one TLE over a long time grid; the grid is cut into slices and each worker takes slices
+
+    returns (N_time, 6) TEME pos / vel (NaN if the TLE didn't load)
+    '''
+    ds50       = np.ascontiguousarray( sgp4.ds50_from_dates( dates ), dtype=np.float64 )
+    N          = ds50.shape[0]
+    workers    = workers or os.cpu_count()
+    shard_size = shard_size or max( 1, int( np.ceil( N / ( 4 * workers ) ) ) )
+    out        = _Output( ( N, 6 ), out_path )
+    try:
+        with _pool( workers, harness_name, time_constants_file, ds50, context ) as P:
+            tasks = [ ( out.target, S, E, L1, L2 ) for S,E in _shards( N, shard_size ) ]
+            list( P.imap_unordered( _time_shard, tasks ) )
+    except BaseException:
+        out.result()
+        raise
+    return out.result()
@@ -3,6 +3,7 @@ from . import astro_time
 from . import sgp4
 from . import orbit_utils
 from . import tle_fitter
+from . import relative
 
 # =====================================================================================================
 # Suppose we want to perturb a TLE at epoch.  How can we do that?  It is very nonlinear to encode a 
@@ -89,6 +90,8 @@ def perturbTLE( EF : tle_fitter.tle_fitter,
     '''
     assume that you get an test_fitter as an input,
     we'll use this to give back a perturbed set of TLE
+
+    RIC : velocity offsets (km/s) at epoch along the orbit_utils.getRIC axes
     '''
     # did we get satno's to assign
     if satnos is None:
@@ -98,25 +101,21 @@ def perturbTLE( EF : tle_fitter.tle_fitter,
     assert len(satnos) == len(RIC)
 
     # get the state vector at epoch
-    date_df = astro_time.convert_times( [ EF.getOriginalEpoch() ] , EF.PA )
+    # only ds50_utc is needed to propagate; leave the rest of the time fields lazy
+    date_df = astro_time.convert_times( [ EF.getOriginalEpoch() ] , EF.PA, lazy=True )
     L1, L2  = EF.getOriginalLines()
     sv_df   = sgp4.propTLE_df( date_df , L1, L2, EF.PA ).iloc[0]
 
     # get the initial keplerian elements at epoch
     iXA_KEP = orbit_utils.sv_to_osc( sv_df, EF.PA )
 
-    # find the RIC frame there
-    R,I,C   = orbit_utils.getRIC( sv_df )
-    P,V     = sv_df['teme_p'], sv_df['teme_v']
+    # the perturbations are velocity offsets along the getRIC axes at epoch : one chief time, len(RIC) deputies
+    P,V     = np.array( sv_df['teme_p'] ), np.array( sv_df['teme_v'] )
+    dV      = np.asarray( RIC, dtype=np.float64 )[:,np.newaxis,:]
+    _, newV = relative.to_inertial( P[np.newaxis], V[np.newaxis], np.zeros_like( dV ), dV, convention='legacy' )
 
     # build the perturbed state vectors
-    svs     = []
-    for X in RIC:
-        dR = R * X[0]
-        dI = I * X[1]
-        dC = C * X[2]
-        newV = V + dR + dI + dC
-        svs.append( {'teme_p' : P, 'teme_v' : newV} )
+    svs     = [ {'teme_p' : P, 'teme_v' : X} for X in newV[:,0] ]
 
     # turn these states into osculating; find the delta to the initial sv
     XA_KEP  = [orbit_utils.sv_to_osc( X, EF.PA ).toDict() for X in svs]
@@ -0,0 +1,136 @@
+import numpy as np
+
+# =====================================================================================================
+# Relative motion in a chief's local orbit frame, for whole ensembles at once.  orbit_utils.getRIC
+# (one state vector, legacy RIC) and residuals.getUVW (list columns) are built on it; the chief's
+# basis is built once as an (M,3,3) array (one row per axis, per time) and whole difference tensors
+# are rotated in one einsum:
+#
+#     chief      : (M,3) position / velocity (TEME, or any inertial frame)
+#     deputies   : (M,3) or (N,M,3) ; N deputies over the same M times
+#
+# Frames (rows of the basis, in this order):
+#     'RIC' : radial, in-track, cross-track; two conventions (convention=)
+#               'legacy'      : R = r/|r|, I = v/|v|, C = I x R (along -h; not unit / orthogonal
+#                               off a circular orbit).  What orbit_utils.getRIC and 
+#                               perturb_tle.perturbTLE have always used, and the default.
+#               'orthonormal' : R = r/|r|, I = C x R, C = h/|h| (right handed)
+#     'UVW' : R / I / C of the orthonormal convention (the ROTAS / SPADOC names)
+#     'NTW' : normal ( T x W ), tangential ( v/|v| ), W ( h/|h| )
+#
+# Offsets are expressed as components along the axes ( d = B.T @ rho ), so the legacy frame round
+# trips too.  With rotating=True the relative velocity is taken as seen from the rotating frame,
+# i.e. the frame rate w x rho is removed.  The rate is the two-body one, w = ( r x v ) / |r|^2, 
+# which is exact for the orthonormal RIC / UVW; the other frames don't take rotating.
+#
+#     B          = relative.basis( chief_p, chief_v, convention='orthonormal' )
+#     ric, ricd  = relative.relative_state( chief_p, chief_v, dep_p, dep_v, convention='orthonormal', rotating=True )
+# =====================================================================================================
+
+FRAMES      = ( 'RIC', 'UVW', 'NTW' )
+CONVENTIONS = ( 'legacy', 'orthonormal' )
+
+# -----------------------------------------------------------------------------------------------------
+def _unit( X ):
+    return X / np.linalg.norm( X, axis=-1 )[...,np.newaxis]
+
+# -----------------------------------------------------------------------------------------------------
+def basis( pos : np.ndarray, vel : np.ndarray, frame : str = 'RIC', convention : str = 'legacy' ):
+    '''
+    (...,3,3) local frame for (...,3) position / velocity; row k is axis k in the input frame, so
+    inertial = B.T @ local (and local = B @ inertial for the orthonormal frames)
+
+    convention only applies to 'RIC' (see the module notes)
+    '''
+    assert frame in FRAMES, 'frame should be one of {}'.format( FRAMES )
+    assert convention in CONVENTIONS, 'convention should be one of {}'.format( CONVENTIONS )
+    pos = np.asarray( pos, dtype=np.float64 )
+    vel = np.asarray( vel, dtype=np.float64 )
+    if frame == 'RIC' and convention == 'legacy':
+        R = _unit( pos )
+        I = _unit( vel )
+        return np.stack( ( R, I, np.cross( I, R ) ), axis=-2 )
+    W   = _unit( np.cross( pos, vel ) )
+    if frame == 'NTW':
+        T = _unit( vel )
+        return np.stack( ( np.cross( T, W ), T, W ), axis=-2 )
+    R   = _unit( pos )
+    return np.stack( ( R, np.cross( W, R ), W ), axis=-2 )
+
+# -----------------------------------------------------------------------------------------------------
+def frame_rate( pos : np.ndarray, vel : np.ndarray ):
+    ''' (...,3) two-body angular velocity of the RIC frame, ( r x v ) / |r|^2, in the input frame '''
+    pos = np.asarray( pos, dtype=np.float64 )
+    return np.cross( pos, vel ) / np.sum( pos * pos, axis=-1 )[...,np.newaxis]
+
+# -----------------------------------------------------------------------------------------------------
+def rotate( B : np.ndarray, vec : np.ndarray, inverse : bool = False ):
+    '''
+    apply an (M,3,3) basis to (M,3) or (N,M,3) vectors ( inverse=True goes local -> inertial )
+    '''
+    if inverse:
+        return np.einsum( 'mji,...mj->...mi', B, vec )
+    return np.einsum( 'mij,...mj->...mi', B, vec )
+
+# -----------------------------------------------------------------------------------------------------
+def _orthonormal( frame, convention ):
+    return frame != 'RIC' or convention == 'orthonormal'
+
+def _components( B, vec, frame, convention ):
+    ''' rho with vec = B.T @ rho (a rotation for the orthonormal frames, a solve for legacy RIC) '''
+    if _orthonormal( frame, convention ):
+        return rotate( B, vec )
+    return np.einsum( 'mij,...mj->...mi', np.linalg.inv( np.swapaxes( B, -1, -2 ) ), vec )
+
+# -----------------------------------------------------------------------------------------------------
+def relative_state( chief_p : np.ndarray,
+                    chief_v : np.ndarray,
+                    dep_p   : np.ndarray,
+                    dep_v   : np.ndarray = None,
+                    frame   : str = 'RIC',
+                    rotating: bool = False,
+                    convention : str = 'legacy' ):
+    '''
+    deputy minus chief, in the chief's local frame
+
+    chief_p, chief_v : (M,3)
+    dep_p, dep_v     : (M,3) or (N,M,3)
+
+    returns the local position offsets, and the local velocity offsets if dep_v is given
+    (None otherwise); rotating=True removes the frame rate from the velocity
+    '''
+    assert not rotating or ( frame != 'NTW' and _orthonormal( frame, convention ) ), \
+        'rotating velocities are for the orthonormal RIC / UVW'
+    B   = basis( chief_p, chief_v, frame, convention )
+    rho = _components( B, np.asarray( dep_p ) - chief_p, frame, convention )
+    if dep_v is None:
+        return rho, None
+    rhod = _components( B, np.asarray( dep_v ) - chief_v, frame, convention )
+    if rotating:
+        w    = rotate( B, frame_rate( chief_p, chief_v ) )
+        rhod = rhod - np.cross( w, rho )
+    return rho, rhod
+
+# -----------------------------------------------------------------------------------------------------
+def to_inertial( chief_p : np.ndarray,
+                 chief_v : np.ndarray,
+                 rho     : np.ndarray,
+                 rhod    : np.ndarray = None,
+                 frame   : str = 'RIC',
+                 rotating: bool = False,
+                 convention : str = 'legacy' ):
+    '''
+    inverse of relative_state : local offsets (M,3) or (N,M,3) back to absolute deputy states
+    '''
+    assert not rotating or ( frame != 'NTW' and _orthonormal( frame, convention ) ), \
+        'rotating velocities are for the orthonormal RIC / UVW'
+    B   = basis( chief_p, chief_v, frame, convention )
+    rho = np.asarray( rho, dtype=np.float64 )
+    pos = chief_p + rotate( B, rho, inverse=True )
+    if rhod is None:
+        return pos, None
+    rhod = np.asarray( rhod, dtype=np.float64 )
+    if rotating:
+        w    = rotate( B, frame_rate( chief_p, chief_v ) )
+        rhod = rhod + np.cross( w, rho )
+    return pos, chief_v + rotate( B, rhod, inverse=True )
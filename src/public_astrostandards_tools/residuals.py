@@ -5,6 +5,7 @@ from . import sgp4
 from . import sensor
 from . import orbit_utils
 from . import residuals
+from . import relative
 
 # -----------------------------------------------------------------------------------------------------
 def shortestAngle( angles : np.array ):
@@ -18,23 +19,15 @@ def getUVW( sv_df : pd.DataFrame ):
     we'll use this when projecting an observation into the computed orbit frame
     (see Figure 3 of the ROTASDll documentation (pg 19 in version 9.5)
 
-    Note: this will annotate the input frame
+    Note: this will annotate the input frame (U_c, V_c, W_c list columns); relative.basis gives
+    the same axes as one (N,3,3) array
 
     Note: there's a function in AstroFuncDll that does this as well
     '''
-    # we'll do this in numpy arrays / vectors for speed (push lists to DataFrame)
-    tP = np.vstack( sv_df['teme_p'].values )
-    tV = np.vstack( sv_df['teme_v'].values )
-    # get the U coordinate
-    U_c = tP / np.linalg.norm( tP, axis=1 )[:,np.newaxis]
-    sv_df['U_c'] = U_c.tolist()
-    # get the W coordinate
-    W_c = np.cross( tP, tV, axis=1 )
-    W_c = W_c / np.linalg.norm( W_c, axis=1 )[:,np.newaxis]
-    sv_df['W_c'] = W_c.tolist()
-    # get the V coordinate
-    V_c = np.cross( W_c, U_c, axis=1 )
-    sv_df['V_c'] = V_c.tolist()
+    B = relative.basis( np.vstack( sv_df['teme_p'].values ), np.vstack( sv_df['teme_v'].values ), 'UVW' )
+    sv_df['U_c'] = B[:,0].tolist()
+    sv_df['W_c'] = B[:,2].tolist()
+    sv_df['V_c'] = B[:,1].tolist()
     # return the data 
     return sv_df 
 
@@ -139,8 +132,8 @@ def UDL_ROTAS( obs_df : pd.DataFrame,
     eph_df    = sgp4.propTLE_df( date_df, L1, L2, PA )
     # turn each P,V into osculating elements (for ROTAS comparison)
     eph_df    = orbit_utils.sv_to_osc_df( eph_df, PA )
-    # find the U,V,W frame
-    eph_df    = getUVW(eph_df)
+    # find the U,V,W frame (rows are U_c, V_c, W_c per time)
+    UVW       = relative.basis( np.vstack( eph_df['teme_p'] ), np.vstack( eph_df['teme_v'] ), 'UVW' )
 
     # -------------------- start the residual calc
     # now, generate hypothesis looks ( from sensor to eph frame )
@@ -156,17 +149,13 @@ def UDL_ROTAS( obs_df : pd.DataFrame,
     # delta_nu -> equation (6) from ROTAS : atan( U_o \dot V_c / U_o \dot U_c ) 
     # (notation is wrong in document; the observed unit vector should appear in numerator and denominator
     # replace one U_c in numerator and denominator with O_i (observed unit vector)
-    V_c = np.vstack( eph_df['V_c'] )
-    U_c = np.vstack( eph_df['U_c'] )
-    W_c = np.vstack( eph_df['W_c'] )
-    O_i = np.vstack( obs_df['teme_lv'] )
-    num = np.sum( O_i * V_c , axis=1 )
-    den = np.sum( O_i * U_c , axis=1 )
-    del_nu = np.arctan2( num, den )
+    # the observed unit vector in UVW : ( O_i . U_c, O_i . V_c, O_i . W_c )
+    O_i = relative.rotate( UVW, np.vstack( obs_df['teme_lv'] ) )
+    del_nu = np.arctan2( O_i[:,1], O_i[:,0] )
     residuals_df['del_nu'] = del_nu.tolist()
 
     # equation (15) RotasDLL documentation (V9.6)
-    residuals_df['beta']   = np.arcsin( np.sum( O_i * W_c, axis=1 ) )  
+    residuals_df['beta']   = np.arcsin( O_i[:,2] )  
 
     # approximate true anomaly from hypothesis (computed) and the delta-nu value
     nu_c      = eph_df['XA_KEP_TA']
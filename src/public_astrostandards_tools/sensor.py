@@ -1,7 +1,8 @@
-import ctypes
 import numpy as np
 import pandas as pd
 from . import coordinates
+from . import astro_time
+from .dll_batch import BatchCall, named_columns
 
 # -----------------------------------------------------------------------------------------------------
 def sun_at_time(  df : pd.DataFrame, # must have the times set
@@ -9,15 +10,14 @@ def sun_at_time(  df : pd.DataFrame, # must have the times set
     '''
     given a set of dates in the format output by time_helpers.convert_times, output the 
     sun position at those times
+
+    if df is an astro_time.TimeGrid, the positions are computed once and cached on the grid
     '''
-    sun_v  = (ctypes.c_double * 3)()
-    sun_m  = ctypes.c_double()
+    if isinstance( df, astro_time.TimeGrid ):
+        return df.sun()
     # the routine gives us a look vector and magnitude
-    # compute the sun location at times 
-    def getSun( X ):
-        INTERFACE.AstroFuncDll.CompSunPos( X, sun_v, sun_m ) 
-        return list( (ctypes.c_double * 3)( * (np.array( sun_v ) * sun_m ) ) )
-    return [ getSun(X)  for X in df['ds50_et'] ]
+    U, M = BatchCall( INTERFACE.AstroFuncDll.CompSunPos, ( 'i', 'o3', 'o' ) )( df['ds50_et'].values )
+    return ( U * M[:,None] ).tolist()
 
 # -----------------------------------------------------------------------------------------------------
 def moon_at_time(  df : pd.DataFrame, # must have the times set
@@ -27,15 +27,14 @@ def moon_at_time(  df : pd.DataFrame, # must have the times set
     moon position at those times
 
     NOTE: this does not annotate or return a DataFrame; it just returns an array of positions
+
+    if df is an astro_time.TimeGrid, the positions are computed once and cached on the grid
     '''
-    sun_v  = (ctypes.c_double * 3)()
-    sun_m  = ctypes.c_double()
+    if isinstance( df, astro_time.TimeGrid ):
+        return df.moon()
     # the routine gives us a look vector and magnitude
-    # compute the sun location at times 
-    def getMoon( X ):
-        INTERFACE.AstroFuncDll.CompMoonPos( X, sun_v, sun_m ) 
-        return list( (ctypes.c_double * 3)( * (np.array( sun_v ) * sun_m ) ) )
-    return [ getMoon(X)  for X in df['ds50_et'] ]
+    U, M = BatchCall( INTERFACE.AstroFuncDll.CompMoonPos, ( 'i', 'o3', 'o' ) )( df['ds50_et'].values )
+    return ( U * M[:,None] ).tolist()
 
 # -----------------------------------------------------------------------------------------------------
 def is_sunlit(  df : pd.DataFrame,
@@ -45,10 +44,9 @@ def is_sunlit(  df : pd.DataFrame,
 
     NOTE: this does not annotate or return a DataFrame; it just returns an array of positions
     '''
-    def closure( ds50_et, teme ):
-        tt = (ctypes.c_double * 3)(* teme )
-        return INTERFACE.AstroFuncDll.IsPointSunlit( ds50_et, tt )
-    return [ closure(A,B) for A,B in zip( df['ds50_et'], df['teme_p'] ) ]  
+    lit = BatchCall( INTERFACE.AstroFuncDll.IsPointSunlit, ( 'i', 'i3' ), returns=np.int32 )( 
+                    df['ds50_et'].values, np.vstack( df['teme_p'] ) )
+    return lit.tolist()
 
 
 # -----------------------------------------------------------------------------------------------------
@@ -79,6 +77,9 @@ def compute_looks(
     # we need a data holder for the output of ECIToTopoComps
     TOPO = INTERFACE.helpers.astrostd_named_fields( INTERFACE.AstroFuncDll, prefix='XA_TOPO_' )
 
+    # theta has to be a real column before we concat and go row-by-row
+    astro_time.materialize( df_sensor, ['theta'] )
+
     # check that the dates are aligned
     del_t = np.abs( df_target['ds50_utc'].values - df_sensor['ds50_utc'].values )
     assert np.max( np.abs(del_t) ) < 0.00001
@@ -129,27 +130,17 @@ def compute_looks(
     # return tdf
     
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-    # ECITopoComps VERSION
-    def calcLooks( R ):
-        lst = np.radians( R['lon_sensor'] ) + R['theta_sensor']
-        if 'eci_v_target' in R: 
-            eci_v_target = (ctypes.c_double * 3)( *R['eci_v_target'] )
-        elif 'teme_v_target' in R:
-            eci_v_target = (ctypes.c_double * 3)( *R['teme_v_target'] )
-        else: 
-            eci_v_target = (ctypes.c_double * 3)(0,0,0)
-
-        INTERFACE.AstroFuncDll.ECIToTopoComps( lst,
-                                               R['astrolat_sensor'],
-                                               (ctypes.c_double * 3) (*R['teme_p_sensor']),
-                                               (ctypes.c_double * 3) (*R['teme_p_target']),
-                                               eci_v_target,
-                                               TOPO.data )
-
-        # INTERFACE.AstroFuncDll.ECIToTopoComps( lst, lat, sen_eci, sun_p, fake_v, SUN_TOPO.data )
-        return TOPO.toDict()    
-
-    ans =  pd.DataFrame.from_records( tdf.apply( calcLooks, axis=1 ).values )
+    # ECITopoComps VERSION (one call per row, batched; see dll_batch)
+    lst = np.radians( tdf['lon_sensor'].values ) + tdf['theta_sensor'].values
+    if 'eci_v_target' in tdf:
+        tar_v = np.vstack( tdf['eci_v_target'] )
+    elif 'teme_v_target' in tdf:
+        tar_v = np.vstack( tdf['teme_v_target'] )
+    else:
+        tar_v = np.zeros( ( tdf.shape[0], 3 ) )
+    topo = BatchCall( INTERFACE.AstroFuncDll.ECIToTopoComps, ( 'i', 'i', 'i3', 'i3', 'i3', 'o{}'.format( len( TOPO.data ) ) ) )(
+                    lst, tdf['astrolat_sensor'].values, np.vstack( tdf['teme_p_sensor'] ), np.vstack( tdf['teme_p_target'] ), tar_v )
+    ans = pd.DataFrame( named_columns( topo, TOPO ) )
     rv = pd.concat( (tdf.reset_index(drop=True),ans.reset_index(drop=True)), axis=1 ) 
 
     return rv
@@ -177,12 +168,20 @@ def setup_ground_site( dates_df : pd.DataFrame,
                        lon : float,
                        alt : float,
                        INTERFACE ):
+    # a TimeGrid caches the site position; every target screened on that grid re-uses it
+    if isinstance( dates_df, astro_time.TimeGrid ):
+        sensor_f = dates_df.copy()
+        sensor_f['lat']     = lat
+        sensor_f['lon']     = lon
+        sensor_f['height']  = alt
+        sensor_f['teme_p']  = dates_df.site_teme( lat, lon, alt )
+        return sensor_f
     # for now, modify the passed in dataframe
     sensor_f = dates_df
     # test the LLH_to_TEME function
     sensor_f['lat']     = lat
     sensor_f['lon']     = lon
     sensor_f['height']  = alt
-    # we need ECI to feed later routines
+    # we need ECI to feed later routines (a fixed site : EFG once, rotated by theta)
     sensor_f = coordinates.LLH_to_TEME( sensor_f, INTERFACE )
     return sensor_f
\ No newline at end of file
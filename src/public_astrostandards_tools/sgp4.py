@@ -1,5 +1,11 @@
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
+from . import astro_time
+from . import time_constants
+from . import coordinates
+from . import ephem_cache
+from .ephemeris import Ephemeris
 
 # -----------------------------------------------------------------------------------------------------
 def getLicensePath( INTERFACE ):
@@ -26,37 +32,350 @@ def initTLE( tleid : float, INTERFACE ):
     return INTERFACE.Sgp4PropDll.Sgp4InitSat( tleid ) == 0
 
 # -----------------------------------------------------------------------------------------------------
-def propTLEToDS50s( tleid, ds50_l : list[ float ], INTERFACE ):
+def _genEphems( tleid, ds50, out, INTERFACE ):
+    '''
+    try the DLL's array entry point (Sgp4GenEphems) for evenly spaced times; returns False if the 
+    library doesn't have it, won't take our array, or gives back something other than our grid
+    '''
+    ctypes = INTERFACE.ctypes
+    F      = getattr( INTERFACE.Sgp4PropDll, 'Sgp4GenEphems', None )
+    N      = ds50.shape[0]
+    if F is None or N < 3 :
+        return False
+    step = ds50[1] - ds50[0]
+    if step <= 0 or np.max( np.abs( np.diff( ds50 ) - step ) ) > 1e-10 :
+        return False
+    npts = ctypes.c_int( 0 )
+    # the harness may declare the output as double(*)[7] or as double*; both share out's memory
+    for arr in ( np.ctypeslib.as_ctypes( out ), out.ctypes.data_as( ctypes.POINTER( ctypes.c_double ) ) ):
+        try:
+            # 1 == TEME; step size is in minutes
+            rc = F( tleid, ds50[0], ds50[-1], step * 1440., 1, N, arr, npts )
+        except ( ctypes.ArgumentError, TypeError ):
+            continue
+        return rc == 0 and npts.value == N and np.max( np.abs( out[:,0] - ds50 ) ) < 1e-10
+    return False
+
+# -----------------------------------------------------------------------------------------------------
+def _alpha5( field : str ):
+    # alpha-5 satnos : A0001 -> 100001 (letters skip I and O)
+    field = field.strip()
+    if field and field[0].isalpha():
+        return ( 10 + 'ABCDEFGHJKLMNPQRSTUVWXYZ'.index( field[0].upper() ) ) * 10000 + int( field[1:] )
+    return int( field )
+
+# -----------------------------------------------------------------------------------------------------
+def _identity_from_lines( L1 : str ):
+    '''
+    what the DLL keys a satellite on (satno, epoch, ephemeris type), parsed from line 1
+    (token based, since hand-edited lines don't always respect the columns); None if we can't tell
+    '''
+    try:
+        tok    = L1.split()
+        satno  = _alpha5( tok[1].rstrip('UCS') if len( tok[1] ) > 5 else tok[1] )
+        epoch  = [ T for T in tok[2:5] if len( T.split('.')[0] ) == 5 and '.' in T ][0]
+        ephtyp = int( tok[-2] ) if len( tok[-2] ) == 1 else 0
+        return ( satno, round( float( time_constants.yyddd_to_ds50( float( epoch ) ) ), 8 ), ephtyp )
+    except Exception:
+        return None
+
+# -----------------------------------------------------------------------------------------------------
+def _identity_from_array( XA_TLE ):
+    try:
+        return ( int( XA_TLE['XA_TLE_SATNUM'] ), round( float( XA_TLE['XA_TLE_EPOCH'] ), 8 ), int( XA_TLE['XA_TLE_EPHTYPE'] ) )
+    except Exception:
+        return None
+
+# -----------------------------------------------------------------------------------------------------
+class SatRegistry:
+    '''
+    loaded / initialized satellites, keyed on their content (normalized TLE lines or XA_TLE values)
+
+    asking for the same TLE again hands back the satKey that is already loaded (no parse, no init);
+    at most `capacity` satellites are held and the least recently used ones are removed from the DLL
+    (TleRemoveSat / Sgp4RemoveSat).  Everything else loaded in the process is left alone.
+
+    The DLL only holds one satellite per (satno, epoch, type); loading new content with the same 
+    identity drops the old entry first.
+    '''
+    def __init__( self, INTERFACE, capacity : int = 512 ):
+        self.PA        = INTERFACE
+        self.capacity  = capacity
+        self.hits      = 0
+        self.misses    = 0
+        self.failed    = None            # 'load' / 'init' : why the last request gave back 0
+        self._entries  = OrderedDict()   # content -> [ satKey, identity, initialized ]
+        self._identity = {}              # identity -> content
+        self._content  = {}              # satKey -> content
+
+    def __len__( self ):
+        return len( self._entries )
+
+    def __contains__( self, content ):
+        return content in self._entries
+
+    def keys( self ):
+        return [ E[0] for E in self._entries.values() ]
+
+    # ------------------------------------------------------------------------------------------------
+    def _remove( self, content ):
+        key, ident, inited = self._entries.pop( content )
+        self._content.pop( key, None )
+        if ident is not None and self._identity.get( ident ) == content:
+            del self._identity[ ident ]
+        if inited:
+            self.PA.Sgp4PropDll.Sgp4RemoveSat( key )
+        self.PA.TleDll.TleRemoveSat( key )
+
+    def _load( self, content, identity, loader, init ):
+        self.failed = None
+        if content in self._entries:
+            self.hits += 1
+            self._entries.move_to_end( content )
+            E = self._entries[ content ]
+            if init and not E[2]:
+                # loaded earlier without init; if it won't init now, don't leave it behind
+                if self.PA.Sgp4PropDll.Sgp4InitSat( E[0] ) != 0:
+                    self._remove( content )
+                    self.failed = 'init'
+                    return 0
+                E[2] = True
+            return E[0]
+        self.misses += 1
+        # somebody else with the same identity is loaded; the DLL won't hold both
+        if identity is not None and identity in self._identity:
+            self._remove( self._identity[ identity ] )
+        key = loader()
+        if key <= 0:
+            self.failed = 'load'
+            return 0
+        if init and self.PA.Sgp4PropDll.Sgp4InitSat( key ) != 0:
+            self.PA.TleDll.TleRemoveSat( key )
+            self.failed = 'init'
+            return 0
+        self._entries[ content ] = [ key, identity, init ]
+        self._content[ key ]     = content
+        if identity is not None:
+            self._identity[ identity ] = content
+        while len( self._entries ) > self.capacity:
+            self._remove( next( iter( self._entries ) ) )
+        return key
+
+    # ------------------------------------------------------------------------------------------------
+    def lines_key( self, L1 : str, L2 : str, init=True ):
+        ''' satKey for a TLE given as lines (0 if it won't load / init) '''
+        content = ( 'lines', L1.strip(), L2.strip() )
+        return self._load( content, _identity_from_lines( L1 ), lambda : addTLE( L1, L2, self.PA ), init )
+
+    def array_key( self, XA_TLE, init=True ):
+        ''' satKey for an XA_TLE holder (0 if it won't load / init) '''
+        content = ( 'array', tuple( XA_TLE.data ) )
+        loader  = lambda : self.PA.TleDll.TleAddSatFrArray( XA_TLE.data, self.PA.Cstr('',512) )
+        return self._load( content, _identity_from_array( XA_TLE ), loader, init )
+
+    def content_of( self, satKey ):
+        ''' the content a satKey was loaded from (None if the registry didn't load it) '''
+        return self._content.get( satKey )
+
+    def discard_lines( self, L1 : str, L2 : str ):
+        ''' remove a TLE (by its lines) if we have it loaded '''
+        content = ( 'lines', L1.strip(), L2.strip() )
+        if content in self._entries:
+            self._remove( content )
+
+    def discard( self, satKey ):
+        ''' remove one satellite we handed out '''
+        content = self._content.get( satKey )
+        if content is not None:
+            self._remove( content )
+
+    def clear( self ):
+        ''' remove every satellite the registry loaded '''
+        while self._entries:
+            self._remove( next( iter( self._entries ) ) )
+
+    def forget( self ):
+        ''' the DLL was cleared behind our back (TleRemoveAllSats); drop the bookkeeping only '''
+        self._entries.clear()
+        self._identity.clear()
+        self._content.clear()
+
+# one registry per harness
+_REGISTRIES = {}
+
+# -----------------------------------------------------------------------------------------------------
+def get_registry( INTERFACE, capacity : int = None ):
+    R = _REGISTRIES.get( id( INTERFACE ) )
+    if R is None:
+        R = _REGISTRIES[ id( INTERFACE ) ] = SatRegistry( INTERFACE )
+    if capacity is not None:
+        R.capacity = capacity
+    return R
+
+# -----------------------------------------------------------------------------------------------------
+def clearAll( INTERFACE ):
+    ''' remove every satellite from the DLL (and tell the registry) '''
+    INTERFACE.TleDll.TleRemoveAllSats()
+    INTERFACE.Sgp4PropDll.Sgp4RemoveAllSats()
+    get_registry( INTERFACE ).forget()
+
+# -----------------------------------------------------------------------------------------------------
+def _cache_key( lines, ds50 ):
+    ''' ephem_cache key for a TLE's (line1, line2) on a grid (None without lines, or if the cache is off) '''
+    if lines is None or ephem_cache.get() is None:
+        return None
+    return ephem_cache.make_key( lines[0], lines[1], ds50, 'teme' )
+
+# -----------------------------------------------------------------------------------------------------
+def propTLEToDS50s( tleid, ds50_l : list[ float ], INTERFACE, out=None, lines=None ):
     '''
     take a tleID; it must be initialized and ready to go
 
     take a list of ds50 UTC values (dates in AstroStandard epoch) 
     and return <ds50><teme_pos (3)><teme_vel (3)>
+
+    out : optional preallocated (N,7) float64 C-contiguous array to fill (and return)
+
+    the loop does no per-point numpy work: the DLL writes into one 6-double buffer that is copied 
+    straight into the output row with memmove.  Evenly spaced times go through Sgp4GenEphems 
+    when the installed library has it.
+
+    lines : ( line1, line2 ) the satKey was loaded from.  With ephem_cache enabled the block is 
+            looked up on disk under them first (propTLE_df etc. pass them); a hit comes back as a 
+            read-only memmap (copied only if you passed `out`).  Without lines there is no caching :
+            a satKey alone doesn't say what is loaded (the DLL re-uses ids).
     '''
-    # data holders for OUTPUT
-    pos  = (INTERFACE.ctypes.c_double * 3)()
-    vel  = (INTERFACE.ctypes.c_double * 3)()
+    ds50   = np.ascontiguousarray( ds50_l, dtype=np.float64 )
+    N      = ds50.shape[0]
+    key    = _cache_key( lines, ds50 )
+    if key is not None:
+        hit = ephem_cache.get().load( key )
+        if hit is not None and hit.shape == (N, 7):
+            if out is None:
+                return hit
+            out[:] = hit
+            return out
+    if out is None:
+        out = np.empty( (N, 7), dtype=np.float64 )
+    assert out.shape == (N, 7) and out.dtype == np.float64 and out.flags['C_CONTIGUOUS']
+
+    if _genEphems( tleid, ds50, out, INTERFACE ):
+        out[:,0] = ds50
+    else:
+        _propLoop( tleid, ds50, out, INTERFACE )
+    if key is not None:
+        ephem_cache.get().store( key, out )
+    return out
+
+# -----------------------------------------------------------------------------------------------------
+def _propLoop( tleid, ds50, out, INTERFACE ):
+    ctypes = INTERFACE.ctypes
+
+    # data holders for OUTPUT (pos and vel back to back, so one copy per point)
+    buf  = (ctypes.c_double * 6)()
+    pos  = (ctypes.c_double * 3).from_buffer( buf, 0 )
+    vel  = (ctypes.c_double * 3).from_buffer( buf, 3 * ctypes.sizeof( ctypes.c_double ) )
+    prop = INTERFACE.Sgp4PropDll.Sgp4PropDs50UtcPosVel
+    move = ctypes.memmove
+    src  = ctypes.addressof( buf )
+    base = out.ctypes.data + ctypes.sizeof( ctypes.c_double )
+    row  = 7 * ctypes.sizeof( ctypes.c_double )
+    nb   = 6 * ctypes.sizeof( ctypes.c_double )
+    out[:,0] = ds50
+    for i, dsutc in enumerate( ds50.tolist() ):
+        prop( tleid, dsutc, pos, vel )
+        move( base + i * row, src, nb )
 
-    def propToDS50( dsutc ):
-        INTERFACE.Sgp4PropDll.Sgp4PropDs50UtcPosVel( tleid, dsutc, pos, vel )
-        return np.hstack( (dsutc, np.array(pos), np.array(vel) ) )
-    return np.vstack( [propToDS50(X) for X in ds50_l ] ) 
+# -----------------------------------------------------------------------------------------------------
+OUTPUTS = ( 'teme', 'llh', 'efg' )
+
+# -----------------------------------------------------------------------------------------------------
+def propTLEToDS50s_outputs( tleid, 
+                            ds50_l, 
+                            INTERFACE, 
+                            outputs = ( 'teme', 'llh' ),
+                            theta = None ):
+    '''
+    like propTLEToDS50s, but one Sgp4PropDs50UTC call per point gives TEME pos / vel *and* LLH, 
+    copied into one preallocated (N,9) block; EFG is rotated from TEME with numpy (theta comes from
+    the time constants unless you pass it, e.g. a time frame's 'theta' column)
+
+    returns { 'teme' : (N,6), 'llh' : (N,3) lat / lon (deg) / height (km), 'efg' : (N,6) } for the 
+    requested outputs
+    '''
+    assert set( outputs ) <= set( OUTPUTS )
+    ctypes = INTERFACE.ctypes
+    ds50   = np.ascontiguousarray( ds50_l, dtype=np.float64 )
+    N      = ds50.shape[0]
+    out    = np.empty( (N, 9), dtype=np.float64 )
+    dsz    = ctypes.sizeof( ctypes.c_double )
+    buf    = (ctypes.c_double * 9)()
+    pos    = (ctypes.c_double * 3).from_buffer( buf, 0 )
+    vel    = (ctypes.c_double * 3).from_buffer( buf, 3 * dsz )
+    llh    = (ctypes.c_double * 3).from_buffer( buf, 6 * dsz )
+    mse    = ctypes.c_double()
+    prop   = INTERFACE.Sgp4PropDll.Sgp4PropDs50UTC
+    move   = ctypes.memmove
+    src    = ctypes.addressof( buf )
+    base   = out.ctypes.data
+    for i, dsutc in enumerate( ds50.tolist() ):
+        prop( tleid, dsutc, mse, pos, vel, llh )
+        move( base + i * 9 * dsz, src, 9 * dsz )
+
+    rv = {}
+    if 'teme' in outputs:
+        rv['teme'] = out[:,:6]
+    if 'llh' in outputs:
+        rv['llh']  = out[:,6:]
+    if 'efg' in outputs:
+        if theta is None:
+            theta = astro_time.theta_from_utc( ds50, INTERFACE )
+        rv['efg']  = np.hstack( coordinates.teme_efg_rotate( np.asarray( theta ), out[:,:3], out[:,3:6] ) )
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def _set_outputs( rv : pd.DataFrame, res : dict ):
+    ''' the usual column names : teme_p / teme_v, lat / lon / height, efg_p / efg_v '''
+    if 'teme' in res:
+        rv['teme_p'] = res['teme'][:,:3].tolist()
+        rv['teme_v'] = res['teme'][:,3:].tolist()
+    if 'llh' in res:
+        rv['lat']    = res['llh'][:,0]
+        rv['lon']    = res['llh'][:,1]
+        rv['height'] = res['llh'][:,2]
+    if 'efg' in res:
+        rv['efg_p']  = res['efg'][:,:3].tolist()
+        rv['efg_v']  = res['efg'][:,3:].tolist()
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def _propagate_into( rv, tleid, INTERFACE, outputs, lines=None ):
+    if outputs is None:
+        eph = propTLEToDS50s( tleid, rv['ds50_utc'] , INTERFACE, lines=lines )
+        rv['teme_p'] = eph[:,1:4].tolist()
+        rv['teme_v'] = eph[:,4:7].tolist()
+        return rv
+    theta = rv['theta'].values if 'theta' in rv else None
+    return _set_outputs( rv, propTLEToDS50s_outputs( tleid, rv['ds50_utc'].values, INTERFACE, outputs, theta ) )
 
 # -----------------------------------------------------------------------------------------------------
 def propTLE_byID_df( tleid, 
                 tle_df,
                 INTERFACE,
-                clear_all = True ):
+                clear_all = True,
+                outputs = None ):
     '''
     this function assumes that your TLE has already been loaded into the AstroStandards
     pass in the ID.  This is useful when you're modifying a TLE via the array, or you
     don't want to parse and re-parse
+
+    tle_df can be a frame from astro_time.convert_times or an astro_time.TimeGrid
+    outputs : e.g. [ 'teme', 'llh', 'efg' ] to fill those columns from the same propagation pass
+              (see propTLEToDS50s_outputs); None is teme_p / teme_v only
     '''
+    tle_df = astro_time.time_frame( tle_df )
     assert initTLE( tleid, INTERFACE ) 
-    eph   = propTLEToDS50s( tleid, tle_df['ds50_utc'] , INTERFACE )
-    tle_df['teme_p'] = eph[:,1:4].tolist()
-    tle_df['teme_v'] = eph[:,4:7].tolist()
-    return tle_df 
+    return _propagate_into( tle_df, tleid, INTERFACE, outputs )
 
 
 # -----------------------------------------------------------------------------------------------------
@@ -64,20 +383,468 @@ def propTLE_df( dates : pd.DataFrame,
                 line1 : str,
                 line2 : str,
                 INTERFACE,
-                clear_all = True ):
+                clear_all = False,
+                outputs = None ):
+    '''
+    propagate a TLE (from lines) to the times in `dates` (a convert_times frame or an 
+    astro_time.TimeGrid) and annotate with teme_p / teme_v
+
+    the TLE is loaded through the registry (see SatRegistry), so propagating the same lines again
+    skips the parse / init and other loaded satellites are left alone; clear_all=True empties the 
+    DLL first (the old behavior)
 
+    outputs : e.g. [ 'teme', 'llh' ] to also get lat / lon / height (and / or efg_p / efg_v) from 
+              the same propagation pass, instead of a TEME_to_LLH pass afterwards
+    '''
     if clear_all :
-        INTERFACE.TleDll.TleRemoveAllSats()
-        INTERFACE.Sgp4PropDll.Sgp4RemoveAllSats()
+        clearAll( INTERFACE )
+
+    # add the TLE and init it (or pick up the one that is already loaded)
+    tleid = get_registry( INTERFACE ).lines_key( line1, line2 )
+    assert tleid > 0
+
+    rv    = astro_time.time_frame( dates )
+    return _propagate_into( rv, tleid, INTERFACE, outputs, ( line1, line2 ) )
+
+# -----------------------------------------------------------------------------------------------------
+def propTLE_ephemeris( dates,
+                       line1 : str,
+                       line2 : str,
+                       INTERFACE,
+                       outputs = None,
+                       dtype = np.float64 ):
+    '''
+    propTLE_df, but the result is an ephemeris.Ephemeris : (N,3) arrays for teme_p / teme_v (and 
+    efg_p / efg_v, lat / lon / height if asked for in `outputs`) instead of list cells.
+    dtype=np.float32 halves the vectors again.  .to_pandas() gives the propTLE_df frame.
+    '''
+    tleid = get_registry( INTERFACE ).lines_key( line1, line2 )
+    assert tleid > 0
+    ds50  = ds50_from_dates( dates )
+    if outputs is None:
+        return Ephemeris.from_propagation( dates, propTLEToDS50s( tleid, ds50, INTERFACE, lines=( line1, line2 ) ), dtype )
+    theta = dates['theta'].values if isinstance( dates, pd.DataFrame ) and 'theta' in dates else None
+    res   = propTLEToDS50s_outputs( tleid, ds50, INTERFACE, outputs, theta )
+    rv    = Ephemeris.from_times( dates, dtype )
+    for name, block in res.items():
+        if name == 'llh':
+            rv['lat'], rv['lon'], rv['height'] = block.T.copy()
+        else:
+            rv[ name + '_p' ] = block[:,:3].astype( dtype )
+            rv[ name + '_v' ] = block[:,3:].astype( dtype )
+    return rv
 
-    # add the TLE and init it
-    tleid = addTLE( line1, line2, INTERFACE )    
-    assert initTLE( tleid , INTERFACE )
+# -----------------------------------------------------------------------------------------------------
+def propTLE_chunks( line1 : str,
+                    line2 : str,
+                    INTERFACE,
+                    start = None,
+                    end   = None,
+                    freq  = None,
+                    dates = None,
+                    chunk_size : int = 50000,
+                    frame : str  = None,
+                    outputs = None ):
+    '''
+    generator version of propTLE_df for long spans : yields frames of at most `chunk_size` rows 
+    (time conversion, then propagation, then the optional frame conversion, one block at a time) so
+    memory depends on the chunk size and not on the span
+
+    the times are either a range (start, end, freq; never built in full) or `dates` (any list of 
+    datetimes; converted a block at a time)
+    frame : None (teme_p / teme_v only), 'J2K' (adds j2k_p / j2k_v) or 'EFG' (adds efg_p / efg_v)
+    outputs : as for propTLE_df (e.g. [ 'teme', 'llh' ]); filled from the one propagation pass
+
+    e.g. stream straight to disk
+        with open( 'eph.txt', 'w' ) as F:
+            ccsds.writeCCSDS( propTLE_chunks( L1, L2, PA, start, end, '10s', frame='J2K' ), F )
+    '''
+    assert frame in ( None, 'J2K', 'EFG' )
+    if dates is not None:
+        blocks = ( dates[ S:S + chunk_size ] for S in range( 0, len( dates ), chunk_size ) )
+    else:
+        blocks = astro_time.iter_date_range( start, end, freq, chunk_size )
+
+    tleid = get_registry( INTERFACE ).lines_key( line1, line2 )
+    assert tleid > 0
+    buf   = np.empty( ( chunk_size, 7 ) )
+    for B in blocks:
+        rv  = astro_time.convert_times( B, INTERFACE )
+        if outputs is None:
+            eph = propTLEToDS50s( tleid, rv['ds50_utc'].values, INTERFACE, out=buf[ :rv.shape[0] ], lines=( line1, line2 ) )
+            rv['teme_p'] = eph[:,1:4].tolist()
+            rv['teme_v'] = eph[:,4:7].tolist()
+        else:
+            rv  = _propagate_into( rv, tleid, INTERFACE, outputs )
+        if frame == 'J2K':
+            rv = coordinates.TEME_to_J2K( rv, INTERFACE )
+        elif frame == 'EFG':
+            rv = coordinates.TEME_to_EFG( rv, INTERFACE )
+        yield rv
+
+# =====================================================================================================
+# Hermite ephemeris mode : propagate on a coarse grid, evaluate the dense grid by cubic Hermite 
+# interpolation of position and velocity.  The interpolation error of a cubic Hermite segment is
+#     s^2 (1-s)^2 h^4 / 24 * |d4r/dt4|   (s in [0,1] across the segment)
+# which peaks at the segment midpoint; for a Kepler orbit |d4r/dt4| ~ n^4 a, taken at perigee.
+# SGP4 velocities are not quite the derivative of its positions; that part of the error is 
+# antisymmetric across a segment (zero at the midpoint, largest near s = 1/3), so the check points
+# sit at s = 1/3 where both parts show up.
+# =====================================================================================================
+MU_EARTH = 398600.4418   # km^3 / s^2
 
-    eph   = propTLEToDS50s( tleid, dates['ds50_utc'] , INTERFACE )
-    rv    = dates
+# -----------------------------------------------------------------------------------------------------
+def tle_mean_motion( line2 : str ):
+    ''' ( mean motion (rev/day), eccentricity ) from the fixed columns of line 2 '''
+    return float( line2[52:63] ), float( '0.' + line2[26:33].strip() )
+
+# -----------------------------------------------------------------------------------------------------
+def hermite_step( mean_motion : float, ecc : float = 0., tol_km : float = 1e-3, safety : float = 2. ):
+    '''
+    coarse step (seconds) for a target interpolation error (with the same safety factor the check
+    in propTLEToDS50s_hermite uses); uses the perigee rate / radius so eccentric orbits get the step
+    they need near perigee.  Never more than 1/16 of a period.
+    '''
+    n     = mean_motion * 2 * np.pi / 86400.
+    a     = ( MU_EARTH / n**2 ) ** ( 1/3 )
+    rp    = a * ( 1 - ecc )
+    n_p   = np.sqrt( MU_EARTH / rp**3 )   # angular scale of the motion at perigee
+    h     = ( 384. * tol_km / ( safety * n_p**4 * rp ) ) ** 0.25
+    return float( min( h, 2 * np.pi / n / 16. ) )
+
+# -----------------------------------------------------------------------------------------------------
+def hermite_interp( t_c : np.ndarray, P : np.ndarray, V : np.ndarray, t : np.ndarray ):
+    '''
+    cubic Hermite interpolation of position / velocity (P, V (N,3), velocity per unit of t) from 
+    knots t_c to times t; returns ( pos, vel ) at t
+    '''
+    idx = np.clip( np.searchsorted( t_c, t, side='right' ) - 1, 0, t_c.shape[0] - 2 )
+    h   = ( t_c[ idx + 1 ] - t_c[ idx ] )[:,None]
+    s   = ( t - t_c[ idx ] )[:,None] / h
+    s2, s3 = s * s, s * s * s
+    P0, P1, V0, V1 = P[ idx ], P[ idx + 1 ], V[ idx ], V[ idx + 1 ]
+    pos = ( 2*s3 - 3*s2 + 1 ) * P0 + ( s3 - 2*s2 + s ) * h * V0 + ( -2*s3 + 3*s2 ) * P1 + ( s3 - s2 ) * h * V1
+    vel = ( 6*s2 - 6*s ) / h * ( P0 - P1 ) + ( 3*s2 - 4*s + 1 ) * V0 + ( 3*s2 - 2*s ) * V1
+    return pos, vel
+
+# -----------------------------------------------------------------------------------------------------
+def propTLEToDS50s_hermite( tleid, 
+                            ds50_l, 
+                            INTERFACE, 
+                            step : float,
+                            tol_km : float = 1e-3,
+                            safety : float = 2.,
+                            max_halvings : int = 6 ):
+    '''
+    propTLEToDS50s (same (N,7) output) for dense grids : propagate every `step` seconds and Hermite
+    interpolate in between.
+
+    The bound is checked, not assumed : every coarse segment that holds output points is also 
+    propagated directly a third of the way across and compared.  If safety * (worst check error) 
+    is over tol_km the step is halved and we try again.
+
+    returns ( out, info ) with info = { step_s, pos_bound_km, vel_bound_kms, dll_calls, direct_calls }
+    '''
+    ds50  = np.ascontiguousarray( ds50_l, dtype=np.float64 )
+    N     = ds50.shape[0]
+    t     = ( ds50 - ds50[0] ) * 86400. if N else ds50
+    span  = t[-1] if N else 0.
+    info  = { 'step_s' : step, 'pos_bound_km' : 0., 'vel_bound_kms' : 0., 'dll_calls' : N, 'direct_calls' : N }
+    for i in range( max_halvings + 1 ):
+        n_c = int( np.ceil( span / step ) ) + 1
+        # not worth it (or not possible) : just propagate (exact, whatever an earlier try measured)
+        if N < 4 or 2 * n_c >= N or not np.all( np.diff( t ) >= 0 ):
+            return propTLEToDS50s( tleid, ds50, INTERFACE ), dict( info, dll_calls=N, pos_bound_km=0., vel_bound_kms=0. )
+        t_c   = np.linspace( 0., span, n_c )
+        knots = propTLEToDS50s( tleid, ds50[0] + t_c / 86400., INTERFACE )
+        # check points in the segments that are used
+        seg   = np.unique( np.clip( np.searchsorted( t_c, t, side='right' ) - 1, 0, n_c - 2 ) )
+        t_m   = ( 2 * t_c[ seg ] + t_c[ seg + 1 ] ) / 3.
+        mid   = propTLEToDS50s( tleid, ds50[0] + t_m / 86400., INTERFACE )
+        P, V  = hermite_interp( t_c, knots[:,1:4], knots[:,4:7], t_m )
+        perr  = safety * np.max( np.linalg.norm( P - mid[:,1:4], axis=1 ) )
+        verr  = safety * np.max( np.linalg.norm( V - mid[:,4:7], axis=1 ) )
+        info  = { 'step_s' : step, 'pos_bound_km' : perr, 'vel_bound_kms' : verr, 
+                  'dll_calls' : n_c + t_m.shape[0], 'direct_calls' : N }
+        if perr <= tol_km:
+            break
+        step /= 2.
+    else:
+        # never got inside the tolerance; don't hand back something we can't vouch for
+        return propTLEToDS50s( tleid, ds50, INTERFACE ), dict( info, dll_calls=N, pos_bound_km=0., vel_bound_kms=0. )
+    out      = np.empty( (N, 7) )
+    out[:,0] = ds50
+    out[:,1:4], out[:,4:7] = hermite_interp( t_c, knots[:,1:4], knots[:,4:7], t )
+    return out, info
+
+# -----------------------------------------------------------------------------------------------------
+def propTLE_hermite_df( dates, 
+                        line1 : str,
+                        line2 : str,
+                        INTERFACE,
+                        tol_km : float = 1e-3,
+                        step : float = None ):
+    '''
+    propTLE_df for dense grids (e.g. 1 Hz pointing tables) : coarse propagation + Hermite 
+    interpolation.  The coarse step comes from the mean motion / eccentricity (hermite_step) unless
+    given; the checked error bound and call counts end up in rv.attrs['hermite']
+    '''
+    tleid = get_registry( INTERFACE ).lines_key( line1, line2 )
+    assert tleid > 0
+    if step is None:
+        step = hermite_step( *tle_mean_motion( line2 ), tol_km=tol_km )
+    rv        = astro_time.time_frame( dates )
+    eph, info = propTLEToDS50s_hermite( tleid, rv['ds50_utc'].values, INTERFACE, step, tol_km=tol_km )
     rv['teme_p'] = eph[:,1:4].tolist()
     rv['teme_v'] = eph[:,4:7].tolist()
+    rv.attrs['hermite'] = info
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def adaptive_ds50( tleid,
+                   start,
+                   end,
+                   INTERFACE,
+                   step : float,
+                   tol_km : float = 1e-3,
+                   min_step : float = 1.,
+                   safety : float = 2. ):
+    '''
+    place samples between start and end (datetimes) so that Hermite interpolation between neighbors
+    stays inside tol_km : start every `step` seconds, check each segment against direct propagation 
+    a third of the way across (see propTLEToDS50s_hermite), split the segments that miss, repeat.
+    Knots sit on whole milliseconds so they survive the trip through datetimes.
+
+    returns ( datetime64[ms] knots, (N,7) ephemeris at the knots, worst checked error (km) )
+    '''
+    t0, t1 = astro_time.to_datetime64( [ start, end ] ).astype( 'datetime64[ms]' )
+    span  = int( ( t1 - t0 ).astype( np.int64 ) )
+    ms    = np.unique( np.append( np.arange( 0, span, max( int( step * 1000 ), 1 ) ), span ) )
+    to_ds50 = lambda X : astro_time.datetime64_to_ds50( t0 + X.astype( 'timedelta64[ms]' ) )
+    eph   = propTLEToDS50s( tleid, to_ds50( ms ), INTERFACE )
+    todo  = np.arange( ms.shape[0] - 1 )          # segments (by left knot index) still to check
+    worst = 0.
+    while todo.shape[0]:
+        left, right = ms[ todo ], ms[ todo + 1 ]
+        chk   = ( 2 * left + right ) // 3
+        ref   = propTLEToDS50s( tleid, to_ds50( chk ), INTERFACE )
+        P, V  = hermite_interp( ms / 1000., eph[:,1:4], eph[:,4:7], chk / 1000. )
+        err   = safety * np.linalg.norm( P - ref[:,1:4], axis=1 )
+        split = ( err > tol_km ) & ( right - left >= 2 * min_step * 1000 )
+        worst = max( worst, float( np.max( err[ ~split ], initial=0. ) ) )
+        if not np.any( split ):
+            break
+        mid   = ( left[ split ] + right[ split ] ) // 2
+        new   = propTLEToDS50s( tleid, to_ds50( mid ), INTERFACE )
+        ms    = np.concatenate( ( ms, mid ) )
+        eph   = np.vstack( ( eph, new ) )
+        order = np.argsort( ms, kind='stable' )
+        ms, eph = ms[ order ], eph[ order ]
+        # both halves of every split segment get checked again
+        pos   = np.searchsorted( ms, mid )
+        todo  = np.unique( np.concatenate( ( pos - 1, pos ) ) )
+    return t0 + ms.astype( 'timedelta64[ms]' ), eph, worst
+
+# -----------------------------------------------------------------------------------------------------
+def propTLE_adaptive_df( line1 : str,
+                         line2 : str,
+                         start,
+                         end,
+                         INTERFACE,
+                         tol_km : float = 1e-3,
+                         min_step : float = 1. ):
+    '''
+    an ephemeris with samples placed for a target interpolation error instead of one freq for every
+    orbit (a GEO needs far fewer points than a LEO; a HEO needs them bunched at perigee).
+
+    returns a convert_times frame on the irregular grid with teme_p / teme_v (so it goes straight 
+    into ephem_fitter.set_ephemeris, or coordinates.TEME_to_J2K + ccsds.toCCSDS); the checked bound 
+    is in rv.attrs['adaptive'].  Use interpolate_ephemeris to get back onto any other grid.
+    '''
+    tleid = get_registry( INTERFACE ).lines_key( line1, line2 )
+    assert tleid > 0
+    step  = hermite_step( *tle_mean_motion( line2 ), tol_km=tol_km )
+    # start at the apogee step (a HEO would otherwise be sampled everywhere at its perigee rate)
+    n, e  = tle_mean_motion( line2 )
+    step  = max( step, min( step * ( ( 1 + e ) / max( 1 - e, 1e-6 ) ) ** 1.5, 2 * np.pi / ( n * 2 * np.pi / 86400. ) / 16. ) )
+    knots, eph, worst = adaptive_ds50( tleid, start, end, INTERFACE, step, tol_km=tol_km, min_step=min_step )
+    rv    = astro_time.convert_times( pd.DatetimeIndex( knots ), INTERFACE )
+    rv['teme_p'] = eph[:,1:4].tolist()
+    rv['teme_v'] = eph[:,4:7].tolist()
+    rv.attrs['adaptive'] = { 'tol_km' : tol_km, 'bound_km' : worst, 'points' : rv.shape[0] }
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def interpolate_ephemeris( eph_df : pd.DataFrame, dates ):
+    '''
+    Hermite interpolate an ephemeris frame (ds50_utc, teme_p, teme_v; e.g. from propTLE_adaptive_df)
+    onto `dates` (a convert_times frame or TimeGrid); returns that frame with teme_p / teme_v set
+    '''
+    rv  = astro_time.time_frame( dates )
+    t_k = ( eph_df['ds50_utc'].values - eph_df['ds50_utc'].values[0] ) * 86400.
+    t   = ( rv['ds50_utc'].values - eph_df['ds50_utc'].values[0] ) * 86400.
+    P, V = hermite_interp( t_k, np.vstack( eph_df['teme_p'] ), np.vstack( eph_df['teme_v'] ), t )
+    rv['teme_p'] = P.tolist()
+    rv['teme_v'] = V.tolist()
+    return rv
+
+# -----------------------------------------------------------------------------------------------------
+def ds50_from_dates( dates ):
+    ''' ds50 UTC array from a convert_times frame, an astro_time.TimeGrid, or anything array-like '''
+    if isinstance( dates, astro_time.TimeGrid ):
+        return dates.ds50_utc
+    if isinstance( dates, pd.DataFrame ):
+        return dates['ds50_utc'].values
+    return np.asarray( dates, dtype=np.float64 )
+
+# -----------------------------------------------------------------------------------------------------
+def _lastError( INTERFACE ):
+    try:
+        return INTERFACE.get_last_errmsg()
+    except Exception:
+        return 'unknown error'
+
+# -----------------------------------------------------------------------------------------------------
+def propagate_catalog( lines_list : list[ tuple[ str, str ] ],
+                       dates,
+                       INTERFACE,
+                       engine : str = 'dll' ):
+    '''
+    propagate many TLEs onto one common time grid
+
+    lines_list : [ (line1, line2), ... ]
+    dates      : convert_times frame, astro_time.TimeGrid, or ds50 UTC array
+    engine     : 'dll' (Sgp4PropDll, one call per point) or 'numpy' (sgp4_numpy for type 0 / 2 
+                 element sets, all at once; type 4 still goes through the DLL)
+
+    every TLE goes through the registry (see SatRegistry) : one already loaded is re-used, one that 
+    fails to init is removed again, and nothing else already loaded is cleared.  The registry's 
+    capacity is raised to the catalog size if it is smaller, so every returned key stays loaded 
+    (older satellites the registry held may be evicted to make room).  Returns
+        satKeys : (N_sat,) int64 (0 where the TLE failed to load / init, -1 where numpy did the work)
+        eph     : (N_sat, N_time, 6) TEME pos / vel (NaN rows for failures)
+        errors  : { index : message } for every TLE that failed
+    '''
+    assert engine in ( 'dll', 'numpy' )
+    ds50    = np.ascontiguousarray( ds50_from_dates( dates ), dtype=np.float64 )
+    N_sat   = len( lines_list )
+    satKeys = np.zeros( N_sat, dtype=np.int64 )
+    eph     = np.full( (N_sat, ds50.shape[0], 6), np.nan )
+    errors  = {}
+
+    todo    = range( N_sat )
+    if engine == 'numpy':
+        from . import sgp4_numpy
+        E, idx, skipped = sgp4_numpy.Sgp4Elements.from_lines( lines_list, INTERFACE )
+        if E is not None:
+            eph[ idx ], _  = E.propagate( ds50 )
+            satKeys[ idx ] = -1
+        # type 4 (and anything that didn't parse) : the DLL does it, and reports its own errors
+        todo = sorted( skipped )
+
+    # the catalog has to fit, or the first keys would be evicted before we hand them back
+    R   = get_registry( INTERFACE )
+    R.capacity = max( R.capacity, len( todo ) )
+
+    # load, init and fill the cube one satellite at a time (one scratch buffer re-used for all)
+    buf = np.empty( (ds50.shape[0], 7) )
+    for i in todo:
+        L1, L2 = lines_list[ i ]
+        key = R.lines_key( L1, L2 )
+        if key <= 0 :
+            errors[ i ] = '{} failed : {}'.format( R.failed, _lastError( INTERFACE ) )
+            continue
+        satKeys[ i ] = key
+        propTLEToDS50s( key, ds50, INTERFACE, out=buf, lines=( L1, L2 ) )
+        eph[ i ] = buf[:,1:]
+    return satKeys, eph, errors
+
+# -----------------------------------------------------------------------------------------------------
+def assign_tles( epochs : np.ndarray, ds50 : np.ndarray, rule : str = 'midpoint' ):
+    '''
+    index (into epochs) of the TLE that serves each ds50 time
+
+    rule : 'midpoint' (nearest epoch; switch half-way between epochs) or 'forward' (latest epoch at
+           or before the time; times before the first epoch use the first TLE)
+
+    repeated epochs go to the one later in the list (a re-issue supersedes)
+    '''
+    assert rule in ( 'midpoint', 'forward' )
+    epochs = np.asarray( epochs, dtype=np.float64 )
+    order  = np.argsort( epochs, kind='stable' )
+    E      = epochs[ order ]
+    if rule == 'forward':
+        idx = np.searchsorted( E, ds50, side='right' ) - 1
+    else:
+        idx = np.searchsorted( ( E[1:] + E[:-1] ) / 2., ds50, side='right' )
+    idx = np.clip( idx, 0, E.shape[0] - 1 )
+    # last of any run of equal epochs
+    return order[ np.searchsorted( E, E[ idx ], side='right' ) - 1 ]
+
+# -----------------------------------------------------------------------------------------------------
+def propTLE_stitched( lines_list : list[ tuple[ str, str ] ],
+                      dates,
+                      INTERFACE,
+                      rule : str = 'midpoint' ):
+    '''
+    one continuous ephemeris from a TLE history : every time is served by one TLE of the list
+    (see assign_tles for the rules) and each TLE propagates its own times in one bulk call
+
+    returns
+        eph    : (N_time, 8) <ds50><teme_pos (3)><teme_vel (3)><index into lines_list>
+        errors : { index : message } for TLEs that didn't load (they serve no rows)
+    '''
+    ds50    = np.ascontiguousarray( ds50_from_dates( dates ), dtype=np.float64 )
+    R       = get_registry( INTERFACE )
+    errors  = {}
+    epochs  = {}
+    for i, ( L1, L2 ) in enumerate( lines_list ):
+        ident = _identity_from_lines( L1 )
+        if ident is None:
+            errors[ i ] = 'could not read the epoch from line 1'
+            continue
+        epochs[ i ] = ident[1]
+
+    out       = np.full( ( ds50.shape[0], 8 ), np.nan )
+    out[:,0]  = ds50
+    served    = np.full( ds50.shape[0], -1 )
+    if epochs:
+        usable = np.array( sorted( epochs ) )
+        served = usable[ assign_tles( [ epochs[i] for i in usable ], ds50, rule ) ]
+    # a TLE that won't load hands its rows to whoever serves them once it is out of the history
+    pending = np.unique( served[ served >= 0 ] ).tolist()
+    while pending:
+        i     = pending.pop( 0 )
+        rows  = np.flatnonzero( served == i )
+        key   = R.lines_key( *lines_list[ i ] )
+        if key <= 0:
+            errors[ i ] = 'load / init failed : {}'.format( _lastError( INTERFACE ) )
+            del epochs[ i ]
+            if not epochs:
+                break
+            usable = np.array( sorted( epochs ) )
+            served[ rows ] = usable[ assign_tles( [ epochs[j] for j in usable ], ds50[ rows ], rule ) ]
+            pending = np.unique( np.append( pending, served[ rows ] ) ).astype( int ).tolist()
+            continue
+        out[ rows, 1:7 ] = propTLEToDS50s( key, ds50[ rows ], INTERFACE, lines=lines_list[ i ] )[:,1:]
+        out[ rows, 7 ]   = i
+    return out, errors
+
+# -----------------------------------------------------------------------------------------------------
+def propTLE_stitched_df( lines_list : list[ tuple[ str, str ] ],
+                         dates,
+                         INTERFACE,
+                         rule : str = 'midpoint' ):
+    '''
+    propTLE_stitched as a frame : `dates` (convert_times frame or TimeGrid) with teme_p / teme_v and
+    tle_index (which entry of lines_list served the row; -1 if none could); errors in attrs['stitched']
+    '''
+    rv          = astro_time.time_frame( dates )
+    eph, errors = propTLE_stitched( lines_list, rv, INTERFACE, rule )
+    rv['teme_p']    = eph[:,1:4].tolist()
+    rv['teme_v']    = eph[:,4:7].tolist()
+    rv['tle_index'] = np.where( np.isnan( eph[:,7] ), -1, eph[:,7] ).astype( int )
+    rv.attrs['stitched'] = { 'rule' : rule, 'errors' : errors }
     return rv
 
 # -----------------------------------------------------------------------------------------------------
@@ -115,6 +882,73 @@ def test():
     print('Fake type 4 test :\n\t{}\n\t{}'.format(nL1,nL2))
     print( propTLE_byID_df( testID, testout, PA ) )
 
+    # whole catalog onto one grid; a bad TLE is reported, not fatal
+    clearAll( PA )
+    catalog = [ (L1, L2), (nL1, nL2), ('1 garbage', '2 garbage') ]
+    keys, eph, errors = propagate_catalog( catalog, time_df, PA )
+    print('-'*100)
+    print('Catalog test : keys {} cube {} errors {}'.format( keys, eph.shape, errors ) )
+    assert 2 in errors and keys[0] > 0
+    single = propTLE_df( time_df.copy(), L1, L2, PA )
+    assert np.max( np.abs( eph[0,:,:3] - np.vstack( single['teme_p'] ) ) ) < 1e-9
+
+    # the registry hands back the loaded satellite the second time around
+    R = get_registry( PA )
+    propTLE_df( time_df.copy(), L1, L2, PA )
+    print('Registry : {} loaded, {} hits, {} misses'.format( len(R), R.hits, R.misses ) )
+    assert R.hits >= 1
+
+    # chunked propagation gives the same answer as one big call
+    chunks = list( propTLE_chunks( L1, L2, PA, dates=dates, chunk_size=100 ) )
+    assert len( chunks ) == int( np.ceil( len(dates) / 100 ) )
+    whole  = np.vstack( pd.concat( chunks )['teme_p'] )
+    assert np.max( np.abs( whole - np.vstack( testout['teme_p'] ) ) ) < 1e-9
+    assert sum( C.shape[0] for C in propTLE_chunks( L1, L2, PA, dates[0], dates[-1], '5min', chunk_size=7 ) ) == len(dates)
+
+    # Hermite mode on a 1 Hz grid : inside its bound, with far fewer DLL calls
+    dense   = astro_time.convert_times( pd.date_range( dates[0], dates[0] + timedelta(hours=2), freq='1s' ), PA )
+    interp  = propTLE_hermite_df( dense.copy(), L1, L2, PA, tol_km=1e-3 )
+    direct  = propTLE_df( dense.copy(), L1, L2, PA )
+    info    = interp.attrs['hermite']
+    err     = np.max( np.linalg.norm( np.vstack( interp['teme_p'] ) - np.vstack( direct['teme_p'] ), axis=1 ) )
+    print('Hermite : step {:.1f} s, bound {:.2e} km, actual {:.2e} km, {} DLL calls instead of {}'.format(
+          info['step_s'], info['pos_bound_km'], err, info['dll_calls'], info['direct_calls'] ) )
+    assert err <= 1e-3 and info['dll_calls'] * 10 <= info['direct_calls']
+
+    # TEME + LLH + EFG from one pass match the separate conversions
+    multi   = propTLE_df( time_df.copy(), L1, L2, PA, outputs=['teme','llh','efg'] )
+    llh     = coordinates.TEME_to_LLH( testout.copy(), PA )
+    efg     = coordinates.TEME_to_EFG( testout.copy(), PA )
+    assert np.max( np.abs( np.vstack( multi['teme_p'] ) - np.vstack( testout['teme_p'] ) ) ) < 1e-9
+    assert np.max( np.abs( multi[['lat','height']].values - llh[['lat','height']].values ) ) < 1e-6
+    assert np.max( np.abs( np.vstack( multi['efg_p'] ) - np.vstack( efg['efg_p'] ) ) ) < 1e-6
+    assert np.max( np.abs( np.vstack( multi['efg_v'] ) - np.vstack( efg['efg_v'] ) ) ) < 1e-6
+
+    # array-backed result matches the frame
+    E        = propTLE_ephemeris( time_df, L1, L2, PA, outputs=['teme','llh'] )
+    assert np.max( np.abs( E['teme_p'] - np.vstack( testout['teme_p'] ) ) ) < 1e-9
+    assert np.allclose( E['lat'], multi['lat'] )
+
+    # stitched : an older element set + the test TLE; the grid is well past both epochs, so the
+    # newer one serves every row
+    older    = L1[:18] + '24363.67842578' + L1[32:68]
+    older    = ( older + str( sum( int(C) if C.isdigit() else ( C == '-' ) for C in older ) % 10 ), L2 )
+    stitched = propTLE_stitched_df( [ older, ( L1, L2 ) ], time_df.copy(), PA )
+    assert np.all( stitched['tle_index'] == 1 )
+    assert np.max( np.abs( np.vstack( stitched['teme_p'] ) - np.vstack( testout['teme_p'] ) ) ) < 1e-9
+    assert np.array_equal( assign_tles( [ 10., 20., 20., 30. ], np.array( [ 0., 14.9, 15.1, 24.9, 25.1, 40. ] ) ), [ 0, 0, 2, 2, 3, 3 ] )
+    assert np.array_equal( assign_tles( [ 10., 20., 30. ], np.array( [ 0., 19.9, 20., 31. ] ), 'forward' ), [ 0, 0, 1, 2 ] )
+
+    # adaptive grid : a 1 m bound on the ISS needs a ~65 s step (hermite_step), so this is *denser* 
+    # than the 5 min grid; it has to interpolate back onto that grid inside the bound
+    adapt   = propTLE_adaptive_df( L1, L2, dates[0], dates[-1], PA, tol_km=1e-3 )
+    assert hermite_step( *tle_mean_motion( L2 ), tol_km=1e-3 ) < 300 and adapt.shape[0] > len( dates )
+    back    = interpolate_ephemeris( adapt, time_df.copy() )
+    err     = np.max( np.linalg.norm( np.vstack( back['teme_p'] ) - np.vstack( testout['teme_p'] ), axis=1 ) )
+    print('Adaptive : {} points (bound {:.2e} km), error on the 5 min grid {:.2e} km'.format( 
+          adapt.shape[0], adapt.attrs['adaptive']['bound_km'], err ) )
+    assert err <= 1e-3
+
 
 # =====================================================================================================
 if __name__ == '__main__':
@@ -0,0 +1,697 @@
+import numpy as np
+
+# =====================================================================================================
+# SGP4 / SDP4 as array math : many satellites x many times in one set of numpy operations instead of
+# one ctypes call per (satellite, time).  This is the Spacetrack Report #3 theory as revised by
+# Vallado et al. (AIAA 2006-6753), in AFSPC mode, with WGS-72 constants.
+#
+# Only element sets of ephemeris type 0 (Kozai mean motion) and type 2 (Brouwer mean motion) are
+# handled; type 4 (SGP4-XP) stays on the DLL (sgp4.propagate_catalog routes it there).
+#
+# Agreement with Sgp4PropDs50UtcPosVel (see tests/test_sgp4_numpy.py) :
+#     near earth (period < 225 min)  : 1 m in position, 1 mm/s in velocity within +/- 3 days of epoch
+#     deep space (SDP4, resonances)  : 10 m in position, 1 cm/s in velocity within +/- 3 days of epoch
+# The remaining differences are floating point ordering and the DLL's own deep-space bookkeeping.
+# =====================================================================================================
+
+# WGS-72 (SGP4 is defined with these)
+RE_KM   = 6378.135
+MU      = 398600.8
+XKE     = 60.0 / np.sqrt( RE_KM**3 / MU )
+J2      = 0.001082616
+J3      = -0.00000253881
+J4      = -0.00000165597
+J3OJ2   = J3 / J2
+TWOPI   = 2 * np.pi
+X2O3    = 2.0 / 3.0
+VKMPS   = RE_KM * XKE / 60.0
+TEMP4   = 1.5e-12
+
+# error codes (same meaning as the reference implementation); anything but 0 / 6 comes back NaN
+ERR_NONE, ERR_ECC, ERR_MM, ERR_PECC, ERR_SEMILATUS, ERR_DECAYED = 0, 1, 2, 3, 4, 6
+
+# lunar / solar constants
+_ZNS, _ZES, _ZNL, _ZEL = 1.19459e-5, 0.01675, 1.5835218e-4, 0.0549
+_RPTIM = 4.37526908801129966e-3
+
+# -----------------------------------------------------------------------------------------------------
+class Sgp4Elements:
+    '''
+    element sets (one entry per satellite) and everything SGP4 / SDP4 initialization derives from them
+
+    epoch   : ds50 UTC
+    n       : mean motion (rev / day; Kozai for type 0, Brouwer for type 2)
+    ecc     : eccentricity
+    incl, node, argp, mo : degrees
+    bstar   : 1 / earth radii
+    ephtype : 0 or 2
+    '''
+    def __init__( self, epoch, n, ecc, incl, node, argp, mo, bstar, ephtype=0, satnum=None ):
+        A           = lambda X : np.atleast_1d( np.asarray( X, dtype=np.float64 ) )
+        self.epoch  = A( epoch )
+        S           = self.epoch.shape[0]
+        self.ephtype = np.broadcast_to( np.asarray( ephtype, dtype=np.int64 ), (S,) ).copy()
+        assert np.all( ( self.ephtype == 0 ) | ( self.ephtype == 2 ) ), 'only type 0 / 2 element sets'
+        self.satnum = np.zeros( S, dtype=np.int64 ) if satnum is None else np.atleast_1d( np.asarray( satnum, dtype=np.int64 ) )
+        self.no     = A( n ) * TWOPI / 1440.
+        self.ecco   = A( ecc )
+        self.inclo  = np.deg2rad( A( incl ) )
+        self.nodeo  = np.deg2rad( A( node ) )
+        self.argpo  = np.deg2rad( A( argp ) )
+        self.mo     = np.deg2rad( A( mo ) )
+        self.bstar  = A( bstar )
+        with np.errstate( divide='ignore', invalid='ignore' ):
+            self._init()
+
+    def __len__( self ):
+        return self.epoch.shape[0]
+
+    # ------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_XA_TLE( cls, holders ):
+        ''' from XA_TLE named-field holders (e.g. tle_fitter.TLE_str_to_XA_TLE) '''
+        F = lambda K : [ H[K] for H in holders ]
+        return cls( F('XA_TLE_EPOCH'), F('XA_TLE_MNMOTN'), F('XA_TLE_ECCEN'), F('XA_TLE_INCLI'),
+                    F('XA_TLE_NODE'), F('XA_TLE_OMEGA'), F('XA_TLE_MNANOM'), F('XA_TLE_BSTAR'),
+                    [ int( X ) for X in F('XA_TLE_EPHTYPE') ], [ int( X ) for X in F('XA_TLE_SATNUM') ] )
+
+    @classmethod
+    def from_lines( cls, lines_list, PA ):
+        '''
+        parse (line1, line2) pairs through the TleDll (tle_fitter.TLE_str_to_XA_TLE); returns
+        ( elements, index of each element set in lines_list, { index : message } for the rest )
+        '''
+        from . import tle_fitter
+        from . import sgp4
+        REG = sgp4.get_registry( PA )
+        holders, index, errors = [], [], {}
+        for i, (L1, L2) in enumerate( lines_list ):
+            X = tle_fitter.TLE_str_to_XA_TLE( L1, L2, PA )
+            # we only wanted the numbers; don't leave the satellite loaded
+            REG.discard_lines( L1, L2 )
+            if X is None:
+                errors[ i ] = 'load failed'
+            elif int( X[0]['XA_TLE_EPHTYPE'] ) not in ( 0, 2 ):
+                errors[ i ] = 'ephemeris type {} is not handled'.format( int( X[0]['XA_TLE_EPHTYPE'] ) )
+            else:
+                holders.append( X[0] )
+                index.append( i )
+        return cls.from_XA_TLE( holders ) if holders else None, np.array( index, dtype=np.int64 ), errors
+
+    # ------------------------------------------------------------------------------------------------
+    def _init( self ):
+        ecco, inclo, argpo, mo, bstar = self.ecco, self.inclo, self.argpo, self.mo, self.bstar
+
+        # ------------------------- initl : un-Kozai the mean motion (type 0 only), sidereal time
+        eccsq  = ecco * ecco
+        omeosq = 1.0 - eccsq
+        rteosq = np.sqrt( omeosq )
+        cosio  = np.cos( inclo )
+        cosio2 = cosio * cosio
+        ak     = ( XKE / self.no ) ** X2O3
+        d1     = 0.75 * J2 * ( 3.0 * cosio2 - 1.0 ) / ( rteosq * omeosq )
+        del_   = d1 / ( ak * ak )
+        adel   = ak * ( 1.0 - del_ * del_ - del_ * ( 1.0 / 3.0 + 134.0 * del_ * del_ / 81.0 ) )
+        del_   = d1 / ( adel * adel )
+        no     = np.where( self.ephtype == 2, self.no, self.no / ( 1.0 + del_ ) )
+        ao     = ( XKE / no ) ** X2O3
+        sinio  = np.sin( inclo )
+        posq   = ( ao * omeosq ) ** 2
+        con42  = 1.0 - 5.0 * cosio2
+        con41  = -con42 - cosio2 - cosio2
+        rp     = ao * ( 1.0 - ecco )
+        ts70   = self.epoch - 7305.0
+        ds70   = np.floor( ts70 + 1.0e-8 )
+        tfrac  = ts70 - ds70
+        c1     = 1.72027916940703639e-2
+        gsto   = np.mod( 1.7321343856509374 + c1 * ds70 + ( c1 + TWOPI ) * tfrac + ts70 * ts70 * 5.07551419432269442e-15, TWOPI )
+
+        # ------------------------- sgp4init
+        ss     = 78.0 / RE_KM + 1.0
+        qzms2t = ( ( 120.0 - 78.0 ) / RE_KM ) ** 4
+        isimp  = rp < ( 220.0 / RE_KM + 1.0 )
+        perige = ( rp - 1.0 ) * RE_KM
+        sfour  = np.where( perige < 98.0, 20.0, perige - 78.0 )
+        qzms24 = np.where( perige < 156.0, ( ( 120.0 - sfour ) / RE_KM ) ** 4, qzms2t )
+        sfour  = np.where( perige < 156.0, sfour / RE_KM + 1.0, ss )
+        pinvsq = 1.0 / posq
+        tsi    = 1.0 / ( ao - sfour )
+        eta    = ao * ecco * tsi
+        etasq  = eta * eta
+        eeta   = ecco * eta
+        psisq  = np.abs( 1.0 - etasq )
+        coef   = qzms24 * tsi ** 4
+        coef1  = coef / psisq ** 3.5
+        cc2    = coef1 * no * ( ao * ( 1.0 + 1.5 * etasq + eeta * ( 4.0 + etasq ) ) +
+                                0.375 * J2 * tsi / psisq * con41 * ( 8.0 + 3.0 * etasq * ( 8.0 + etasq ) ) )
+        cc1    = bstar * cc2
+        cc3    = np.where( ecco > 1.0e-4, -2.0 * coef * tsi * J3OJ2 * no * sinio / ecco, 0.0 )
+        x1mth2 = 1.0 - cosio2
+        cc4    = 2.0 * no * coef1 * ao * omeosq * ( eta * ( 2.0 + 0.5 * etasq ) + ecco * ( 0.5 + 2.0 * etasq ) -
+                   J2 * tsi / ( ao * psisq ) * ( -3.0 * con41 * ( 1.0 - 2.0 * eeta + etasq * ( 1.5 - 0.5 * eeta ) ) +
+                   0.75 * x1mth2 * ( 2.0 * etasq - eeta * ( 1.0 + etasq ) ) * np.cos( 2.0 * argpo ) ) )
+        cc5    = 2.0 * coef1 * ao * omeosq * ( 1.0 + 2.75 * ( etasq + eeta ) + eeta * etasq )
+        cosio4 = cosio2 * cosio2
+        temp1  = 1.5 * J2 * pinvsq * no
+        temp2  = 0.5 * temp1 * J2 * pinvsq
+        temp3  = -0.46875 * J4 * pinvsq * pinvsq * no
+        mdot   = no + 0.5 * temp1 * rteosq * con41 + 0.0625 * temp2 * rteosq * ( 13.0 - 78.0 * cosio2 + 137.0 * cosio4 )
+        argpdot = ( -0.5 * temp1 * con42 + 0.0625 * temp2 * ( 7.0 - 114.0 * cosio2 + 395.0 * cosio4 ) +
+                    temp3 * ( 3.0 - 36.0 * cosio2 + 49.0 * cosio4 ) )
+        xhdot1 = -temp1 * cosio
+        nodedot = xhdot1 + ( 0.5 * temp2 * ( 4.0 - 19.0 * cosio2 ) + 2.0 * temp3 * ( 3.0 - 7.0 * cosio2 ) ) * cosio
+        xpidot = argpdot + nodedot
+        self.omgcof = bstar * cc3 * np.cos( argpo )
+        self.xmcof  = np.where( ecco > 1.0e-4, -X2O3 * coef * bstar / eeta, 0.0 )
+        self.nodecf = 3.5 * omeosq * xhdot1 * cc1
+        self.t2cof  = 1.5 * cc1
+        self.xlcof  = -0.25 * J3OJ2 * sinio * ( 3.0 + 5.0 * cosio ) / np.where( np.abs( cosio + 1.0 ) > TEMP4, 1.0 + cosio, TEMP4 )
+        self.aycof  = -0.5 * J3OJ2 * sinio
+        self.delmo  = ( 1.0 + eta * np.cos( mo ) ) ** 3
+        self.sinmao = np.sin( mo )
+        self.x7thm1 = 7.0 * cosio2 - 1.0
+
+        self.deep   = TWOPI / no >= 225.0
+        isimp       = isimp | self.deep
+        cc1sq       = cc1 * cc1
+        d2          = 4.0 * ao * tsi * cc1sq
+        temp        = d2 * tsi * cc1 / 3.0
+        d3          = ( 17.0 * ao + sfour ) * temp
+        d4          = 0.5 * temp * ao * tsi * ( 221.0 * ao + 31.0 * sfour ) * cc1
+        Z           = lambda X : np.where( isimp, 0.0, X )
+        self.d2, self.d3, self.d4 = Z( d2 ), Z( d3 ), Z( d4 )
+        self.t3cof  = Z( d2 + 2.0 * cc1sq )
+        self.t4cof  = Z( 0.25 * ( 3.0 * d3 + cc1 * ( 12.0 * d2 + 10.0 * cc1sq ) ) )
+        self.t5cof  = Z( 0.2 * ( 3.0 * d4 + 12.0 * cc1 * d3 + 6.0 * d2 * d2 + 15.0 * cc1sq * ( 2.0 * d2 + cc1sq ) ) )
+
+        self.isimp, self.no_unkozai, self.gsto = isimp, no, gsto
+        self.con41, self.x1mth2 = con41, x1mth2
+        self.cc1, self.cc4, self.cc5, self.eta = cc1, cc4, cc5, eta
+        self.mdot, self.argpdot, self.nodedot, self.xpidot = mdot, argpdot, nodedot, xpidot
+
+        # ------------------------- deep space (SDP4) terms, only for those satellites
+        self.ds = _deep_init( self, np.flatnonzero( self.deep ), eccsq ) if np.any( self.deep ) else None
+
+    # ------------------------------------------------------------------------------------------------
+    def propagate( self, ds50_utc, max_elements : int = 2000000 ):
+        '''
+        every satellite to every time (ds50 UTC array, shape (T,))
+
+        returns ( eph (S, T, 6) TEME pos (km) / vel (km/s), errors (S, T) int8 ); positions of
+        element sets that fail at a time (bad eccentricity, negative semilatus rectum ...) are NaN.
+        Work is done in blocks of satellites so that a block holds at most `max_elements` points.
+        '''
+        ds50   = np.atleast_1d( np.asarray( ds50_utc, dtype=np.float64 ) )
+        S, T   = len( self ), ds50.shape[0]
+        eph    = np.empty( (S, T, 6) )
+        err    = np.zeros( (S, T), dtype=np.int8 )
+        block  = max( 1, max_elements // max( T, 1 ) )
+        with np.errstate( divide='ignore', invalid='ignore', over='ignore' ):
+            for B in range( 0, S, block ):
+                idx = np.arange( B, min( B + block, S ) )
+                tsince = ( ds50[None,:] - self.epoch[ idx, None ] ) * 1440.
+                eph[ idx ], err[ idx ] = _sgp4( self, idx, tsince )
+        return eph, err
+
+
+# =====================================================================================================
+# deep space initialization (dscom / dpper / dsinit), vectorized over the deep-space satellites
+# =====================================================================================================
+class _Deep:
+    pass
+
+# -----------------------------------------------------------------------------------------------------
+def _dscom_pass( zcosg, zsing, zcosi, zsini, zcosh, zsinh, cc, xnoi, cosim, sinim, cosomm, sinomm, em, emsq, betasq, rtemsq ):
+    a1  = zcosg * zcosh + zsing * zcosi * zsinh
+    a3  = -zsing * zcosh + zcosg * zcosi * zsinh
+    a7  = -zcosg * zsinh + zsing * zcosi * zcosh
+    a8  = zsing * zsini
+    a9  = zsing * zsinh + zcosg * zcosi * zcosh
+    a10 = zcosg * zsini
+    a2  = cosim * a7 + sinim * a8
+    a4  = cosim * a9 + sinim * a10
+    a5  = -sinim * a7 + cosim * a8
+    a6  = -sinim * a9 + cosim * a10
+    x1  = a1 * cosomm + a2 * sinomm
+    x2  = a3 * cosomm + a4 * sinomm
+    x3  = -a1 * sinomm + a2 * cosomm
+    x4  = -a3 * sinomm + a4 * cosomm
+    x5  = a5 * sinomm
+    x6  = a6 * sinomm
+    x7  = a5 * cosomm
+    x8  = a6 * cosomm
+    z31 = 12.0 * x1 * x1 - 3.0 * x3 * x3
+    z32 = 24.0 * x1 * x2 - 6.0 * x3 * x4
+    z33 = 12.0 * x2 * x2 - 3.0 * x4 * x4
+    z1  = 3.0 * ( a1 * a1 + a2 * a2 ) + z31 * emsq
+    z2  = 6.0 * ( a1 * a3 + a2 * a4 ) + z32 * emsq
+    z3  = 3.0 * ( a3 * a3 + a4 * a4 ) + z33 * emsq
+    z11 = -6.0 * a1 * a5 + emsq * ( -24.0 * x1 * x7 - 6.0 * x3 * x5 )
+    z12 = -6.0 * ( a1 * a6 + a3 * a5 ) + emsq * ( -24.0 * ( x2 * x7 + x1 * x8 ) - 6.0 * ( x3 * x6 + x4 * x5 ) )
+    z13 = -6.0 * a3 * a6 + emsq * ( -24.0 * x2 * x8 - 6.0 * x4 * x6 )
+    z21 = 6.0 * a2 * a5 + emsq * ( 24.0 * x1 * x5 - 6.0 * x3 * x7 )
+    z22 = 6.0 * ( a4 * a5 + a2 * a6 ) + emsq * ( 24.0 * ( x2 * x5 + x1 * x6 ) - 6.0 * ( x4 * x7 + x3 * x8 ) )
+    z23 = 6.0 * a4 * a6 + emsq * ( 24.0 * x2 * x6 - 6.0 * x4 * x8 )
+    z1  = z1 + z1 + betasq * z31
+    z2  = z2 + z2 + betasq * z32
+    z3  = z3 + z3 + betasq * z33
+    s3  = cc * xnoi
+    s2  = -0.5 * s3 / rtemsq
+    s4  = s3 * rtemsq
+    s1  = -15.0 * em * s4
+    s5  = x1 * x3 + x2 * x4
+    s6  = x2 * x3 + x1 * x4
+    s7  = x2 * x4 - x1 * x3
+    return dict( s1=s1, s2=s2, s3=s3, s4=s4, s5=s5, s6=s6, s7=s7, z1=z1, z2=z2, z3=z3, z11=z11, z12=z12,
+                 z13=z13, z21=z21, z22=z22, z23=z23, z31=z31, z32=z32, z33=z33 )
+
+# -----------------------------------------------------------------------------------------------------
+def _deep_init( E, idx, eccsq_all ):
+    D      = _Deep()
+    D.idx  = idx
+    ecco, inclo, nodeo, argpo, mo = E.ecco[idx], E.inclo[idx], E.nodeo[idx], E.argpo[idx], E.mo[idx]
+    no     = E.no_unkozai[idx]
+    eccsq  = eccsq_all[idx]
+
+    # ------------------------- dscom (at epoch)
+    snodm, cnodm   = np.sin( nodeo ), np.cos( nodeo )
+    sinomm, cosomm = np.sin( argpo ), np.cos( argpo )
+    sinim, cosim   = np.sin( inclo ), np.cos( inclo )
+    emsq   = ecco * ecco
+    betasq = 1.0 - emsq
+    rtemsq = np.sqrt( betasq )
+    day    = E.epoch[idx] + 18261.5
+    xnodce = np.mod( 4.5236020 - 9.2422029e-4 * day, TWOPI )
+    stem, ctem = np.sin( xnodce ), np.cos( xnodce )
+    zcosil = 0.91375164 - 0.03568096 * ctem
+    zsinil = np.sqrt( 1.0 - zcosil * zcosil )
+    zsinhl = 0.089683511 * stem / zsinil
+    zcoshl = np.sqrt( 1.0 - zsinhl * zsinhl )
+    gam    = 5.8351514 + 0.0019443680 * day
+    zx     = 0.39785416 * stem / zsinil
+    zy     = zcoshl * ctem + 0.91744867 * zsinhl * stem
+    zx     = gam + np.arctan2( zx, zy ) - xnodce
+    xnoi   = 1.0 / no
+    common = ( xnoi, cosim, sinim, cosomm, sinomm, ecco, emsq, betasq, rtemsq )
+    SO     = _dscom_pass( 0.1945905, -0.98088458, 0.91744867, 0.39785416, cnodm, snodm, 2.9864797e-6, *common )
+    LU     = _dscom_pass( np.cos( zx ), np.sin( zx ), zcosil, zsinil,
+                          zcoshl * cnodm + zsinhl * snodm, snodm * zcoshl - cnodm * zsinhl, 4.7968065e-7, *common )
+    D.zmol = np.mod( 4.7199672 + 0.22997150 * day - gam, TWOPI )
+    D.zmos = np.mod( 6.2565837 + 0.017201977 * day, TWOPI )
+    D.se2  = 2.0 * SO['s1'] * SO['s6']
+    D.se3  = 2.0 * SO['s1'] * SO['s7']
+    D.si2  = 2.0 * SO['s2'] * SO['z12']
+    D.si3  = 2.0 * SO['s2'] * ( SO['z13'] - SO['z11'] )
+    D.sl2  = -2.0 * SO['s3'] * SO['z2']
+    D.sl3  = -2.0 * SO['s3'] * ( SO['z3'] - SO['z1'] )
+    D.sl4  = -2.0 * SO['s3'] * ( -21.0 - 9.0 * emsq ) * _ZES
+    D.sgh2 = 2.0 * SO['s4'] * SO['z32']
+    D.sgh3 = 2.0 * SO['s4'] * ( SO['z33'] - SO['z31'] )
+    D.sgh4 = -18.0 * SO['s4'] * _ZES
+    D.sh2  = -2.0 * SO['s2'] * SO['z22']
+    D.sh3  = -2.0 * SO['s2'] * ( SO['z23'] - SO['z21'] )
+    D.ee2  = 2.0 * LU['s1'] * LU['s6']
+    D.e3   = 2.0 * LU['s1'] * LU['s7']
+    D.xi2  = 2.0 * LU['s2'] * LU['z12']
+    D.xi3  = 2.0 * LU['s2'] * ( LU['z13'] - LU['z11'] )
+    D.xl2  = -2.0 * LU['s3'] * LU['z2']
+    D.xl3  = -2.0 * LU['s3'] * ( LU['z3'] - LU['z1'] )
+    D.xl4  = -2.0 * LU['s3'] * ( -21.0 - 9.0 * emsq ) * _ZEL
+    D.xgh2 = 2.0 * LU['s4'] * LU['z32']
+    D.xgh3 = 2.0 * LU['s4'] * ( LU['z33'] - LU['z31'] )
+    D.xgh4 = -18.0 * LU['s4'] * _ZEL
+    D.xh2  = -2.0 * LU['s2'] * LU['z22']
+    D.xh3  = -2.0 * LU['s2'] * ( LU['z23'] - LU['z21'] )
+    # (dpper at initialization leaves the elements alone in AFSPC mode)
+
+    # ------------------------- dsinit : secular rates
+    ses   = SO['s1'] * _ZNS * SO['s5']
+    sis   = SO['s2'] * _ZNS * ( SO['z11'] + SO['z13'] )
+    sls   = -_ZNS * SO['s3'] * ( SO['z1'] + SO['z3'] - 14.0 - 6.0 * emsq )
+    sghs  = SO['s4'] * _ZNS * ( SO['z31'] + SO['z33'] - 6.0 )
+    shs   = -_ZNS * SO['s2'] * ( SO['z21'] + SO['z23'] )
+    polar = ( inclo < 5.2359877e-2 ) | ( inclo > np.pi - 5.2359877e-2 )
+    shs   = np.where( polar, 0.0, shs )
+    shs   = np.where( sinim != 0.0, shs / sinim, shs )
+    sgs   = sghs - cosim * shs
+    D.dedt = ses + LU['s1'] * _ZNL * LU['s5']
+    D.didt = sis + LU['s2'] * _ZNL * ( LU['z11'] + LU['z13'] )
+    D.dmdt = sls - _ZNL * LU['s3'] * ( LU['z1'] + LU['z3'] - 14.0 - 6.0 * emsq )
+    sghl  = LU['s4'] * _ZNL * ( LU['z31'] + LU['z33'] - 6.0 )
+    shll  = np.where( polar, 0.0, -_ZNL * LU['s2'] * ( LU['z21'] + LU['z23'] ) )
+    D.domdt = np.where( sinim != 0.0, sgs + sghl - cosim / sinim * shll, sgs + sghl )
+    D.dnodt = np.where( sinim != 0.0, shs + shll / sinim, shs )
+
+    # ------------------------- dsinit : resonances (1 : synchronous, 2 : half day)
+    D.irez = np.zeros( idx.shape[0], dtype=np.int64 )
+    D.irez[ ( no > 0.0034906585 ) & ( no < 0.0052359877 ) ] = 1
+    D.irez[ ( no >= 8.26e-3 ) & ( no <= 9.24e-3 ) & ( ecco >= 0.5 ) ] = 2
+    theta  = np.mod( E.gsto[idx], TWOPI )
+    aonv   = ( no / XKE ) ** X2O3
+    mdot, nodedot, xpidot = E.mdot[idx], E.nodedot[idx], E.xpidot[idx]
+
+    # half day
+    em, eoc = ecco, ecco * eccsq
+    cosisq  = cosim * cosim
+    sini2   = sinim * sinim
+    g201    = -0.306 - ( em - 0.64 ) * 0.440
+    lo      = em <= 0.65
+    g211    = np.where( lo, 3.616 - 13.2470 * em + 16.2900 * eccsq,
+                            -72.099 + 331.819 * em - 508.738 * eccsq + 266.724 * eoc )
+    g310    = np.where( lo, -19.302 + 117.3900 * em - 228.4190 * eccsq + 156.5910 * eoc,
+                            -346.844 + 1582.851 * em - 2415.925 * eccsq + 1246.113 * eoc )
+    g322    = np.where( lo, -18.9068 + 109.7927 * em - 214.6334 * eccsq + 146.5816 * eoc,
+                            -342.585 + 1554.908 * em - 2366.899 * eccsq + 1215.972 * eoc )
+    g410    = np.where( lo, -41.122 + 242.6940 * em - 471.0940 * eccsq + 313.9530 * eoc,
+                            -1052.797 + 4758.686 * em - 7193.992 * eccsq + 3651.957 * eoc )
+    g422    = np.where( lo, -146.407 + 841.8800 * em - 1629.014 * eccsq + 1083.4350 * eoc,
+                            -3581.690 + 16178.110 * em - 24462.770 * eccsq + 12422.520 * eoc )
+    g520    = np.where( lo, -532.114 + 3017.977 * em - 5740.032 * eccsq + 3708.2760 * eoc,
+                np.where( em > 0.715, -5149.66 + 29936.92 * em - 54087.36 * eccsq + 31324.56 * eoc,
+                                      1464.74 - 4664.75 * em + 3763.64 * eccsq ) )
+    lo      = em < 0.7
+    g533    = np.where( lo, -919.22770 + 4988.6100 * em - 9064.7700 * eccsq + 5542.21 * eoc,
+                            -37995.780 + 161616.52 * em - 229838.20 * eccsq + 109377.94 * eoc )
+    g521    = np.where( lo, -822.71072 + 4568.6173 * em - 8491.4146 * eccsq + 5337.524 * eoc,
+                            -51752.104 + 218913.95 * em - 309468.16 * eccsq + 146349.42 * eoc )
+    g532    = np.where( lo, -853.66600 + 4690.2500 * em - 8624.7700 * eccsq + 5341.4 * eoc,
+                            -40023.880 + 170470.89 * em - 242699.48 * eccsq + 115605.82 * eoc )
+    f220    = 0.75 * ( 1.0 + 2.0 * cosim + cosisq )
+    f221    = 1.5 * sini2
+    f321    = 1.875 * sinim * ( 1.0 - 2.0 * cosim - 3.0 * cosisq )
+    f322    = -1.875 * sinim * ( 1.0 + 2.0 * cosim - 3.0 * cosisq )
+    f441    = 35.0 * sini2 * f220
+    f442    = 39.3750 * sini2 * sini2
+    f522    = 9.84375 * sinim * ( sini2 * ( 1.0 - 2.0 * cosim - 5.0 * cosisq ) + 0.33333333 * ( -2.0 + 4.0 * cosim + 6.0 * cosisq ) )
+    f523    = sinim * ( 4.92187512 * sini2 * ( -2.0 - 4.0 * cosim + 10.0 * cosisq ) + 6.56250012 * ( 1.0 + 2.0 * cosim - 3.0 * cosisq ) )
+    f542    = 29.53125 * sinim * ( 2.0 - 8.0 * cosim + cosisq * ( -12.0 + 8.0 * cosim + 10.0 * cosisq ) )
+    f543    = 29.53125 * sinim * ( -2.0 - 8.0 * cosim + cosisq * ( 12.0 + 8.0 * cosim - 10.0 * cosisq ) )
+    temp1   = 3.0 * no * no * aonv * aonv
+    temp    = temp1 * 1.7891679e-6
+    D.d2201, D.d2211 = temp * f220 * g201, temp * f221 * g211
+    temp1   = temp1 * aonv
+    temp    = temp1 * 3.7393792e-7
+    D.d3210, D.d3222 = temp * f321 * g310, temp * f322 * g322
+    temp1   = temp1 * aonv
+    temp    = 2.0 * temp1 * 7.3636953e-9
+    D.d4410, D.d4422 = temp * f441 * g410, temp * f442 * g422
+    temp1   = temp1 * aonv
+    temp    = temp1 * 1.1428639e-7
+    D.d5220, D.d5232 = temp * f522 * g520, temp * f523 * g532
+    temp    = 2.0 * temp1 * 2.1765803e-9
+    D.d5421, D.d5433 = temp * f542 * g521, temp * f543 * g533
+    xlamo2  = np.mod( mo + nodeo + nodeo - theta - theta, TWOPI )
+    xfact2  = mdot + D.dmdt + 2.0 * ( nodedot + D.dnodt - _RPTIM ) - no
+
+    # synchronous
+    g200    = 1.0 + emsq * ( -2.5 + 0.8125 * emsq )
+    g310    = 1.0 + 2.0 * emsq
+    g300    = 1.0 + emsq * ( -6.0 + 6.60937 * emsq )
+    f220    = 0.75 * ( 1.0 + cosim ) * ( 1.0 + cosim )
+    f311    = 0.9375 * sinim * sinim * ( 1.0 + 3.0 * cosim ) - 0.75 * ( 1.0 + cosim )
+    f330    = 1.875 * ( 1.0 + cosim ) ** 3
+    del1    = 3.0 * no * no * aonv * aonv
+    D.del2  = 2.0 * del1 * f220 * g200 * 1.7891679e-6
+    D.del3  = 3.0 * del1 * f330 * g300 * 2.2123015e-7 * aonv
+    D.del1  = del1 * f311 * g310 * 2.1460748e-6 * aonv
+    xlamo1  = np.mod( mo + nodeo + argpo - theta, TWOPI )
+    xfact1  = mdot + xpidot - _RPTIM + D.dmdt + D.domdt + D.dnodt - no
+
+    D.xlamo = np.where( D.irez == 2, xlamo2, np.where( D.irez == 1, xlamo1, 0.0 ) )
+    D.xfact = np.where( D.irez == 2, xfact2, np.where( D.irez == 1, xfact1, 0.0 ) )
+    return D
+
+# -----------------------------------------------------------------------------------------------------
+def _dspace( E, D, k, t, em, argpm, inclm, mm, nodem, nm ):
+    '''
+    deep space secular effects and the resonance integration (always restarted from epoch, in 720
+    minute steps) for the deep-space rows k (indices into D), tsince t (rows, T)
+    '''
+    C      = lambda X : X[ k ][:,None]
+    theta  = np.mod( C( E.gsto[ D.idx ] ) + t * _RPTIM, TWOPI )
+    em     = em + C( D.dedt ) * t
+    inclm  = inclm + C( D.didt ) * t
+    argpm  = argpm + C( D.domdt ) * t
+    nodem  = nodem + C( D.dnodt ) * t
+    mm     = mm + C( D.dmdt ) * t
+    irez   = np.broadcast_to( C( D.irez ), t.shape )
+    if not np.any( irez ):
+        return em, argpm, inclm, mm, nodem, nm
+
+    no     = np.broadcast_to( C( E.no_unkozai[ D.idx ] ), t.shape )
+    argpo  = C( E.argpo[ D.idx ] )
+    argpdot = C( E.argpdot[ D.idx ] )
+    xfact  = C( D.xfact )
+    dd     = { K : C( getattr( D, K ) ) for K in ( 'd2201', 'd2211', 'd3210', 'd3222', 'd4410', 'd4422',
+                                                   'd5220', 'd5232', 'd5421', 'd5433', 'del1', 'del2', 'del3' ) }
+    def derivs( xli, xni, atime ):
+        # synchronous
+        xndt1  = ( dd['del1'] * np.sin( xli - 0.13130908 ) + dd['del2'] * np.sin( 2.0 * ( xli - 2.8843198 ) ) +
+                   dd['del3'] * np.sin( 3.0 * ( xli - 0.37448087 ) ) )
+        xnddt1 = ( dd['del1'] * np.cos( xli - 0.13130908 ) + 2.0 * dd['del2'] * np.cos( 2.0 * ( xli - 2.8843198 ) ) +
+                   3.0 * dd['del3'] * np.cos( 3.0 * ( xli - 0.37448087 ) ) )
+        # half day
+        xomi   = argpo + argpdot * atime
+        x2omi  = xomi + xomi
+        x2li   = xli + xli
+        xndt2  = ( dd['d2201'] * np.sin( x2omi + xli - 5.7686396 ) + dd['d2211'] * np.sin( xli - 5.7686396 ) +
+                   dd['d3210'] * np.sin( xomi + xli - 0.95240898 ) + dd['d3222'] * np.sin( -xomi + xli - 0.95240898 ) +
+                   dd['d4410'] * np.sin( x2omi + x2li - 1.8014998 ) + dd['d4422'] * np.sin( x2li - 1.8014998 ) +
+                   dd['d5220'] * np.sin( xomi + xli - 1.0508330 ) + dd['d5232'] * np.sin( -xomi + xli - 1.0508330 ) +
+                   dd['d5421'] * np.sin( xomi + x2li - 4.4108898 ) + dd['d5433'] * np.sin( -xomi + x2li - 4.4108898 ) )
+        xnddt2 = ( dd['d2201'] * np.cos( x2omi + xli - 5.7686396 ) + dd['d2211'] * np.cos( xli - 5.7686396 ) +
+                   dd['d3210'] * np.cos( xomi + xli - 0.95240898 ) + dd['d3222'] * np.cos( -xomi + xli - 0.95240898 ) +
+                   dd['d5220'] * np.cos( xomi + xli - 1.0508330 ) + dd['d5232'] * np.cos( -xomi + xli - 1.0508330 ) +
+                   2.0 * ( dd['d4410'] * np.cos( x2omi + x2li - 1.8014998 ) + dd['d4422'] * np.cos( x2li - 1.8014998 ) +
+                           dd['d5421'] * np.cos( xomi + x2li - 4.4108898 ) + dd['d5433'] * np.cos( -xomi + x2li - 4.4108898 ) ) )
+        xldot  = xni + xfact
+        xndt   = np.where( irez == 2, xndt2, xndt1 )
+        xnddt  = np.where( irez == 2, xnddt2, xnddt1 ) * xldot
+        return xndt, xldot, xnddt
+
+    xli    = np.broadcast_to( C( D.xlamo ), t.shape ).copy()
+    xni    = no.copy()
+    atime  = np.zeros( t.shape )
+    delt   = np.where( t > 0.0, 720.0, -720.0 )
+    while True:
+        active = ( irez != 0 ) & ( np.abs( t - atime ) >= 720.0 )
+        if not np.any( active ):
+            break
+        xndt, xldot, xnddt = derivs( xli, xni, atime )
+        xli   = np.where( active, xli + xldot * delt + xndt * 259200.0, xli )
+        xni   = np.where( active, xni + xndt * delt + xnddt * 259200.0, xni )
+        atime = np.where( active, atime + delt, atime )
+    xndt, xldot, xnddt = derivs( xli, xni, atime )
+    ft     = t - atime
+    nm_r   = xni + xndt * ft + xnddt * ft * ft * 0.5
+    xl     = xli + xldot * ft + xndt * ft * ft * 0.5
+    mm_r   = np.where( irez == 1, xl - nodem - argpm + theta, xl - 2.0 * nodem + 2.0 * theta )
+    mm     = np.where( irez != 0, mm_r, mm )
+    nm     = np.where( irez != 0, no + ( nm_r - no ), nm )
+    return em, argpm, inclm, mm, nodem, nm
+
+# -----------------------------------------------------------------------------------------------------
+def _dpper( D, k, t, ep, inclp, nodep, argpp, mp ):
+    ''' lunar / solar periodics (AFSPC mode) for deep-space rows k '''
+    C     = lambda X : X[ k ][:,None]
+    zm    = C( D.zmos ) + _ZNS * t
+    zf    = zm + 2.0 * _ZES * np.sin( zm )
+    sinzf = np.sin( zf )
+    f2    = 0.5 * sinzf * sinzf - 0.25
+    f3    = -0.5 * sinzf * np.cos( zf )
+    ses   = C( D.se2 ) * f2 + C( D.se3 ) * f3
+    sis   = C( D.si2 ) * f2 + C( D.si3 ) * f3
+    sls   = C( D.sl2 ) * f2 + C( D.sl3 ) * f3 + C( D.sl4 ) * sinzf
+    sghs  = C( D.sgh2 ) * f2 + C( D.sgh3 ) * f3 + C( D.sgh4 ) * sinzf
+    shs   = C( D.sh2 ) * f2 + C( D.sh3 ) * f3
+    zm    = C( D.zmol ) + _ZNL * t
+    zf    = zm + 2.0 * _ZEL * np.sin( zm )
+    sinzf = np.sin( zf )
+    f2    = 0.5 * sinzf * sinzf - 0.25
+    f3    = -0.5 * sinzf * np.cos( zf )
+    sel   = C( D.ee2 ) * f2 + C( D.e3 ) * f3
+    sil   = C( D.xi2 ) * f2 + C( D.xi3 ) * f3
+    sll   = C( D.xl2 ) * f2 + C( D.xl3 ) * f3 + C( D.xl4 ) * sinzf
+    sghl  = C( D.xgh2 ) * f2 + C( D.xgh3 ) * f3 + C( D.xgh4 ) * sinzf
+    shll  = C( D.xh2 ) * f2 + C( D.xh3 ) * f3
+    pe, pinc, pl, pgh, ph = ses + sel, sis + sil, sls + sll, sghs + sghl, shs + shll
+
+    inclp = inclp + pinc
+    ep    = ep + pe
+    sinip = np.sin( inclp )
+    cosip = np.cos( inclp )
+
+    # normal case
+    ph_n    = ph / sinip
+    pgh_n   = pgh - cosip * ph_n
+    argpp_n = argpp + pgh_n
+    nodep_n = nodep + ph_n
+    mp_n    = mp + pl
+
+    # Lyddane modification for low inclinations
+    sinop, cosop = np.sin( nodep ), np.cos( nodep )
+    alfdp = sinip * sinop + ( ph * cosop + pinc * cosip * sinop )
+    betdp = sinip * cosop + ( -ph * sinop + pinc * cosip * cosop )
+    nodel = np.fmod( nodep, TWOPI )
+    nodel = np.where( nodel < 0.0, nodel + TWOPI, nodel )
+    xls   = mp + argpp + pl + pgh + ( cosip - pinc * sinip ) * nodel
+    xnoh  = nodel
+    nodel = np.arctan2( alfdp, betdp )
+    nodel = np.where( nodel < 0.0, nodel + TWOPI, nodel )
+    nodel = np.where( np.abs( xnoh - nodel ) > np.pi, np.where( nodel < xnoh, nodel + TWOPI, nodel - TWOPI ), nodel )
+    mp_l  = mp + pl
+    argpp_l = xls - mp_l - cosip * nodel
+
+    hi    = inclp >= 0.2
+    return ( ep, inclp, np.where( hi, nodep_n, nodel ), np.where( hi, argpp_n, argpp_l ), np.where( hi, mp_n, mp_l ) )
+
+# -----------------------------------------------------------------------------------------------------
+def _sgp4( E, idx, t ):
+    ''' propagate satellites idx to tsince t (minutes, shape (len(idx), T)) '''
+    C       = lambda X : X[ idx ][:,None]
+    isimp   = C( E.isimp )
+    no      = C( E.no_unkozai )
+    bstar   = C( E.bstar )
+    xmdf    = C( E.mo ) + C( E.mdot ) * t
+    argpdf  = C( E.argpo ) + C( E.argpdot ) * t
+    nodedf  = C( E.nodeo ) + C( E.nodedot ) * t
+    t2      = t * t
+    nodem   = nodedf + C( E.nodecf ) * t2
+    t3, t4  = t2 * t, t2 * t2
+    delm    = C( E.xmcof ) * ( ( 1.0 + C( E.eta ) * np.cos( xmdf ) ) ** 3 - C( E.delmo ) )
+    temp    = C( E.omgcof ) * t + delm
+    mm      = np.where( isimp, xmdf, xmdf + temp )
+    argpm   = np.where( isimp, argpdf, argpdf - temp )
+    tempa   = 1.0 - C( E.cc1 ) * t - np.where( isimp, 0.0, C( E.d2 ) * t2 + C( E.d3 ) * t3 + C( E.d4 ) * t4 )
+    tempe   = bstar * C( E.cc4 ) * t + np.where( isimp, 0.0, bstar * C( E.cc5 ) * ( np.sin( mm ) - C( E.sinmao ) ) )
+    templ   = C( E.t2cof ) * t2 + np.where( isimp, 0.0, C( E.t3cof ) * t3 + t4 * ( C( E.t4cof ) + t * C( E.t5cof ) ) )
+    shape   = t.shape
+    nm      = np.broadcast_to( no, shape ).copy()
+    em      = np.broadcast_to( C( E.ecco ), shape ).copy()
+    inclm   = np.broadcast_to( C( E.inclo ), shape ).copy()
+
+    # deep space rows (positions in idx, and in E.ds)
+    deep    = E.deep[ idx ]
+    rows    = np.flatnonzero( deep )
+    if rows.shape[0]:
+        k   = np.searchsorted( E.ds.idx, idx[ rows ] )
+        em[rows], argpm[rows], inclm[rows], mm[rows], nodem[rows], nm[rows] = _dspace(
+                E, E.ds, k, t[rows], em[rows], argpm[rows], inclm[rows], mm[rows], nodem[rows], nm[rows] )
+
+    err     = np.zeros( shape, dtype=np.int8 )
+    err[ nm <= 0.0 ] = ERR_MM
+    am      = ( XKE / nm ) ** X2O3 * tempa * tempa
+    nm      = XKE / am ** 1.5
+    em      = em - tempe
+    err[ ( err == 0 ) & ( ( em >= 1.0 ) | ( em < -0.001 ) ) ] = ERR_ECC
+    em      = np.maximum( em, 1.0e-6 )
+    mm      = mm + no * templ
+    xlm     = mm + argpm + nodem
+    nodem   = np.fmod( nodem, TWOPI )
+    argpm   = np.mod( argpm, TWOPI )
+    xlm     = np.mod( xlm, TWOPI )
+    mm      = np.mod( xlm - argpm - nodem, TWOPI )
+
+    ep, xincp, argpp, nodep, mp = em, inclm, argpm, nodem, mm
+    sinip, cosip = np.sin( inclm ), np.cos( inclm )
+    aycof   = np.broadcast_to( C( E.aycof ), shape ).copy()
+    xlcof   = np.broadcast_to( C( E.xlcof ), shape ).copy()
+    con41   = np.broadcast_to( C( E.con41 ), shape ).copy()
+    x1mth2  = np.broadcast_to( C( E.x1mth2 ), shape ).copy()
+    x7thm1  = np.broadcast_to( C( E.x7thm1 ), shape ).copy()
+    if rows.shape[0]:
+        e_, i_, n_, a_, m_ = _dpper( E.ds, k, t[rows], ep[rows], xincp[rows], nodep[rows], argpp[rows], mp[rows] )
+        neg  = i_ < 0.0
+        i_   = np.where( neg, -i_, i_ )
+        n_   = np.where( neg, n_ + np.pi, n_ )
+        a_   = np.where( neg, a_ - np.pi, a_ )
+        bad  = ( e_ < 0.0 ) | ( e_ > 1.0 )
+        sub  = err[rows]
+        sub[ ( sub == 0 ) & bad ] = ERR_PECC
+        err[rows] = sub
+        ep, xincp, nodep, argpp, mp = ep.copy(), xincp.copy(), nodep.copy(), argpp.copy(), mp.copy()
+        ep[rows], xincp[rows], nodep[rows], argpp[rows], mp[rows] = e_, i_, n_, a_, m_
+        si, ci       = np.sin( i_ ), np.cos( i_ )
+        sinip, cosip = sinip.copy(), cosip.copy()
+        sinip[rows], cosip[rows] = si, ci
+        aycof[rows]  = -0.5 * J3OJ2 * si
+        xlcof[rows]  = -0.25 * J3OJ2 * si * ( 3.0 + 5.0 * ci ) / np.where( np.abs( ci + 1.0 ) > TEMP4, 1.0 + ci, TEMP4 )
+        con41[rows]  = 3.0 * ci * ci - 1.0
+        x1mth2[rows] = 1.0 - ci * ci
+        x7thm1[rows] = 7.0 * ci * ci - 1.0
+
+    # ------------------------- long period periodics, Kepler's equation
+    axnl    = ep * np.cos( argpp )
+    temp    = 1.0 / ( am * ( 1.0 - ep * ep ) )
+    aynl    = ep * np.sin( argpp ) + temp * aycof
+    xl      = mp + argpp + nodep + temp * xlcof * axnl
+    u       = np.mod( xl - nodep, TWOPI )
+    eo1     = u.copy()
+    tem5    = np.full( shape, 9999.9 )
+    sineo1  = np.zeros( shape )
+    coseo1  = np.zeros( shape )
+    for ktr in range( 10 ):
+        act = np.abs( tem5 ) >= 1.0e-12
+        if not np.any( act ):
+            break
+        s, c   = np.sin( eo1 ), np.cos( eo1 )
+        sineo1 = np.where( act, s, sineo1 )
+        coseo1 = np.where( act, c, coseo1 )
+        d      = np.clip( ( u - aynl * c + axnl * s - eo1 ) / ( 1.0 - c * axnl - s * aynl ), -0.95, 0.95 )
+        tem5   = np.where( act, d, tem5 )
+        eo1    = np.where( act, eo1 + d, eo1 )
+
+    # ------------------------- short period periodics
+    ecose   = axnl * coseo1 + aynl * sineo1
+    esine   = axnl * sineo1 - aynl * coseo1
+    el2     = axnl * axnl + aynl * aynl
+    pl      = am * ( 1.0 - el2 )
+    err[ ( err == 0 ) & ( pl < 0.0 ) ] = ERR_SEMILATUS
+    rl      = am * ( 1.0 - ecose )
+    rdotl   = np.sqrt( am ) * esine / rl
+    rvdotl  = np.sqrt( pl ) / rl
+    betal   = np.sqrt( 1.0 - el2 )
+    temp    = esine / ( 1.0 + betal )
+    sinu    = am / rl * ( sineo1 - aynl - axnl * temp )
+    cosu    = am / rl * ( coseo1 - axnl + aynl * temp )
+    su      = np.arctan2( sinu, cosu )
+    sin2u   = ( cosu + cosu ) * sinu
+    cos2u   = 1.0 - 2.0 * sinu * sinu
+    temp    = 1.0 / pl
+    temp1   = 0.5 * J2 * temp
+    temp2   = temp1 * temp
+    mrt     = rl * ( 1.0 - 1.5 * temp2 * betal * con41 ) + 0.5 * temp1 * x1mth2 * cos2u
+    su      = su - 0.25 * temp2 * x7thm1 * sin2u
+    xnode   = nodep + 1.5 * temp2 * cosip * sin2u
+    xinc    = xincp + 1.5 * temp2 * cosip * sinip * cos2u
+    mvt     = rdotl - nm * temp1 * x1mth2 * sin2u / XKE
+    rvdot   = rvdotl + nm * temp1 * ( x1mth2 * cos2u + 1.5 * con41 ) / XKE
+
+    sinsu, cossu = np.sin( su ), np.cos( su )
+    snod, cnod   = np.sin( xnode ), np.cos( xnode )
+    sini, cosi   = np.sin( xinc ), np.cos( xinc )
+    xmx     = -snod * cosi
+    xmy     = cnod * cosi
+    U       = np.stack( ( xmx * sinsu + cnod * cossu, xmy * sinsu + snod * cossu, sini * sinsu ), axis=-1 )
+    V       = np.stack( ( xmx * cossu - cnod * sinsu, xmy * cossu - snod * sinsu, sini * cossu ), axis=-1 )
+    out     = np.empty( shape + (6,) )
+    out[...,:3] = ( mrt * RE_KM )[...,None] * U
+    out[...,3:] = ( mvt[...,None] * U + rvdot[...,None] * V ) * VKMPS
+    err[ ( err == 0 ) & ( mrt < 1.0 ) ] = ERR_DECAYED
+    out[ ( err != 0 ) & ( err != ERR_DECAYED ) ] = np.nan
+    return out, err
+
+# -----------------------------------------------------------------------------------------------------
+def propagate_lines( lines_list, dates, PA, max_elements : int = 2000000 ):
+    '''
+    numpy counterpart of sgp4.propagate_catalog for type 0 / 2 element sets
+
+    returns ( eph (N_sat, N_time, 6) NaN rows where the TLE wasn't handled, errors { index : message } )
+    '''
+    from . import sgp4
+    ds50          = np.asarray( sgp4.ds50_from_dates( dates ), dtype=np.float64 )
+    E, idx, errors = Sgp4Elements.from_lines( lines_list, PA )
+    eph           = np.full( ( len( lines_list ), ds50.shape[0], 6 ), np.nan )
+    if E is not None:
+        eph[ idx ], _ = E.propagate( ds50, max_elements )
+    return eph, errors
@@ -0,0 +1,295 @@
+# ###############################################################################
+# MIT License
+
+# Copyright (c) 2025 Kerry N. Wood (kerry.wood@asterism.ai)
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ###############################################################################
+
+import os
+import ctypes
+import hashlib
+import numpy as np
+
+# =====================================================================================================
+# In-process copy of the timing constants the TimeFuncDll uses (TAI-UTC, UT1-UTC, UT1 rate, polar
+# motion).  Every UTC -> UT1 / TAI / ET conversion in the package used to be one ctypes call per value;
+# with the table in numpy we can do a whole ds50 vector with a searchsorted and a multiply.
+#
+# The table is always checked against the TimeFuncDll before we use it (see `get_engine`); if it
+# doesn't agree we fall back to the per-value DLL calls.
+#
+# Record layout (one per line, anything that doesn't parse is skipped):
+#     yyddd   TAI-UTC (s)   UT1-UTC (s)   UT1 rate (ms/day)   polar x (arcsec)   polar y (arcsec)
+# =====================================================================================================
+
+# ET (TT) is a fixed offset from TAI
+TT_MINUS_TAI = 32.184
+
+# -----------------------------------------------------------------------------------------------------
+def yyddd_to_ds50( yyddd : float ):
+    '''
+    astrostandard 5 digit date (2 digit year; 57-99 is 1900's) to ds50 UTC
+    '''
+    yy   = int( yyddd // 1000 )
+    ddd  = yyddd - yy * 1000
+    year = 1900 + yy if yy >= 57 else 2000 + yy
+    # whole days from 1950 to Jan 1 of that year (ds50 is 1-indexed, and so is day of year)
+    days = ( np.datetime64( '{:04d}-01-01'.format(year), 'D' ) - np.datetime64( '1950-01-01', 'D' ) ).astype( int )
+    return days + ddd
+
+# -----------------------------------------------------------------------------------------------------
+def parse_record( line : str ):
+    flds = line.split()
+    if len( flds ) < 6 :
+        return None
+    try:
+        vals = [ float(X) for X in flds[:6] ]
+    except ValueError:
+        return None
+    if not ( 0 < vals[0] < 100000 ):
+        return None
+    return [ yyddd_to_ds50( vals[0] ) ] + vals[1:]
+
+# -----------------------------------------------------------------------------------------------------
+class TimeConstants:
+    '''
+    sorted arrays of timing constant records; each record holds from its reference time until the next
+    '''
+    def __init__( self, ref_ds50, tai_utc, ut1_utc, ut1_rate, polar_x, polar_y, source=None ):
+        order          = np.argsort( ref_ds50, kind='stable' )
+        self.ref_ds50  = np.asarray( ref_ds50, dtype=np.float64 )[ order ]
+        self.tai_utc   = np.asarray( tai_utc,  dtype=np.float64 )[ order ]
+        self.ut1_utc   = np.asarray( ut1_utc,  dtype=np.float64 )[ order ]
+        self.ut1_rate  = np.asarray( ut1_rate, dtype=np.float64 )[ order ]
+        self.polar_x   = np.asarray( polar_x,  dtype=np.float64 )[ order ]
+        self.polar_y   = np.asarray( polar_y,  dtype=np.float64 )[ order ]
+        self.source    = source
+        assert self.ref_ds50.shape[0] > 0
+
+    @classmethod
+    def from_file( cls, filename : str ):
+        with open( filename, 'r' ) as F:
+            recs = [ parse_record( L ) for L in F ]
+        recs = np.array( [ R for R in recs if R is not None ], dtype=np.float64 )
+        if recs.shape[0] == 0 :
+            return None
+        return cls( *recs.T, source=filename )
+
+    @classmethod
+    def from_dll( cls, INTERFACE ):
+        '''
+        pull the records back out of the TimeFuncDll (daily) instead of parsing the file ourselves
+        '''
+        nrecs = ctypes.c_int()
+        first = ctypes.c_double()
+        last  = ctypes.c_double()
+        INTERFACE.TimeFuncDll.TConTimeSpan( nrecs, first, last )
+        if nrecs.value <= 0 :
+            return None
+        ref   = np.arange( np.floor( first.value ), np.floor( last.value ) + 1 )
+        recs  = np.zeros( (ref.shape[0], 5) )
+        holders = [ ctypes.c_double() for i in range(5) ]
+        for i,X in enumerate( ref ):
+            INTERFACE.TimeFuncDll.UTCToTConRec( X, *holders )
+            recs[i] = [ H.value for H in holders ]
+        return cls( ref, *recs.T, source='TimeFuncDll' )
+
+    # ------------------------------------------------------------------------------------------------
+    def _index( self, ds50_utc ):
+        idx = np.searchsorted( self.ref_ds50, ds50_utc, side='right' ) - 1
+        return np.clip( idx, 0, self.ref_ds50.shape[0] - 1 )
+
+    def tai_minus_utc( self, ds50_utc ):
+        ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+        return self.tai_utc[ self._index( ds50_utc ) ]
+
+    def ut1_minus_utc( self, ds50_utc ):
+        # carry the record forward with its rate (rate is ms / day); this keeps leap seconds out of the
+        # interpolation, which a straight np.interp across records would smear
+        ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+        idx      = self._index( ds50_utc )
+        dt       = np.maximum( ds50_utc - self.ref_ds50[ idx ], 0. )
+        return self.ut1_utc[ idx ] + self.ut1_rate[ idx ] * dt / 1000.
+
+    def polar_motion( self, ds50_utc ):
+        ''' polar motion (x,y) in arcsec, linearly interpolated between records '''
+        ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+        return ( np.interp( ds50_utc, self.ref_ds50, self.polar_x ),
+                 np.interp( ds50_utc, self.ref_ds50, self.polar_y ) )
+
+    def utc_to_tai( self, ds50_utc ):
+        return np.asarray( ds50_utc, dtype=np.float64 ) + self.tai_minus_utc( ds50_utc ) / 86400.
+
+    def utc_to_ut1( self, ds50_utc ):
+        return np.asarray( ds50_utc, dtype=np.float64 ) + self.ut1_minus_utc( ds50_utc ) / 86400.
+
+    def utc_to_et( self, ds50_utc ):
+        return np.asarray( ds50_utc, dtype=np.float64 ) + ( self.tai_minus_utc( ds50_utc ) + TT_MINUS_TAI ) / 86400.
+
+    # ------------------------------------------------------------------------------------------------
+    def validate( self, INTERFACE, ds50_utc=None, tol=1e-9 ):
+        '''
+        compare against the TimeFuncDll (tol in days) at the record times, half-way between them, and
+        a bit past the end of the table; returns the max error seen (or inf if we are out of tolerance)
+        '''
+        if ds50_utc is None:
+            ds50_utc = np.hstack( ( self.ref_ds50, self.ref_ds50 + 0.5, self.ref_ds50[-1] + np.arange(1,30) ) )
+        TF   = INTERFACE.TimeFuncDll
+        pairs = ( ( self.utc_to_tai, TF.UTCToTAI ),
+                  ( self.utc_to_ut1, TF.UTCToUT1 ),
+                  ( self.utc_to_et,  TF.UTCToET ) )
+        err  = 0.
+        for ours, theirs in pairs:
+            dll = np.fromiter( ( theirs(X) for X in ds50_utc ), dtype=np.float64, count=len(ds50_utc) )
+            err = max( err, np.max( np.abs( ours( ds50_utc ) - dll ) ) )
+        return err if err < tol else np.inf
+
+
+# =====================================================================================================
+# module state : the engine for whatever file astro_time.load_time_constants last loaded
+# =====================================================================================================
+_LOADED = { 'filename' : None, 'generation' : 0, 'engine' : None, 'checked' : False, 'digest' : None }
+
+# -----------------------------------------------------------------------------------------------------
+def on_load( filename : str ):
+    '''
+    called by astro_time.load_time_constants (every load, even of the same path : update_time_constants
+    rewrites the file in place); drops any engine built from what was loaded before
+    '''
+    _LOADED['filename']   = os.path.abspath( filename ) if filename else None
+    _LOADED['generation'] += 1
+    _LOADED['engine']     = None
+    _LOADED['checked']  = False
+    _LOADED['digest']   = None
+
+# -----------------------------------------------------------------------------------------------------
+def loaded_file():
+    return _LOADED['filename']
+
+# -----------------------------------------------------------------------------------------------------
+def generation():
+    ''' bumped on every load; caches of anything derived from the time constants compare against it '''
+    return _LOADED['generation']
+
+# -----------------------------------------------------------------------------------------------------
+def file_digest():
+    ''' sha1 of the loaded time constants file (computed once per load); None if nothing is loaded '''
+    if _LOADED['filename'] is None:
+        return None
+    if _LOADED['digest'] is None:
+        with open( _LOADED['filename'], 'rb' ) as F:
+            _LOADED['digest'] = hashlib.sha1( F.read() ).hexdigest()
+    return _LOADED['digest']
+
+# -----------------------------------------------------------------------------------------------------
+def get_engine( INTERFACE=None ):
+    '''
+    return the TimeConstants for the loaded file (built once), or None if nothing is loaded or it
+    doesn't match the DLL.  The first call with an INTERFACE checks the table against the DLL; if our
+    parse of the file is off we try rebuilding from the DLL records before giving up.
+    '''
+    if _LOADED['filename'] is None:
+        return None
+    if _LOADED['engine'] is None and not _LOADED['checked']:
+        try:
+            _LOADED['engine'] = TimeConstants.from_file( _LOADED['filename'] )
+        except Exception as e:
+            print('Could not parse time constants from : {}'.format( _LOADED['filename'] ) )
+            print(e)
+    if INTERFACE is not None and not _LOADED['checked']:
+        _LOADED['checked'] = True
+        E = _LOADED['engine']
+        if E is None or not np.isfinite( E.validate( INTERFACE ) ):
+            try:
+                E = TimeConstants.from_dll( INTERFACE )
+                E = E if E is not None and np.isfinite( E.validate( INTERFACE ) ) else None
+            except Exception as e:
+                print(e)
+                E = None
+        _LOADED['engine'] = E
+    if not _LOADED['checked']:
+        # never hand out a table that hasn't been checked against the DLL
+        return None
+    return _LOADED['engine']
+
+# -----------------------------------------------------------------------------------------------------
+def _bulk( method, dll_name, ds50_utc, INTERFACE ):
+    ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+    E        = get_engine( INTERFACE )
+    if E is not None:
+        return getattr( E, method )( ds50_utc )
+    F = getattr( INTERFACE.TimeFuncDll, dll_name )
+    return np.fromiter( ( F(X) for X in ds50_utc ), dtype=np.float64, count=ds50_utc.shape[0] )
+
+# -----------------------------------------------------------------------------------------------------
+def utc_to_tai( ds50_utc, INTERFACE ):
+    return _bulk( 'utc_to_tai', 'UTCToTAI', ds50_utc, INTERFACE )
+
+# -----------------------------------------------------------------------------------------------------
+def utc_to_ut1( ds50_utc, INTERFACE ):
+    return _bulk( 'utc_to_ut1', 'UTCToUT1', ds50_utc, INTERFACE )
+
+# -----------------------------------------------------------------------------------------------------
+def utc_to_et( ds50_utc, INTERFACE ):
+    return _bulk( 'utc_to_et', 'UTCToET', ds50_utc, INTERFACE )
+
+# -----------------------------------------------------------------------------------------------------
+def polar_motion( ds50_utc, INTERFACE ):
+    ''' polar motion ( x, y ) in arcsec for ds50 UTC times (the table, or UTCToTConRec per value) '''
+    ds50_utc = np.asarray( ds50_utc, dtype=np.float64 )
+    E        = get_engine( INTERFACE )
+    if E is not None:
+        return E.polar_motion( ds50_utc )
+    holders = [ ctypes.c_double() for i in range(5) ]
+    xy      = np.empty( ( ds50_utc.shape[0], 2 ) )
+    for i, X in enumerate( ds50_utc ):
+        INTERFACE.TimeFuncDll.UTCToTConRec( X, *holders )
+        xy[i] = holders[3].value, holders[4].value
+    return xy[:,0], xy[:,1]
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import pandas as pd
+    import public_astrostandards as PA
+    from . import astro_time
+    from . import utils
+
+    PA.init_all()
+    astro_time.load_time_constants( utils.get_test_time_constants(), PA )
+
+    E = get_engine( PA )
+    assert E is not None
+    print('Time constants from : {} ({} records)'.format( E.source, E.ref_ds50.shape[0] ) )
+
+    # compare on a dense grid
+    dates = pd.date_range( '2025-6-1', '2026-1-1', freq='17min' )
+    ds50  = astro_time.datetime64_to_ds50( astro_time.to_datetime64( dates ) )
+    for ours, theirs in ( ( E.utc_to_tai, PA.TimeFuncDll.UTCToTAI ),
+                          ( E.utc_to_ut1, PA.TimeFuncDll.UTCToUT1 ),
+                          ( E.utc_to_et,  PA.TimeFuncDll.UTCToET ) ):
+        dll = np.array( [ theirs(X) for X in ds50 ] )
+        err = np.max( np.abs( ours( ds50 ) - dll ) ) * 86400
+        print('{:20s} max error vs TimeFuncDll : {:e} s'.format( theirs.__name__, err ) )
+        assert err < 1e-4
+
+
+# =====================================================================================================
+if __name__ == '__main__':
+    test()
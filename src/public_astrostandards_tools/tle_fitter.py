@@ -1,5 +1,6 @@
 import numpy as np
 from . import orbit_utils
+from . import sgp4
 
 # what fields will we optimize over?  This doubles as a field accessor list for the optimizer..
 FIT_TYPE4 = [
@@ -45,9 +46,8 @@ FIELDS = FIT_TYPE0
 
 # -----------------------------------------------------------------------------------------------------
 def XA_TLE_to_str( XA_TLE, PA ):
-    PA.TleDll.TleRemoveAllSats()
-    XS_TLE =  PA.Cstr('',512)
-    tleid = PA.TleDll.TleAddSatFrArray( XA_TLE.data, XS_TLE )
+    # load through the registry (nothing else loaded gets cleared)
+    tleid = sgp4.get_registry( PA ).array_key( XA_TLE, init=False )
     assert tleid > 0
     outL1, outL2 = PA.Cstr('',512), PA.Cstr('',512)
     assert PA.TleDll.TleGetLines( tleid, outL1, outL2 ) == 0
@@ -55,9 +55,8 @@ def XA_TLE_to_str( XA_TLE, PA ):
 
 # -----------------------------------------------------------------------------------------------------
 def TLE_str_to_XA_TLE( L1 : str, L2 : str , PA ):
-    # load the TLE
-    PA.TleDll.TleRemoveAllSats()
-    tleid = PA.TleDll.TleAddSatFrLines( PA.Cstr(L1,512), PA.Cstr(L2,512) )
+    # load the TLE (or find it already loaded)
+    tleid = sgp4.get_registry( PA ).lines_key( L1, L2, init=False )
     if tleid <=0 : 
         return None
     XA_TLE = PA.helpers.astrostd_named_fields( PA.TleDll, prefix='XA_TLE_') 
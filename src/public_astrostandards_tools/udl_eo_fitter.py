@@ -11,19 +11,17 @@ from . import residuals
 
 # -----------------------------------------------------------------------------------------------------
 def optFunction( X, EH, return_scalar=True ):
-    XS_TLE  = EH.PA.Cstr('',512)
     # take the function parameters (X) and overwrite the "new_tle" values based on FIELDS 
     for k,v in zip(EH.FIELDS,X) : 
         EH.new_tle[ k ] = v
-    # --------------------- clear state
-    EH.PA.TleDll.TleRemoveAllSats()
-    EH.PA.Sgp4PropDll.Sgp4RemoveAllSats()
+    # --------------------- drop the previous trial only (everything else stays loaded)
+    REG = sgp4.get_registry( EH.PA )
+    if getattr( EH, 'trial_key', 0 ) > 0 :
+        REG.discard( EH.trial_key )
     # --------------------- init our test TLE from the modified data
-    tleid = EH.PA.TleDll.TleAddSatFrArray( EH.new_tle.data, XS_TLE )
+    tleid = EH.trial_key = REG.array_key( EH.new_tle )
     if tleid <= 0: 
         return np.inf
-    if EH.PA.Sgp4PropDll.Sgp4InitSat( tleid ) != 0: 
-        return np.inf
     # --------------------- generate our test ephemeris
     target_frame  = sgp4.propTLE_byID_df( tleid, EH.date_f, EH.PA )
     # --------------------- generate looks from our sensor positinos
@@ -51,9 +49,8 @@ class eo_fitter( tle_fitter.tle_fitter ):
 
     def _move_epoch( self, epoch ):
         ''' assume that epoch is set, and that line1, line2 are also set '''
-        self.PA.TleDll.TleRemoveAllSats()
-        tleid = sgp4.addTLE( self.line1, self.line2, self.PA )
-        assert sgp4.initTLE( tleid, self.PA )
+        tleid = sgp4.get_registry( self.PA ).lines_key( self.line1, self.line2 )
+        assert tleid > 0
         rv    = sgp4.propTLEToDS50s( tleid, [ epoch ], self.PA )[0]
         rv    = { 'teme_p' : rv[1:4], 'teme_v' : rv[4:7], 'ds50_utc' : self.epoch_ds50 }
         return rv
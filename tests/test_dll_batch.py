@@ -0,0 +1,36 @@
+import ctypes
+import numpy as np
+
+# a stand-in for a DLL function : f( scale, t, in[3], out[3], &norm ) -> int
+PD     = ctypes.POINTER( ctypes.c_double )
+FTYPE  = ctypes.CFUNCTYPE( ctypes.c_int, ctypes.c_int, ctypes.c_double, PD, PD, PD )
+
+@FTYPE
+def _fake( scale, t, vin, vout, norm ):
+    for k in range( 3 ):
+        vout[k] = scale * t * vin[k]
+    norm[0] = sum( vin[k] ** 2 for k in range( 3 ) ) ** 0.5
+    return int( t ) % 2
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+
+    rng  = np.random.default_rng( 3 )
+    t    = rng.uniform( 0, 10, 1000 )
+    v    = rng.normal( size=(1000,3) )
+
+    call = PAT.dll_batch.BatchCall( _fake, ( 2, 'i', 'i3', 'o3', 'o' ), returns=np.int32 )
+    ret, out, norm = call( t, v )
+    assert out.shape == (1000,3) and out.flags['C_CONTIGUOUS']
+    assert np.allclose( out, 2 * t[:,None] * v )
+    assert np.allclose( norm, np.linalg.norm( v, axis=1 ) )
+    assert np.array_equal( ret, t.astype( int ) % 2 )
+
+    # the holders are re-used : a second call on different data is independent of the first
+    out2 = PAT.dll_batch.BatchCall( _fake, ( 3, 'i', 'i3', 'o3', 'o' ) )( t[:10], v[:10] )[0]
+    assert np.allclose( out2, 3 * t[:10,None] * v[:10] )
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
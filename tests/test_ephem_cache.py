@@ -0,0 +1,70 @@
+import tempfile
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards as PA
+    import public_astrostandards_tools as PAT
+
+    ISS = ('1 25544U 98067A   25357.18166772  .00011641  00000-0  21351-3 0  9998','2 25544  51.6323  90.7678 0003190 289.6661  70.3984 15.49746572544475')
+    PA.init_all( )
+    PAT.astro_time.load_time_constants(  PAT.utils.get_test_time_constants(), PA )
+    dates_f = PAT.astro_time.convert_times( pd.date_range( '2025-12-23', '2025-12-25', freq='1min' ), PA )
+
+    with tempfile.TemporaryDirectory() as D:
+        C = PAT.ephem_cache.enable( D, max_bytes=600000 )
+        try:
+            first  = PAT.sgp4.propTLE_df( dates_f.copy(), *ISS, PA )
+            second = PAT.sgp4.propTLE_df( dates_f.copy(), *ISS, PA )
+            assert C.misses == 1 and C.hits == 1 and C.stores == 1
+            assert np.array_equal( np.vstack( first['teme_p'] ), np.vstack( second['teme_p'] ) )
+
+            # a hit is the memmap itself
+            key = PAT.sgp4.get_registry( PA ).lines_key( *ISS )
+            hit = PAT.sgp4.propTLEToDS50s( key, dates_f['ds50_utc'], PA, lines=ISS )
+            assert isinstance( hit, np.memmap ) and not hit.flags['WRITEABLE']
+
+            # a different grid is a different entry
+            PAT.sgp4.propTLE_df( dates_f.iloc[::2].copy(), *ISS, PA )
+            assert C.stats()['entries'] == 2
+
+            # over the cap : least recently used goes first
+            PAT.sgp4.propTLE_df( PAT.astro_time.convert_times( pd.date_range( '2025-12-23', '2025-12-30', freq='1min' ), PA ), *ISS, PA )
+            assert C.size() <= C.max_bytes and C.evictions > 0
+            print( C.stats() )
+        finally:
+            PAT.ephem_cache.disable()
+
+# -----------------------------------------------------------------------------------------------------
+def test_store():
+    # no DLL : the cache on its own
+    import os, time
+    import public_astrostandards_tools as PAT
+
+    with tempfile.TemporaryDirectory() as D:
+        block = np.arange( 7000, dtype=np.float64 ).reshape( 1000, 7 )
+        C     = PAT.ephem_cache.EphemerisCache( D, max_bytes=3 * block.nbytes + 1000 )
+        # under the cap, a store doesn't list the directory
+        listed = []
+        files  = C._files
+        C._files = lambda : listed.append( 1 ) or files()
+        for k in range( 3 ):
+            assert C.store( 'k{}'.format( k ), block + k )
+            os.utime( C._path( 'k{}'.format( k ) ), ( time.time() + k, time.time() + k ) )
+        assert not listed and C._bytes == C.size()
+
+        # the fourth is over the cap : the oldest goes
+        assert C.load( 'k0' ) is not None
+        os.utime( C._path( 'k0' ), ( time.time() + 10, time.time() + 10 ) )
+        C.store( 'k3', block )
+        assert listed and C._bytes == C.size() <= C.max_bytes
+        assert 'k1' not in C and 'k0' in C and 'k3' in C
+
+        C.clear()
+        assert C._bytes == 0 and C.size() == 0
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
+    test_store()
@@ -0,0 +1,51 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+
+    # a frame shaped like propTLE_df output (no DLL needed)
+    N     = 20000
+    dates = pd.Series( pd.date_range( '2025-12-23', periods=N, freq='1min', tz='UTC' ) )
+    rng   = np.random.default_rng( 1 )
+    P, V  = rng.normal( size=(N,3) ) * 7000, rng.normal( size=(N,3) ) * 7
+    df    = pd.DataFrame( { 'datetime' : dates,
+                            'ds50_utc' : PAT.astro_time.datetime64_to_ds50( PAT.astro_time.to_datetime64( dates ) ),
+                            'teme_p'   : P.tolist(),
+                            'teme_v'   : V.tolist() } )
+
+    E = PAT.ephemeris.Ephemeris.from_pandas( df )
+    assert E['teme_p'].shape == (N,3) and E['teme_p'].flags['C_CONTIGUOUS']
+    assert np.array_equal( E['teme_p'], P ) and np.array_equal( E['teme_v'], V )
+
+    # zero-copy slices
+    S = E[ 100:200 ]
+    assert len( S ) == 100 and np.shares_memory( S['teme_p'], E['teme_p'] )
+    assert S.datetime[0] == dates[100]
+
+    # back to the frame the rest of the package takes
+    back = E.to_pandas()
+    assert list( back.columns ) == list( df.columns )
+    assert back['datetime'].equals( df['datetime'] )
+    assert np.array_equal( np.vstack( back['teme_p'] ), P )
+
+    # memory : a list cell is a list object plus a float object per component (pandas' deep count
+    # only sees the lists); float64 arrays are ~6x smaller, float32 ~12x
+    cell        = lambda L : sys.getsizeof( L ) + sum( sys.getsizeof( X ) for X in L )
+    frame_bytes = sum( cell( L ) for K in ( 'teme_p', 'teme_v' ) for L in df[K] ) + 2 * 8 * N
+    E32         = E.astype( np.float32 )
+    print( 'frame {:.1f} MB, Ephemeris {:.1f} MB, float32 {:.1f} MB'.format( 
+                frame_bytes / 2**20, E.nbytes / 2**20, E32.nbytes / 2**20 ) )
+    assert frame_bytes > 5 * E.nbytes and frame_bytes > 8 * E32.nbytes
+
+    # a bare ds50 array (as propTLE_ephemeris takes) : times only, no datetime
+    eph = np.hstack( ( df[['ds50_utc']].values, P, V ) )
+    A   = PAT.ephemeris.Ephemeris.from_propagation( df['ds50_utc'].values, eph )
+    assert A.datetime is None and np.array_equal( A.ds50_utc, df['ds50_utc'].values )
+    assert np.array_equal( A['teme_v'], V ) and 'datetime' not in A.to_pandas()
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,30 @@
+import ctypes
+from types import SimpleNamespace
+import numpy as np
+
+# a satellite Hermite can't follow at any step we'd try : a 1 s wiggle on top of straight-line motion
+def _wiggle( key, ds50, pos, vel ):
+    t = ( ds50 - 27000. ) * 86400.
+    for k in range( 3 ):
+        pos[k] = 7000. + 7. * t + 10. * np.sin( 2 * np.pi * t + k )
+        vel[k] = 7. + 20. * np.pi * np.cos( 2 * np.pi * t + k )
+    return 0
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+
+    PA   = SimpleNamespace( ctypes=ctypes, Sgp4PropDll=SimpleNamespace( Sgp4PropDs50UtcPosVel=_wiggle ) )
+    ds50 = 27000. + np.arange( 40 ) * 0.7 / 86400.
+
+    # halving runs into the 'not worth it' cut-off : the answer is direct propagation, and info says so
+    out, info = PAT.sgp4.propTLEToDS50s_hermite( 1, ds50, PA, step=10., tol_km=1e-3 )
+    direct    = PAT.sgp4.propTLEToDS50s( 1, ds50, PA )
+    assert np.array_equal( out, direct )
+    assert info['pos_bound_km'] == 0. and info['vel_bound_kms'] == 0.
+    assert info['dll_calls'] == info['direct_calls'] == len( ds50 )
+    assert info['step_s'] < 10.
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
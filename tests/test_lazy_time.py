@@ -0,0 +1,43 @@
+import ctypes
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+    AT = PAT.astro_time
+
+    # no time constants file : the offsets come from the (fake) TimeFuncDll
+    PAT.time_constants.on_load( None )
+    calls = []
+    ut1   = lambda X : calls.append( X ) or X + 0.1 / 86400.
+    PA    = SimpleNamespace( ctypes      = ctypes,
+                             TimeFuncDll = SimpleNamespace( UTCToUT1       = ut1,
+                                                            UTCToET        = lambda X : X + 69.184 / 86400.,
+                                                            UTCToTAI       = lambda X : X + 37. / 86400.,
+                                                            ThetaGrnwchFK5 = lambda X : float( AT.theta_grnwch_fk5( X ) ) ) )
+
+    dates = pd.date_range( '2025-12-23', periods=50, freq='1min' )
+    df    = AT.convert_times( dates, PA, lazy=True )
+    assert 'theta' not in df.columns and 'theta' in df and 'ds50_et' in df
+    assert 'bogus' not in df
+
+    # membership checks now read the lazy column instead of recomputing
+    theta = PAT.coordinates._theta_for( df, PA )
+    assert 'theta' in df.columns and np.array_equal( theta, df['theta'].values )
+    n = len( calls )
+    PAT.coordinates._theta_for( df, PA )
+    assert len( calls ) == n
+
+    # without its INTERFACE (as after a concat) the lazy fields aren't offered, but anything already
+    # computed still is
+    lone = AT.convert_times( dates, PA, lazy=True )
+    lone['ds50_ut1']
+    lone._interface = None
+    assert isinstance( lone, AT.LazyTimeFrame )
+    assert 'ds50_ut1' in lone and 'theta' not in lone and 'ds50_et' not in lone
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,44 @@
+# ====================================================================================================
+# benchmark : serial propTLE_df loop vs. the process-pool propagator at 1..N workers
+# ====================================================================================================
+import os
+import time
+import numpy as np
+import pandas as pd
+import public_astrostandards as PA
+import public_astrostandards_tools as PAT
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    PA.init_all()
+    PAT.astro_time.load_time_constants( PAT.utils.get_test_time_constants(), PA )
+
+    # build a fake catalog by spreading ISS around in mean anomaly (unique satnos)
+    L1 = '1 25544U 98067A   25357.18166772  .00011641  00000-0  21351-3 0  9998'
+    L2 = '2 25544  51.6323  90.7678 0003190 289.6661  70.3984 15.49746572544475'
+    TF = PAT.tle_fitter.tle_fitter( PA ).set_from_lines( L1, L2 )
+    catalog = PAT.perturb_tle.anomaly_TLE( TF, 400, 60000 )
+
+    dates   = PAT.astro_time.convert_times( pd.date_range( '2025-12-23', '2025-12-24', freq='1min' ), PA )
+    print('{} TLEs x {} times'.format( len(catalog), dates.shape[0] ) )
+
+    # serial reference
+    t0 = time.time()
+    serial = np.stack( [ np.hstack( ( np.vstack( F['teme_p'] ), np.vstack( F['teme_v'] ) ) ) 
+                        for F in ( PAT.sgp4.propTLE_df( dates.copy(), *X, PA ) for X in catalog ) ] )
+    t_serial = time.time() - t0
+    print('serial propTLE_df : {:8.2f} s'.format( t_serial ) )
+
+    workers = 1
+    while workers <= os.cpu_count():
+        t0 = time.time()
+        eph, errors = PAT.parallel.propagate_catalog( catalog, dates, workers=workers )
+        dt = time.time() - t0
+        assert not errors
+        assert np.max( np.abs( eph - serial ) ) < 1e-9
+        print('{:3d} workers       : {:8.2f} s  ({:5.1f}x)'.format( workers, dt, t_serial / dt ) )
+        workers *= 2
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
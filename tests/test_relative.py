@@ -0,0 +1,64 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------------
+def _kepler( r0, v0, t, mu=398600.4418 ):
+    # circular-orbit stand-in for a propagator : rotate r0 / v0 about h at the mean motion
+    h = np.cross( r0, v0 )
+    k = h / np.linalg.norm( h )
+    n = np.linalg.norm( v0 ) / np.linalg.norm( r0 )
+    a = n * t[:,None]
+    rot = lambda X : X * np.cos( a ) + np.cross( k, X ) * np.sin( a ) + k * ( k @ X ) * ( 1 - np.cos( a ) )
+    return rot( r0 ), rot( v0 )
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+    R = PAT.relative
+
+    rng    = np.random.default_rng( 7 )
+    r0     = np.array( [ 7000., 0., 0. ] )
+    v0     = np.array( [ 0., 7.5460491 * np.cos( .9 ), 7.5460491 * np.sin( .9 ) ] )
+    t      = np.linspace( 0, 5400, 50 )
+    cp, cv = _kepler( r0, v0, t )
+
+    # the orthonormal basis is right handed and matches getUVW's axes
+    B = R.basis( cp, cv, convention='orthonormal' )
+    assert B.shape == ( 50, 3, 3 )
+    assert np.allclose( np.einsum( 'mij,mkj->mik', B, B ), np.eye( 3 ) )
+    assert np.allclose( np.linalg.det( B ), 1 )
+    assert np.allclose( B[:,0], cp / np.linalg.norm( cp, axis=1 )[:,None] )
+    assert np.allclose( R.basis( cp, cv, 'UVW' ), B )
+    N = R.basis( cp, cv, 'NTW' )
+    assert np.allclose( N[:,1], cv / np.linalg.norm( cv, axis=1 )[:,None] )
+
+    # the default (legacy) RIC is getRIC's : R = r/|r|, I = v/|v|, C = I x R; eccentric state
+    P, V       = np.array( [ 7000., 300., 100. ] ), np.array( [ 1.2, 8.1, 2.0 ] )
+    Ri, Ii, Ci = PAT.orbit_utils.getRIC( { 'teme_p' : P, 'teme_v' : V } )
+    uR, uI     = P / np.linalg.norm( P ), V / np.linalg.norm( V )
+    assert np.allclose( Ri, uR ) and np.allclose( Ii, uI ) and np.allclose( Ci, np.cross( uI, uR ) )
+    assert np.allclose( R.basis( P, V ), np.vstack( ( Ri, Ii, Ci ) ) )
+    # perturbTLE's offsets : V + dR R + dI I + dC C
+    dV     = np.array( [ [ .1, .2, .3 ], [ 0., 0., 1. ] ] )[:,None,:]
+    _, nV  = R.to_inertial( P[None], V[None], np.zeros_like( dV ), dV )
+    assert np.allclose( nV[:,0], V + dV[:,0,0,None] * Ri + dV[:,0,1,None] * Ii + dV[:,0,2,None] * Ci )
+
+    # N deputies : offsets round trip through to_inertial in either convention
+    rho  = rng.normal( size=( 4, 50, 3 ) )
+    rhod = rng.normal( size=( 4, 50, 3 ) ) * 1e-3
+    for convention, rotating in ( ( 'legacy', False ), ( 'orthonormal', False ), ( 'orthonormal', True ) ):
+        dp, dv = R.to_inertial( cp, cv, rho, rhod, rotating=rotating, convention=convention )
+        assert dp.shape == ( 4, 50, 3 )
+        p2, v2 = R.relative_state( cp, cv, dp, dv, rotating=rotating, convention=convention )
+        assert np.allclose( p2, rho ) and np.allclose( v2, rhod )
+
+    # a deputy on the same circular orbit, a little ahead, sits still in the rotating frame
+    dp, dv = _kepler( r0, v0, t + 10. )
+    p, v   = R.relative_state( cp, cv, dp, dv, rotating=True, convention='orthonormal' )
+    assert np.allclose( p, p[0], atol=1e-8 )
+    assert np.allclose( v, 0, atol=1e-9 )
+    _, vi  = R.relative_state( cp, cv, dp, dv, convention='orthonormal' )
+    assert not np.allclose( vi, 0, atol=1e-6 )
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
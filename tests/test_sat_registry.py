@@ -0,0 +1,122 @@
+import ctypes
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+L1 = '1 25544U 98067A   24365.67842578  .00016717  00000-0  10270-3 0  9994'
+L2 = '2 25544  51.6404  61.8250 0005853  25.4579 117.0387 15.50482079489028'
+B1 = '1 25545U 98067A   24365.67842578  .00016717  00000-0  10270-3 0  9995'
+B2 = '2 25545  51.6404  61.8250 0005853  25.4579 117.0387 15.50482079489029'
+
+# -----------------------------------------------------------------------------------------------------
+class _FakeDLL:
+    '''
+    stands in for TleDll / Sgp4PropDll : one satellite per set of lines (a duplicate load gives 0, 
+    like the real thing), satellite 25545 won't init, and anything starting '1 garbage' won't load
+    '''
+    def __init__( self ):
+        self.loaded = {}     # key -> ( L1, L2 )
+        self.inited = set()
+        self.next   = 1
+
+    def TleAddSatFrLines( self, C1, C2 ):
+        lines = ( C1.value.decode(), C2.value.decode() )
+        if lines[0].startswith( '1 garbage' ) or lines in self.loaded.values():
+            return 0
+        key = self.next = self.next + 1
+        self.loaded[ key ] = lines
+        return key
+
+    def TleRemoveSat( self, key ):
+        self.loaded.pop( key, None )
+
+    def Sgp4InitSat( self, key ):
+        if key not in self.loaded or '25545' in self.loaded[ key ][0]:
+            return 1
+        self.inited.add( key )
+        return 0
+
+    def Sgp4RemoveSat( self, key ):
+        self.inited.discard( key )
+
+    def Sgp4PropDs50UtcPosVel( self, key, ds50, pos, vel ):
+        assert key in self.inited
+        for k in range( 3 ):
+            pos[k] = ds50 + k
+            vel[k] = -ds50 - k
+        return 0
+
+def _harness():
+    D = _FakeDLL()
+    return D, SimpleNamespace( ctypes          = ctypes,
+                               Cstr            = lambda S, N : ctypes.create_string_buffer( S.encode(), N ),
+                               TleDll          = D,
+                               Sgp4PropDll     = D,
+                               get_last_errmsg = lambda : 'fake error' )
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+
+    D, PA = _harness()
+    ds50  = np.linspace( 27000., 27001., 11 )
+    keys, eph, errors = PAT.sgp4.propagate_catalog( [ (L1, L2), (B1, B2), ('1 garbage', '2 garbage') ], ds50, PA )
+    assert keys[0] > 0 and keys[1] == 0 and keys[2] == 0
+    assert errors[1].startswith( 'init failed' ) and errors[2].startswith( 'load failed' )
+    # the one that wouldn't init isn't left loaded
+    assert list( D.loaded.values() ) == [ (L1, L2) ]
+    assert np.allclose( eph[0,:,0], ds50 ) and np.isnan( eph[1] ).all()
+
+    # one registry lookup per TLE
+    R = PAT.sgp4.get_registry( PA )
+    assert R.misses == 3 and R.hits == 0
+
+    # the same lines again : the registry hands back the catalog's satellite (no duplicate load)
+    single = PAT.sgp4.propTLE_df( pd.DataFrame( { 'ds50_utc' : ds50 } ), L1, L2, PA )
+    assert R.hits >= 1 and len( D.loaded ) == 1
+    assert np.allclose( np.vstack( single['teme_p'] ), eph[0,:,:3] )
+
+    # discard goes through the registry, so the next load is fresh rather than a stale key
+    R.discard( keys[0] )
+    assert not D.loaded
+    single = PAT.sgp4.propTLE_df( pd.DataFrame( { 'ds50_utc' : ds50 } ), L1, L2, PA )
+    assert len( D.loaded ) == 1 and np.allclose( np.vstack( single['teme_v'] ), eph[0,:,3:] )
+
+# -----------------------------------------------------------------------------------------------------
+def test_catalog_capacity():
+    import public_astrostandards_tools as PAT
+
+    # a catalog bigger than the registry : every key handed back is still loaded
+    D, PA   = _harness()
+    R       = PAT.sgp4.get_registry( PA, capacity=2 )
+    catalog = [ ( L1.replace( '25544', '2560{}'.format( k ) ), L2.replace( '25544', '2560{}'.format( k ) ) ) for k in range( 5 ) ]
+    keys, eph, errors = PAT.sgp4.propagate_catalog( catalog, np.linspace( 27000., 27001., 5 ), PA )
+    assert not errors and R.capacity >= 5
+    assert set( keys.tolist() ) <= D.inited and len( set( keys.tolist() ) ) == 5
+
+# -----------------------------------------------------------------------------------------------------
+def test_cache_by_lines():
+    import tempfile
+    import public_astrostandards_tools as PAT
+
+    # the cache is keyed on the lines handed in, never on a satKey (the DLL re-uses those)
+    D, PA = _harness()
+    ds50  = np.linspace( 27000., 27001., 11 )
+    with tempfile.TemporaryDirectory() as T:
+        C = PAT.ephem_cache.enable( T )
+        try:
+            first = PAT.sgp4.propTLE_df( pd.DataFrame( { 'ds50_utc' : ds50 } ), L1, L2, PA )
+            assert C.misses == 1 and C.stores == 1
+            key   = PAT.sgp4.get_registry( PA ).lines_key( L1, L2 )
+            PAT.sgp4.propTLEToDS50s( key, ds50, PA )
+            assert C.hits == 0 and C.misses == 1
+            hit   = PAT.sgp4.propTLEToDS50s( key, ds50, PA, lines=( L1, L2 ) )
+            assert C.hits == 1 and np.array_equal( hit[:,1:4], np.vstack( first['teme_p'] ) )
+        finally:
+            PAT.ephem_cache.disable()
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test_cache_by_lines()
+    test()
+    test_catalog_capacity()
@@ -0,0 +1,90 @@
+# ====================================================================================================
+# regression : sgp4_numpy against Sgp4PropDs50UtcPosVel over a catalog sample
+#
+# tolerances (over +/- 3 days from epoch) :
+#     near earth : 1 m position, 1 mm/s velocity
+#     deep space : 10 m position, 1 cm/s velocity
+# ====================================================================================================
+import time
+import numpy as np
+import pandas as pd
+
+# near earth, decaying, eccentric, deep space (non-resonant, 12 h resonant, synchronous, low inclination)
+CATALOG = [
+    ('1 25544U 98067A   25357.18166772  .00011641  00000-0  21351-3 0  9998','2 25544  51.6323  90.7678 0003190 289.6661  70.3984 15.49746572544475'),
+    ('1 00005U 58002B   00179.78495062  .00000023  00000-0  28098-4 0  4753','2 00005  34.2682 348.7242 1859667 331.7664  19.3264 10.82419157413667'),
+    ('1 06251U 62025E   06176.82412014  .00008885  00000-0  12808-3 0  3985','2 06251  58.0579  54.0425 0030035 139.1568 221.1854 15.56387291  6774'),
+    ('1 28350U 04020A   06167.21788666  .16154492  76267-5  18678-3 0  8894','2 28350  64.9977 345.6130 0024870 269.9706  90.7985 16.35726396  2109'),
+    ('1 29238U 06022G   06177.28732010  .00766286  10823-4  13334-2 0   101','2 29238  51.5595 213.7903 0202579  95.2503 269.9540 15.73823839  1061'),
+    ('1 04632U 70093B   04031.91070959 -.00000084  00000-0  10000-3 0  9955','2 04632  11.4628 273.1101 1450506 207.6000 143.9350  1.20231981 44145'),
+    ('1 08195U 75081A   06176.33215444  .00000099  00000-0  11873-3 0   813','2 08195  64.1586 279.0717 6877146 264.7651  20.2257  2.00491383225656'),
+    ('1 09880U 77021A   06176.56157475  .00000421  00000-0  10000-3 0  9814','2 09880  64.5968 349.3786 7069051 270.0229  16.3320  2.00813614112380'),
+    ('1 23599U 95029B   06171.76535463  .00085586  12891-6  12956-2 0  2905','2 23599   6.9327   0.2849 5782022 274.4436  25.2425  4.47796565123555'),
+    ('1 24208U 96044A   06177.04061740 -.00000094  00000-0  10000-3 0  1600','2 24208   3.8536  80.0121 0026640 311.0977  48.3000  1.00778054 36119'),
+    ('1 28626U 05008A   06176.46683397 -.00000205  00000-0  10000-3 0  2190','2 28626   0.0019 286.9433 0000335  13.7918  55.6504  1.00270176  4891'),
+    ('1 14128U 83058A   06176.02844893 -.00000158  00000-0  10000-3 0  9627','2 14128  11.4384  35.2134 0011562  26.4582 333.5652  0.98870114 46093'),
+]
+TOL_NEAR = ( 1e-3, 1e-6 )   # km, km/s
+TOL_DEEP = ( 1e-2, 1e-5 )
+
+# -----------------------------------------------------------------------------------------------------
+def dll_eph( L1, L2, ds50, PA, PAT ):
+    key = PAT.sgp4.get_registry( PA ).lines_key( L1, L2 )
+    assert key > 0
+    return PAT.sgp4.propTLEToDS50s( key, ds50, PA )[:,1:]
+
+# -----------------------------------------------------------------------------------------------------
+def compare( E, holders_lines, PA, PAT ):
+    for i, (L1, L2) in enumerate( holders_lines ):
+        ds50      = E.epoch[i] + np.linspace( -3, 3, 577 )
+        ours, err = E.propagate( ds50 )
+        theirs    = dll_eph( L1, L2, ds50, PA, PAT )
+        ok        = err[0] == 0
+        dp        = np.max( np.linalg.norm( ours[0,ok,:3] - theirs[ok,:3], axis=1 ), initial=0 )
+        dv        = np.max( np.linalg.norm( ours[0,ok,3:] - theirs[ok,3:], axis=1 ), initial=0 )
+        tol       = TOL_DEEP if E.deep[i] else TOL_NEAR
+        print('{:5d} type {} {:5s} : {:9.3e} km {:9.3e} km/s'.format( E.satnum[i], E.ephtype[i], 
+              'deep' if E.deep[i] else 'near', dp, dv ) )
+        assert dp < tol[0] and dv < tol[1]
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards as PA
+    import public_astrostandards_tools as PAT
+    PA.init_all()
+    PAT.astro_time.load_time_constants( PAT.utils.get_test_time_constants(), PA )
+
+    # type 0, one element set at a time (each against its own epoch)
+    for L1, L2 in CATALOG:
+        E, idx, errors = PAT.sgp4_numpy.Sgp4Elements.from_lines( [ (L1, L2) ], PA )
+        assert not errors
+        compare( E, [ (L1, L2) ], PA, PAT )
+
+    # type 2 : same element sets with Brouwer mean motion
+    for L1, L2 in CATALOG[:5]:
+        TF = PAT.tle_fitter.tle_fitter( PA ).set_from_lines( L1, L2 ).set_type2()
+        T2 = PAT.tle_fitter.XA_TLE_to_str( TF.init_tle, PA )
+        E  = PAT.sgp4_numpy.Sgp4Elements.from_XA_TLE( [ TF.init_tle ] )
+        assert E.ephtype[0] == 2
+        compare( E, [ T2 ], PA, PAT )
+
+    # whole catalog at once through propagate_catalog; a type 4 element set goes to the DLL
+    T4    = PAT.tle_fitter.tle_fitter( PA ).set_from_lines( *CATALOG[0] ).set_satno( 99998 ).set_type4()
+    lines = CATALOG[:5] + [ T4.getLines() ]
+    PAT.sgp4.clearAll( PA )
+    dates = PAT.astro_time.convert_times( pd.date_range( '2025-12-23', '2025-12-24', freq='1min' ), PA )
+    t0 = time.time()
+    keys_n, eph_n, err_n = PAT.sgp4.propagate_catalog( lines, dates, PA, engine='numpy' )
+    t_n = time.time() - t0
+    t0 = time.time()
+    keys_d, eph_d, err_d = PAT.sgp4.propagate_catalog( lines, dates, PA )
+    t_d = time.time() - t0
+    print('catalog : numpy {:.3f} s, dll {:.3f} s'.format( t_n, t_d ) )
+    assert keys_n[-1] > 0 and np.all( keys_n[:-1] == -1 )
+    assert np.max( np.abs( eph_n[-1] - eph_d[-1] ) ) < 1e-9
+    ok = np.isfinite( eph_d[:-1] ) & np.isfinite( eph_n[:-1] )
+    assert np.max( np.abs( eph_n[:-1][ok] - eph_d[:-1][ok] ) ) < TOL_DEEP[0]
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
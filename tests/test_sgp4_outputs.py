@@ -0,0 +1,37 @@
+import ctypes
+from types import SimpleNamespace
+import numpy as np
+
+# a stand-in for Sgp4PropDs50UTC( satKey, ds50, &mse, pos[3], vel[3], llh[3] ) : pos / vel / llh are 
+# simple functions of the time so we can check every row lands where it should
+def _fake_prop( key, ds50, mse, pos, vel, llh ):
+    mse.value = ds50
+    for k in range( 3 ):
+        pos[k] = 7000. * ( k + 1 ) + ds50
+        vel[k] = k - ds50
+        llh[k] = 10. * k + ds50
+    return 0
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+
+    PA    = SimpleNamespace( ctypes=ctypes, Sgp4PropDll=SimpleNamespace( Sgp4PropDs50UTC=_fake_prop ) )
+    ds50  = np.linspace( 27000., 27001., 25 )
+    theta = np.linspace( 0, 2 * np.pi, 25 )
+    res   = PAT.sgp4.propTLEToDS50s_outputs( 1, ds50, PA, outputs=( 'teme', 'llh', 'efg' ), theta=theta )
+
+    k = np.arange( 3 )
+    assert res['teme'].shape == (25,6) and res['llh'].shape == (25,3) and res['efg'].shape == (25,6)
+    assert np.allclose( res['teme'][:,:3], 7000. * ( k + 1 ) + ds50[:,None] )
+    assert np.allclose( res['teme'][:,3:], k - ds50[:,None] )
+    assert np.allclose( res['llh'], 10. * k + ds50[:,None] )
+    P, V = PAT.coordinates.teme_efg_rotate( theta, res['teme'][:,:3], res['teme'][:,3:] )
+    assert np.allclose( res['efg'], np.hstack( ( P, V ) ) )
+
+    # only what was asked for
+    assert set( PAT.sgp4.propTLEToDS50s_outputs( 1, ds50, PA, outputs=( 'llh', ) ) ) == { 'llh' }
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
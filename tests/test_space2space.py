@@ -27,11 +27,10 @@ test_dates = PAT.astro_time.convert_times( test_dates, PA )
 # ---------------------------------------------------------------------------------------
 # we'll build some synthetic observations and convert them to UDL format
 # generate the ephemeris
-ISS_ephem = PAT.sgp4.propTLE_df( test_dates.copy(), *ISS, PA )
+# to use the sensor.compute_looks, we need LLH data too (required for looks); get it from the same pass
+ISS_ephem = PAT.sgp4.propTLE_df( test_dates.copy(), *ISS, PA, outputs=['teme','llh'] )
 TDR_ephem = PAT.sgp4.propTLE_df( test_dates.copy(), *TDR, PA )
 
-# to use the sensor.compute_looks, we need to add in LLH data... (required for looks)
-ISS_ephem = PAT.coordinates.TEME_to_LLH( ISS_ephem, PA )
 # generate the look vectors
 looks = PAT.sensor.compute_looks( ISS_ephem, TDR_ephem, PA)
 
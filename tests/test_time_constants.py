@@ -0,0 +1,4 @@
+import public_astrostandards_tools as PAT
+
+# run the simple test
+PAT.time_constants.test()
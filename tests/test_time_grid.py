@@ -0,0 +1,35 @@
+import ctypes
+from types import SimpleNamespace
+import pandas as pd
+
+def _comp_pos( ds50_et, uvec, mag ):
+    for k in range( 3 ):
+        uvec[k] = [ 1., 0., 0. ][k]
+    mag.value = ds50_et
+
+# -----------------------------------------------------------------------------------------------------
+def test():
+    import public_astrostandards_tools as PAT
+    AT = PAT.astro_time
+
+    PAT.time_constants.on_load( None )
+    PA   = SimpleNamespace( ctypes       = ctypes,
+                            TimeFuncDll  = SimpleNamespace( UTCToUT1       = lambda X : X,
+                                                            UTCToET        = lambda X : X + 69.184 / 86400.,
+                                                            UTCToTAI       = lambda X : X + 37. / 86400.,
+                                                            ThetaGrnwchFK5 = lambda X : float( AT.theta_grnwch_fk5( X ) ) ),
+                            AstroFuncDll = SimpleNamespace( CompSunPos = _comp_pos, CompMoonPos = _comp_pos ) )
+    grid = AT.TimeGrid( pd.date_range( '2025-12-23', periods=10, freq='1min' ), PA )
+
+    # a caller scribbling on its result doesn't reach the next satellite on the grid
+    first = grid.sun()
+    first[0][0] = -1.
+    first.append( None )
+    again = grid.sun()
+    assert len( again ) == 10 and again[0][0] == grid.ds50_et[0]
+    assert again is not first and again[0] is not first[0]
+    assert PAT.sensor.moon_at_time( grid, PA ) == grid.moon()
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,39 @@
+import ctypes
+from types import SimpleNamespace
+import pandas as pd
+
+# -----------------------------------------------------------------------------------------------------
+def test( tmp_path=None ):
+    import os, tempfile
+    import public_astrostandards_tools as PAT
+    AT = PAT.astro_time
+
+    # a harness whose TimeFuncDll takes any file
+    PA   = SimpleNamespace( Cstr       = lambda S, N : ctypes.create_string_buffer( S.encode(), N ),
+                            TimeFuncDll = SimpleNamespace( TimeFuncLoadFile = lambda F : 0 ) )
+    path = os.path.join( str( tmp_path or tempfile.mkdtemp() ), 'reduced_time_constants.dat' )
+    with open( path, 'w' ) as F:
+        F.write( 'old\n' )
+    AT.load_time_constants( path, PA )
+
+    # the file is rewritten in place (as utils.update_time_constants does) and loaded again
+    AT._TIME_CACHE.put( ( 'test', ), pd.DataFrame( { 'ds50_utc' : [ 1. ] } ) )
+    gen = PAT.time_constants.generation()
+    with open( path, 'w' ) as F:
+        F.write( 'new\n' )
+    AT.load_time_constants( path, PA )
+    assert len( AT._TIME_CACHE ) == 0
+    assert PAT.time_constants.generation() == gen + 1
+    assert PAT.time_constants._LOADED['engine'] is None
+
+    # the cache holds complete frames; asking for a lazy one from it is refused
+    try:
+        AT.convert_times( pd.date_range( '2025-01-01', periods=3, freq='h' ), PA, cache=True, lazy=True )
+    except AssertionError as e:
+        assert 'cache and lazy do not mix' in str( e )
+    else:
+        raise RuntimeError( 'convert_times took cache=True with lazy=True' )
+
+# =====================================================================================================
+if __name__ == "__main__":
+    test()